@@ -1,7 +1,7 @@
 """Public API routes — the contract Karen Whisperer tools call.
 
 Three clean GET endpoints that wrap existing cache/tool logic:
-    GET /api/products/search  — FTS5 product search
+    GET /api/products/search  — FTS5 product search, with optional facet filters
     GET /api/promos/active    — Active promotions
     GET /api/store/info       — Store configuration & hours
 """
@@ -14,6 +14,14 @@ import structlog
 from fastapi import APIRouter, Query, Request
 from pydantic import BaseModel, Field
 
+from ..cache.l2_cache import SearchFilters
+from ..cache.query import (
+    PRODUCT_RESULT_DEPTH,
+    canonicalize_query,
+    code_cache_key,
+    product_cache_key,
+    product_code,
+)
 from ..mind import mind_bus, MindEvent
 
 logger = structlog.get_logger(__name__)
@@ -42,6 +50,7 @@ class ProductSearchResponse(BaseModel):
     result_count: int
     search_time_ms: float
     cache_hit: bool
+    facets: Optional[Dict[str, Any]] = None
 
 
 class PromoResult(BaseModel):
@@ -81,32 +90,56 @@ async def search_products(
     request: Request,
     q: str = Query(..., min_length=1, description="Search query"),
     limit: int = Query(5, ge=1, le=20, description="Max results"),
+    category: Optional[str] = Query(None, description="Only this category (case-insensitive)"),
+    location: Optional[str] = Query(None, description="Only this store location (case-insensitive)"),
+    min_price: Optional[float] = Query(None, ge=0, description="Minimum price, inclusive"),
+    max_price: Optional[float] = Query(None, ge=0, description="Maximum price, inclusive"),
+    facets: bool = Query(False, description="Include category/location counts and price range"),
 ):
     """Search products by name, SKU, category, or description.
 
     Uses FTS5 full-text search with BM25 relevance ranking.
-    L1 cache is checked first for repeated queries.
+    L1 cache is checked first for repeated queries. A scanner-style query
+    (exact SKU, UPC or EAN) is answered by an indexed lookup instead.
+    Filters are applied inside the L2 query; filtered searches skip L1.
     """
     start = time.time()
     l1 = getattr(request.app.state, "l1_cache", None)
     l2 = getattr(request.app.state, "l2_cache", None)
 
-    cache_key = f"product:{q.lower().strip()}"
     cache_hit = False
+    exact = False
     products = []
+    filters = SearchFilters(category, location, min_price, max_price)
+    filtered = filters != SearchFilters()
+
+    code = product_code(q)
+    if code and l2 and not filtered:
+        if l1:
+            products, cache_hit = await l1.get_or_load(code_cache_key(code), lambda: l2.lookup_records(code))
+        else:
+            products = await l2.lookup_records(code)
+        exact = bool(products)
+
+    canonical = canonicalize_query(q)
+    if filtered and l2:
+        products = await l2.search_records(canonical, max_results=limit, filters=filters)
+    elif not exact and l2:
+        l2.record_query(canonical)
+
+        # L1 check, coalescing concurrent misses into one L2 FTS5 search.
+        # L1 holds lean ProductRecords; response models are built below.
+        if l1:
+            cached, cache_hit = await l1.get_or_load(
+                product_cache_key(q), lambda: l2.search_records(canonical, max_results=PRODUCT_RESULT_DEPTH)
+            )
+            products = (cached or [])[:limit]
+        else:
+            products = await l2.search_records(canonical, max_results=limit)
 
-    # L1 check
-    if l1:
-        cached = l1.get(cache_key)
-        if cached is not None:
-            cache_hit = True
-            products = cached if isinstance(cached, list) else [cached]
-
-    # L2 FTS5 search
-    if not products and l2:
-        products = await l2.search_products(q, max_results=limit)
-        if products and l1:
-            l1.set(cache_key, products)
+    facet_counts = None
+    if facets and l2:
+        facet_counts = await l2.facet_counts(canonical, filters if filtered else None)
 
     search_time_ms = round((time.time() - start) * 1000, 2)
 
@@ -115,7 +148,7 @@ async def search_products(
         type="cache_hit" if cache_hit else "search",
         data={
             "query": q, "result_count": len(products),
-            "tier": "L1" if cache_hit else "L2",
+            "tier": "L1" if cache_hit else ("exact" if exact else "L2"),
             "latency_ms": search_time_ms, "endpoint": "/api/products/search",
         },
     ))
@@ -126,14 +159,15 @@ async def search_products(
                 sku=p.sku, name=p.name, category=p.category,
                 location=p.location, price=p.price,
                 description=p.description,
-                relevance_score=getattr(p, "relevance_score", None),
+                relevance_score=p.relevance_score,
             )
-            for p in products[:limit]
+            for p in products
         ],
         query=q,
         result_count=len(products),
         search_time_ms=search_time_ms,
         cache_hit=cache_hit,
+        facets=facet_counts,
     )
 
 
@@ -197,12 +231,11 @@ async def get_store_info(request: Request):
     l2 = getattr(request.app.state, "l2_cache", None)
     l2_stats = l2.stats() if l2 else {}
 
-    # Pull distinct categories from products
+    # Precomputed per-category counts, memoized per catalog version
     categories: List[str] = []
     if l2:
         try:
-            all_products = await l2.get_all_products(limit=200)
-            categories = sorted(set(p.category for p in all_products))
+            categories = list(await l2.categories())
         except Exception:
             pass
 
@@ -1,7 +1,24 @@
 """Cache layer for fast product/promo lookups."""
 from .l1_cache import L1Cache
-from .l2_cache import ProductCache, ThreadSafeProductCache, L2Cache
+from .l2_cache import (
+    DeltaBaseMismatch, ProductCache, ProductRecord, SearchFilters, ThreadSafeProductCache, L2Cache,
+)
 from .schemas import Promo, CacheSyncPayload
+from .query import canonicalize_query, product_cache_key
+from .response_cache import ResponseCache
 
-__all__ = ["L1Cache", "L2Cache", "ProductCache", "ThreadSafeProductCache", "Promo", "CacheSyncPayload"]
+__all__ = [
+    "L1Cache",
+    "L2Cache",
+    "ResponseCache",
+    "ProductCache",
+    "ProductRecord",
+    "SearchFilters",
+    "ThreadSafeProductCache",
+    "Promo",
+    "CacheSyncPayload",
+    "DeltaBaseMismatch",
+    "canonicalize_query",
+    "product_cache_key",
+]
 
@@ -0,0 +1,189 @@
+"""Offline product embeddings.
+
+Everything here runs on a CPU-only kiosk with no network:
+
+- HashedNgramEmbedder: word and character n-gram TF-IDF features hashed
+  into a fixed number of signed buckets (the "hashing trick"), fitted on the
+  catalog so IDF down-weights words every product shares.
+- SentenceTransformerEmbedder: a local sentence-transformers model, if one
+  is installed, for paraphrase-level matches.
+
+Vectors are stored and searched by vector_index.py. NumPy is required (it
+is optional for the rest of the cache layer, so import this module lazily).
+"""
+import json
+import math
+import os
+import re
+import zlib
+from abc import ABC, abstractmethod
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence, Tuple, Type
+
+import numpy as np
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+META_FILE = "meta.json"
+
+# Features whose hashed slot is memoized per embedder; covers a large
+# catalog's vocabulary while keeping query-time growth bounded.
+SLOT_CACHE_SIZE = 1 << 18
+
+
+def _replace_file(path: Path, write) -> None:
+    """Write *path* via a temp file and an atomic rename."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+class Embedder(ABC):
+    """Maps texts to L2-normalised float32 vectors of width ``dim``."""
+
+    kind: str = ""
+    dim: int
+
+    def fit(self, texts: Iterable[str]) -> None:
+        """Learn corpus statistics from the catalog texts (no-op by default)."""
+
+    @abstractmethod
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Return a ``(len(texts), dim)`` float32 matrix of unit rows."""
+
+    def save(self, directory: Path) -> Dict:
+        """Persist fitted state under *directory* and return its config."""
+        return {"kind": self.kind, "dim": self.dim}
+
+    @classmethod
+    @abstractmethod
+    def load(cls, directory: Path, config: Dict) -> "Embedder":
+        """Rebuild an embedder from save()'s *config*."""
+
+
+class HashedNgramEmbedder(Embedder):
+    """TF-IDF over words and character n-grams, hashed into ``dim`` buckets.
+
+    Character n-grams of each padded word (``#diesel#`` -> ``#di``, ``die``,
+    ...) let plurals, misspellings and partial SKUs land near the right
+    product; a per-feature sign keeps bucket collisions from only ever
+    adding up.
+    """
+
+    kind = "hashed"
+
+    def __init__(self, dim: int = 1024, ngram: int = 3, ngram_weight: float = 1.0):
+        self.dim = dim
+        self.ngram = ngram
+        self.ngram_weight = ngram_weight
+        self.idf = np.ones(dim, dtype=np.float32)
+        self._slot = lru_cache(maxsize=SLOT_CACHE_SIZE)(self._hash_slot)
+
+    def _hash_slot(self, feature: str) -> Tuple[int, float]:
+        """Return (bucket, signed weight) for *feature* (memoized as _slot)."""
+        h = zlib.crc32(feature.encode("utf-8"))
+        weight = 1.0 if feature.startswith("w:") else self.ngram_weight
+        return h % self.dim, (weight if h & 0x80000000 else -weight)
+
+    def _features(self, text: str) -> Counter:
+        counts: Counter = Counter()
+        n = self.ngram
+        for word in _TOKEN.findall(text.lower()):
+            counts["w:" + word] += 1
+            padded = f"#{word}#"
+            for i in range(len(padded) - n + 1):
+                counts[padded[i:i + n]] += 1
+        return counts
+
+    def fit(self, texts: Iterable[str]) -> None:
+        df = np.zeros(self.dim, dtype=np.float64)
+        docs = 0
+        for text in texts:
+            df[list({self._slot(f)[0] for f in self._features(text)})] += 1
+            docs += 1
+        self.idf = (np.log((1 + docs) / (1 + df)) + 1.0).astype(np.float32)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            vec = matrix[row]
+            for feature, count in self._features(text).items():
+                bucket, weight = self._slot(feature)
+                vec[bucket] += weight * (1.0 + math.log(count))
+        matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    def save(self, directory: Path) -> Dict:
+        _replace_file(directory / "idf.npy", lambda f: np.save(f, self.idf))
+        return {"kind": self.kind, "dim": self.dim, "ngram": self.ngram, "ngram_weight": self.ngram_weight}
+
+    @classmethod
+    def load(cls, directory: Path, config: Dict) -> "HashedNgramEmbedder":
+        embedder = cls(dim=config["dim"], ngram=config["ngram"], ngram_weight=config["ngram_weight"])
+        embedder.idf = np.load(directory / "idf.npy")
+        return embedder
+
+
+class SentenceTransformerEmbedder(Embedder):
+    """A local sentence-transformers model (path or cached name), run on CPU."""
+
+    kind = "sentence-transformers"
+
+    def __init__(self, model: str, batch_size: int = 64):
+        from sentence_transformers import SentenceTransformer  # type: ignore
+
+        self.model_name = model
+        self.batch_size = batch_size
+        self._model = SentenceTransformer(model, device="cpu")
+        self.dim = int(self._model.get_sentence_embedding_dimension())
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = self._model.encode(
+            list(texts), batch_size=self.batch_size, normalize_embeddings=True, convert_to_numpy=True,
+        )
+        return np.ascontiguousarray(vectors, dtype=np.float32).reshape(len(texts), self.dim)
+
+    def save(self, directory: Path) -> Dict:
+        return {"kind": self.kind, "dim": self.dim, "model": self.model_name}
+
+    @classmethod
+    def load(cls, directory: Path, config: Dict) -> "SentenceTransformerEmbedder":
+        return cls(config["model"])
+
+
+EMBEDDERS: Dict[str, Type[Embedder]] = {
+    HashedNgramEmbedder.kind: HashedNgramEmbedder,
+    SentenceTransformerEmbedder.kind: SentenceTransformerEmbedder,
+}
+
+
+def make_embedder(kind: str = "hashed", dim: int = 1024, model: str = "") -> Embedder:
+    """Build a fresh embedder by kind name.
+
+    Raises:
+        ValueError: If *kind* is not in EMBEDDERS
+    """
+    if kind == HashedNgramEmbedder.kind:
+        return HashedNgramEmbedder(dim=dim)
+    if kind == SentenceTransformerEmbedder.kind:
+        return SentenceTransformerEmbedder(model)
+    raise ValueError(f"Unknown embedder {kind!r}; expected one of {sorted(EMBEDDERS)}")
+
+
+def save_meta(directory: Path, meta: Dict) -> None:
+    """Write the index metadata last, so a reader never sees a half-built index."""
+    payload = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+    _replace_file(directory / META_FILE, lambda f: f.write(payload))
+
+
+def load_meta(directory: Path) -> Optional[Dict]:
+    """Return saved index metadata, or None if *directory* has no index."""
+    try:
+        return json.loads((directory / META_FILE).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
@@ -1,91 +1,601 @@
 """L1 (hot) in-memory cache with TTL."""
+import asyncio
+import heapq
+import sys
 import time
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
 from threading import Lock
 import logging
 
 logger = logging.getLogger(__name__)
 
+_ATOMIC_TYPES = (str, bytes, bytearray, int, float, bool, type(None))
+
+
+def estimate_size(value: Any, _seen: Optional[set] = None) -> int:
+    """Estimate the memory footprint of *value* in bytes.
+
+    Walks containers and object attributes (including pydantic models) and
+    sums ``sys.getsizeof`` of everything reachable, counting shared objects
+    once. This is an approximation, but it is consistent, which is what a
+    byte budget needs.
+    """
+    seen = set() if _seen is None else _seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    size = sys.getsizeof(value)
+    if isinstance(value, _ATOMIC_TYPES):
+        return size
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, seen) + estimate_size(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, seen) for item in value)
+    elif hasattr(value, "__dict__"):
+        size += estimate_size(vars(value), seen)
+    elif hasattr(value, "__slots__"):
+        size += sum(
+            estimate_size(getattr(value, slot), seen)
+            for slot in value.__slots__
+            if hasattr(value, slot)
+        )
+    return size
+
+
+class _Entry:
+    """Single cached value with its insertion and expiry times.
+
+    ``stale_at`` is the soft TTL deadline; it equals ``expires_at`` unless the
+    entry was loaded with stale-while-revalidate enabled, in which case
+    ``loader`` and ``ttl`` are kept so the entry can be refreshed.
+    """
+
+    __slots__ = ("value", "timestamp", "expires_at", "size", "stale_at", "loader", "ttl", "hits")
+
+    def __init__(
+        self,
+        value: Any,
+        timestamp: float,
+        expires_at: float,
+        size: int = 0,
+        stale_at: Optional[float] = None,
+        loader: Optional[Callable[[], Awaitable[Any]]] = None,
+        ttl: Optional[float] = None,
+    ):
+        self.value = value
+        self.timestamp = timestamp
+        self.expires_at = expires_at
+        self.size = size
+        self.stale_at = expires_at if stale_at is None else stale_at
+        self.loader = loader
+        self.ttl = ttl
+        self.hits = 0
+
+
+class _Shard:
+    """Independent LRU segment with its own lock and hit/miss counters.
+
+    Besides the recency-ordered entries, each shard keeps a min-heap of
+    ``(expires_at, key)`` so expired entries can be found without scanning.
+    Heap items are invalidated lazily: an item only counts if the live entry
+    for that key still carries the same ``expires_at``.
+    """
+
+    def __init__(self, max_size: int, max_bytes: Optional[int] = None):
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.expiry: List[Tuple[float, str]] = []
+        self.lock = Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired_evictions = 0
+
+    def remove(self, key: str) -> None:
+        """Drop *key* and release its bytes (caller holds the lock)."""
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def clear(self) -> None:
+        """Drop every entry (caller holds the lock)."""
+        self.entries.clear()
+        self.expiry.clear()
+        self.bytes = 0
+
+    def evict_oldest(self) -> None:
+        """Evict least recently accessed entry (caller holds the lock)."""
+        if self.entries:
+            _, entry = self.entries.popitem(last=False)
+            self.bytes -= entry.size
+
+    def make_room(self, incoming: int) -> None:
+        """Evict LRU entries until *incoming* bytes or one more entry fit.
+
+        With a byte budget, eviction is driven by bytes and the entry count
+        limit is not applied (caller holds the lock).
+        """
+        if self.max_bytes is not None:
+            while self.entries and self.bytes + incoming > self.max_bytes:
+                self.evict_oldest()
+        elif len(self.entries) >= self.max_size:
+            self.evict_oldest()
+
+    def track_expiry(self, key: str, expires_at: float) -> None:
+        """Index *key* by expiry time (caller holds the lock)."""
+        heapq.heappush(self.expiry, (expires_at, key))
+        # Overwrites and LRU evictions leave dead heap items behind; rebuild
+        # once they outnumber live entries so the heap stays O(entries).
+        if len(self.expiry) > 2 * len(self.entries) + 64:
+            self.expiry = [(e.expires_at, k) for k, e in self.entries.items()]
+            heapq.heapify(self.expiry)
+
+    def sweep(self, now: float, budget: int) -> Tuple[int, int]:
+        """Drop up to *budget* heap items that expired before *now*.
+
+        Returns:
+            Tuple of (heap items popped, entries evicted)
+        """
+        popped = evicted = 0
+        while self.expiry and popped < budget and self.expiry[0][0] < now:
+            expires_at, key = heapq.heappop(self.expiry)
+            popped += 1
+            entry = self.entries.get(key)
+            if entry is not None and entry.expires_at == expires_at:
+                self.remove(key)
+                evicted += 1
+        self.expired_evictions += evicted
+        return popped, evicted
+
 
 class L1Cache:
-    """Fast in-memory cache with TTL and LRU eviction."""
-    
-    def __init__(self, max_size: int = 1000, ttl_seconds: int = 300):
+    """Fast in-memory cache with TTL and LRU eviction.
+
+    Entries live in ``OrderedDict`` segments kept in recency order: a hit
+    moves the key to the end and eviction pops from the front, so ``get`` and
+    ``set`` are O(1) regardless of ``max_size``.
+
+    With ``shards > 1`` keys are spread across independent segments by hash,
+    each guarded by its own lock, so concurrent handlers touching different
+    keys do not serialize on a single lock. Capacity is split evenly between
+    shards, which makes LRU ordering per-shard rather than global.
+
+    ``ttl_seconds`` is the default lifetime; ``set(..., ttl=...)`` overrides
+    it per entry. When ``max_bytes`` is given, each value is measured with
+    ``size_estimator`` and eviction keeps the total under that budget instead
+    of limiting the entry count.
+
+    ``get_or_load`` adds single-flight loading: concurrent misses for the same
+    key share one in-flight loader call instead of each hitting L2.
+
+    Setting ``hard_ttl_seconds`` above ``ttl_seconds`` enables
+    stale-while-revalidate for entries stored through ``get_or_load``: after
+    the soft TTL the stale value is still returned immediately while the
+    entry's loader refreshes it in the background, until the hard TTL is
+    reached. Entries written with plain ``set`` have no loader and expire at
+    the soft TTL as usual.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1000,
+        ttl_seconds: int = 300,
+        shards: int = 1,
+        max_bytes: Optional[int] = None,
+        size_estimator: Callable[[Any], int] = estimate_size,
+        hard_ttl_seconds: Optional[int] = None,
+    ):
+        if shards < 1:
+            raise ValueError("shards must be >= 1")
         self.max_size = max_size
         self.ttl_seconds = ttl_seconds
-        self._cache: Dict[str, Dict[str, Any]] = {}
-        self._lock = Lock()
-        self._hits = 0
-        self._misses = 0
-    
+        self.max_bytes = max_bytes
+        self.hard_ttl_seconds = hard_ttl_seconds
+        self._size_estimator = size_estimator
+        per_shard = max(1, -(-max_size // shards))
+        per_shard_bytes = max_bytes // shards if max_bytes is not None else None
+        self._shards: List[_Shard] = [_Shard(per_shard, per_shard_bytes) for _ in range(shards)]
+        self._sweeping = False
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._load_tasks: Dict[asyncio.Future, asyncio.Task] = {}  # loads started by get_or_load
+        self._load_waiters: Dict[asyncio.Future, int] = {}
+        self._inflight_lock = Lock()
+        self._epoch = 0  # bumped by invalidate(); loads started earlier are not cached
+        self._loads = 0
+        self._coalesced = 0
+        self._stale_served = 0
+        self._refreshes = 0
+        self._refresh_failures = 0
+        self._refresh_tasks: set = set()
+
+    @property
+    def stale_while_revalidate(self) -> bool:
+        """Whether stale entries may be served while they are refreshed."""
+        return self.hard_ttl_seconds is not None and self.hard_ttl_seconds > self.ttl_seconds
+
+    def _shard_for(self, key: str) -> _Shard:
+        """Select the shard owning *key*."""
+        if len(self._shards) == 1:
+            return self._shards[0]
+        return self._shards[hash(key) % len(self._shards)]
+
     def get(self, key: str) -> Optional[Any]:
-        """Get value from cache if exists and not expired."""
-        with self._lock:
-            if key not in self._cache:
-                self._misses += 1
+        """Get value from cache if exists and not expired.
+
+        A stale entry (past its soft TTL but not its hard TTL) is returned
+        as a hit and a background refresh is scheduled for it.
+        """
+        shard = self._shard_for(key)
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is None:
+                shard.misses += 1
                 return None
-            
-            entry = self._cache[key]
-            
+
             # Check TTL
-            if time.time() - entry["timestamp"] > self.ttl_seconds:
-                del self._cache[key]
-                self._misses += 1
+            now = time.time()
+            if now > entry.expires_at:
+                shard.remove(key)
+                shard.expired_evictions += 1
+                shard.misses += 1
                 return None
-            
-            # Update access time for LRU
-            entry["last_access"] = time.time()
-            self._hits += 1
-            return entry["value"]
-    
-    def set(self, key: str, value: Any) -> None:
-        """Set value in cache with current timestamp."""
-        with self._lock:
+
+            # Mark as most recently used
+            shard.entries.move_to_end(key)
+            shard.hits += 1
+            entry.hits += 1
+            value = entry.value
+            stale = now > entry.stale_at
+            loader, ttl = entry.loader, entry.ttl
+
+        if stale:
+            self._stale_served += 1
+            self._schedule_refresh(key, loader, ttl)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Set value in cache with current timestamp.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Lifetime in seconds for this entry (default: ``ttl_seconds``)
+        """
+        self._store(key, value, ttl, loader=None)
+
+    def _store(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[float],
+        loader: Optional[Callable[[], Awaitable[Any]]],
+    ) -> None:
+        """Insert *value*, keeping *loader* for stale-while-revalidate."""
+        size = 0
+        if self.max_bytes is not None:
+            # Measure outside the lock; estimation walks the whole value
+            size = sys.getsizeof(key) + self._size_estimator(value)
+
+        soft_ttl = self.ttl_seconds if ttl is None else ttl
+        hard_ttl = soft_ttl
+        if loader is not None and self.stale_while_revalidate:
+            hard_ttl = max(soft_ttl, soft_ttl + self.hard_ttl_seconds - self.ttl_seconds)
+        else:
+            loader = None
+
+        shard = self._shard_for(key)
+        with shard.lock:
+            shard.remove(key)
+            if shard.max_bytes is not None and size > shard.max_bytes:
+                logger.debug(f"L1 value for {key!r} exceeds byte budget ({size} bytes), not cached")
+                return
+
             # Evict oldest if at capacity
-            if len(self._cache) >= self.max_size and key not in self._cache:
-                self._evict_oldest()
-            
-            self._cache[key] = {
-                "value": value,
-                "timestamp": time.time(),
-                "last_access": time.time()
-            }
-    
+            shard.make_room(size)
+
+            now = time.time()
+            expires_at = now + hard_ttl
+            shard.entries[key] = _Entry(
+                value, now, expires_at, size,
+                stale_at=now + soft_ttl, loader=loader, ttl=ttl,
+            )
+            shard.bytes += size
+            shard.track_expiry(key, expires_at)
+
+    def _begin_load(self, key: str) -> Tuple[asyncio.Future, bool]:
+        """Register a load for *key*; returns (future, is_owner)."""
+        with self._inflight_lock:
+            pending = self._inflight.get(key)
+            if pending is not None:
+                return pending, False
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+            return future, True
+
+    async def _run_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float],
+        future: asyncio.Future,
+        epoch: int,
+    ) -> Any:
+        """Run *loader*, cache its result and resolve *future* for waiters.
+
+        The result is not cached if the cache was invalidated after the
+        load started (*epoch* is out of date) or the load was detached from
+        *key*; waiters still receive it.
+        """
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()  # Mark retrieved; waiters re-raise it themselves
+            raise
+        else:
+            with self._inflight_lock:
+                current = epoch == self._epoch and self._inflight.get(key) is future
+            if value and current:
+                self._store(key, value, ttl, loader)
+            future.set_result(value)
+            return value
+        finally:
+            with self._inflight_lock:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+
+    def _schedule_refresh(
+        self,
+        key: str,
+        loader: Optional[Callable[[], Awaitable[Any]]],
+        ttl: Optional[float],
+    ) -> None:
+        """Start a background reload of a stale *key* unless one is running."""
+        if loader is None:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Called outside the event loop; serve stale only
+
+        future, owner = self._begin_load(key)
+        if owner:
+            task = asyncio.create_task(self._refresh(key, loader, ttl, future, self._epoch))
+            self._refresh_tasks.add(task)
+            task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _refresh(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float],
+        future: asyncio.Future,
+        epoch: int,
+    ) -> None:
+        """Background refresh task for stale-while-revalidate."""
+        try:
+            await self._run_load(key, loader, ttl, future, epoch)
+            self._refreshes += 1
+        except Exception as e:
+            self._refresh_failures += 1
+            logger.warning(f"L1 background refresh failed for {key!r}: {e}")
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+    ) -> Tuple[Any, bool]:
+        """Return the cached value for *key*, loading it once on a miss.
+
+        If another caller is already loading *key*, this awaits that load
+        instead of starting a second one. Falsy results (``None``, empty
+        lists) are returned to every waiter but not cached, matching how
+        callers treat "not found".
+
+        Args:
+            key: Cache key
+            loader: Zero-argument coroutine function producing the value
+            ttl: Lifetime in seconds for the loaded entry
+
+        Returns:
+            Tuple of (value, cache_hit)
+        """
+        value = self.get(key)
+        if value is not None:
+            return value, True
+
+        future, owner = self._begin_load(key)
+        if owner:
+            self._loads += 1
+            # The load runs as its own task so cancelling the caller that
+            # started it does not cancel it for everyone coalesced onto it
+            task = asyncio.create_task(self._run_load(key, loader, ttl, future, self._epoch))
+            self._load_tasks[future] = task
+            task.add_done_callback(lambda t, f=future: self._load_finished(f, t))
+        else:
+            self._coalesced += 1
+        return await self._wait_load(future), False
+
+    def _load_finished(self, future: asyncio.Future, task: asyncio.Task) -> None:
+        self._load_tasks.pop(future, None)
+        if not task.cancelled():
+            task.exception()  # Mark retrieved; waiters re-raise it from the future
+
+    async def _wait_load(self, future: asyncio.Future) -> Any:
+        """Await a shared load; cancel it only when its last waiter is cancelled."""
+        self._load_waiters[future] = self._load_waiters.get(future, 0) + 1
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if self._load_waiters[future] == 1 and not future.done():
+                task = self._load_tasks.get(future)
+                if task is not None:
+                    task.cancel()
+            raise
+        finally:
+            remaining = self._load_waiters.pop(future) - 1
+            if remaining:
+                self._load_waiters[future] = remaining
+
+    def snapshot(self, max_keys: int = 200, prefix: str = "") -> List[Dict[str, Any]]:
+        """Return the hottest live entries, most hits first.
+
+        Args:
+            max_keys: Maximum number of entries returned
+            prefix: Only include keys starting with this prefix
+
+        Returns:
+            List of ``{"key", "value", "hits"}`` dicts
+        """
+        now = time.time()
+        live = []
+        for shard in self._shards:
+            with shard.lock:
+                live.extend(
+                    (entry.hits, key, entry.value)
+                    for key, entry in shard.entries.items()
+                    if key.startswith(prefix) and entry.expires_at >= now
+                )
+        hottest = heapq.nlargest(max_keys, live, key=lambda item: item[0])
+        return [{"key": key, "value": value, "hits": hits} for hits, key, value in hottest]
+
+    def restore(self, entries: List[Dict[str, Any]]) -> int:
+        """Load entries produced by :meth:`snapshot` with a fresh TTL.
+
+        Hit counts are carried over so hot keys stay hot across restarts.
+
+        Returns:
+            Number of entries restored
+        """
+        restored = 0
+        for item in entries:
+            key = item["key"]
+            self.set(key, item["value"])
+            shard = self._shard_for(key)
+            with shard.lock:
+                entry = shard.entries.get(key)
+                if entry is not None:
+                    entry.hits = int(item.get("hits", 0))
+                    restored += 1
+        return restored
+
     def invalidate(self, key: Optional[str] = None) -> None:
-        """Invalidate specific key or entire cache."""
-        with self._lock:
-            if key:
-                self._cache.pop(key, None)
-            else:
-                self._cache.clear()
-                logger.info("L1 cache invalidated")
-    
-    def _evict_oldest(self) -> None:
-        """Evict least recently accessed entry."""
-        if not self._cache:
+        """Invalidate specific key or entire cache.
+
+        Loads and refreshes already running are detached: their callers
+        still get the result, but it is not cached, and later callers start
+        a fresh load.
+        """
+        if key:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+            shard = self._shard_for(key)
+            with shard.lock:
+                shard.remove(key)
             return
-        
-        oldest_key = min(
-            self._cache.keys(),
-            key=lambda k: self._cache[k]["last_access"]
-        )
-        del self._cache[oldest_key]
-    
+
+        with self._inflight_lock:
+            self._epoch += 1
+            self._inflight.clear()
+        for shard in self._shards:
+            with shard.lock:
+                shard.clear()
+        logger.info("L1 cache invalidated")
+
+    def sweep_expired(self, max_batch: int = 256) -> int:
+        """Evict expired entries, touching at most *max_batch* heap items.
+
+        Each shard lock is held only while its part of the batch is
+        processed, so a sweep never stalls request handlers for long.
+
+        Returns:
+            Number of entries evicted
+        """
+        now = time.time()
+        remaining = max_batch
+        evicted = 0
+        for shard in self._shards:
+            if remaining <= 0:
+                break
+            with shard.lock:
+                popped, dropped = shard.sweep(now, remaining)
+            remaining -= popped
+            evicted += dropped
+        return evicted
+
+    async def sweeper(self, interval_s: float = 30.0, batch_size: int = 256) -> None:
+        """Background task that periodically evicts expired entries.
+
+        Sweeps in batches of *batch_size*, yielding to the event loop between
+        batches until no full batch remains.
+        """
+        self._sweeping = True
+        logger.info(f"L1 expiry sweeper started (interval={interval_s}s, batch_size={batch_size})")
+
+        while self._sweeping:
+            try:
+                await asyncio.sleep(interval_s)
+                while self._sweeping and self.sweep_expired(batch_size) >= batch_size:
+                    await asyncio.sleep(0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in L1 expiry sweeper: {e}", exc_info=True)
+
+    def stop_sweeper(self) -> None:
+        """Stop the background sweeper."""
+        self._sweeping = False
+
     def size(self) -> int:
         """Return current cache size."""
-        with self._lock:
-            return len(self._cache)
-    
+        total = 0
+        for shard in self._shards:
+            with shard.lock:
+                total += len(shard.entries)
+        return total
+
     def stats(self) -> Dict[str, Any]:
-        """Return cache statistics."""
-        with self._lock:
-            total = self._hits + self._misses
-            hit_rate = (self._hits / total * 100) if total > 0 else 0
-            
-            return {
-                "size": len(self._cache),
-                "max_size": self.max_size,
-                "hits": self._hits,
-                "misses": self._misses,
-                "hit_rate_pct": round(hit_rate, 2)
-            }
+        """Return cache statistics aggregated across shards."""
+        per_shard = []
+        for shard in self._shards:
+            with shard.lock:
+                per_shard.append({
+                    "size": len(shard.entries),
+                    "bytes": shard.bytes,
+                    "hits": shard.hits,
+                    "misses": shard.misses,
+                    "expired_evictions": shard.expired_evictions,
+                })
+
+        hits = sum(s["hits"] for s in per_shard)
+        misses = sum(s["misses"] for s in per_shard)
+        total = hits + misses
+        hit_rate = (hits / total * 100) if total > 0 else 0
+
+        stats = {
+            "size": sum(s["size"] for s in per_shard),
+            "max_size": self.max_size,
+            "bytes": sum(s["bytes"] for s in per_shard),
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate_pct": round(hit_rate, 2),
+            "expired_evictions": sum(s["expired_evictions"] for s in per_shard),
+            "loads": self._loads,
+            "coalesced": self._coalesced,
+            "stale_while_revalidate": self.stale_while_revalidate,
+            "stale_served": self._stale_served,
+            "refreshes": self._refreshes,
+            "refresh_failures": self._refresh_failures,
+            "shards": len(self._shards),
+        }
+        if len(self._shards) > 1:
+            stats["shard_stats"] = per_shard
+        return stats
@@ -5,18 +5,224 @@ FTS5 extension and BM25 ranking algorithm for relevance scoring.
 
 Performance target: <100ms search latency (NFR4)
 """
+import asyncio
+import queue
+import re
 import sqlite3
 import threading
+import time
+from collections import Counter, deque
+from functools import lru_cache
+from itertools import starmap
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Mapping, NamedTuple, Optional, Tuple, Union
 import structlog
 
 from ..models import Product as SearchProduct
+from .query import PRODUCT_RESULT_DEPTH, product_cache_key
+from .query_rewrite import DEFAULT_REWRITER, MIN_REPAIR_LENGTH, QueryRewriter, TypoIndex
 from .schemas import Product as CacheProduct, Promo
 
 logger = structlog.get_logger(__name__)
 
 
+class DeltaBaseMismatch(ValueError):
+    """A delta sync was computed against a different catalog version."""
+
+    def __init__(self, base_version: str, current_version: str):
+        super().__init__(
+            f"Delta base version {base_version!r} does not match current version {current_version!r}"
+        )
+        self.base_version = base_version
+        self.current_version = current_version
+
+# Connection PRAGMA profiles, selected via Settings.l2_sqlite_profile.
+# "read_heavy" suits kiosk serving: WAL lets searches proceed while a sync
+# writes, and mmap plus a larger page cache keep the FTS index in memory.
+CONNECTION_PROFILES: Dict[str, Dict[str, Any]] = {
+    "default": {},
+    "read_heavy": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "temp_store": "MEMORY",
+        "mmap_size": 64 * 1024 * 1024,
+        "cache_size": -16000,  # negative = KiB, so ~16 MiB per connection
+    },
+}
+
+# Columns of the FTS5 index, in declaration order (the bm25() weight order)
+FTS_COLUMNS = ("sku", "name", "category", "location", "description")
+
+# BM25 column-weight profiles, selected via Settings.l2_ranking_profile.
+# Unlisted columns weigh 1.0. "flat" is plain bm25(); "name_first" lets a
+# hit in the product name or SKU outrank one buried in the description.
+# Compare profiles with scripts/eval_ranking.py before changing weights.
+RANKING_PROFILES: Dict[str, Dict[str, float]] = {
+    "flat": {},
+    "name_first": {"sku": 2.0, "name": 5.0, "category": 1.0, "location": 0.5, "description": 0.5},
+}
+
+# A ranking is a profile name or an explicit column -> weight mapping
+Ranking = Union[str, Mapping[str, float]]
+
+# Secondary indexes on ``products``, by name suffix. A swapped-in generation
+# keeps the names it was built with (``products_g<N>_<suffix>``), since
+# SQLite cannot rename an index.
+_PRODUCT_INDEXES = {
+    "upc": "(upc) WHERE upc IS NOT NULL",
+    "ean": "(ean) WHERE ean IS NOT NULL",
+    "category": "(category COLLATE NOCASE, price)",
+    "location": "(location COLLATE NOCASE, price)",
+    "price": "(price)",
+}
+
+# Strips the ``products_`` / ``products_g<N>_`` prefix from index and trigger names
+_SCHEMA_PREFIX = re.compile(r"^products(?:_g\d+)?_")
+
+# Insert-or-update keyed by SKU; an existing row keeps its rowid
+_UPSERT_SQL = """
+    INSERT INTO {table} (sku, name, category, location, price, description, upc, ean)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(sku) DO UPDATE SET
+        name = excluded.name,
+        category = excluded.category,
+        location = excluded.location,
+        price = excluded.price,
+        description = excluded.description,
+        upc = excluded.upc,
+        ean = excluded.ean
+"""
+
+# Columns read back into a ProductRecord, in field order
+_PRODUCT_COLUMNS = ("sku", "name", "category", "location", "price", "description", "upc", "ean")
+_SELECT_PRODUCT = ", ".join(_PRODUCT_COLUMNS)
+
+# Ranked FTS5 search. bm25() is negative (more negative = more relevant),
+# so its negation is the relevance score. Column weights are bound
+# parameters, so every search and every ranking profile reuses the same
+# prepared statement; {filters} takes SearchFilters.where() clauses.
+_SEARCH_TEMPLATE = f"""
+    SELECT {", ".join("p." + c for c in _PRODUCT_COLUMNS)},
+           -bm25(products_fts, {", ".join("?" for _ in FTS_COLUMNS)}) AS relevance
+    FROM products_fts
+    JOIN products p ON p.id = products_fts.rowid
+    WHERE products_fts MATCH ?{{filters}}
+    ORDER BY relevance DESC
+    LIMIT ?
+"""
+_SEARCH_SQL = _SEARCH_TEMPLATE.format(filters="")
+
+
+@lru_cache(maxsize=32)
+def _search_sql(filters: str) -> str:
+    """Return the search statement with *filters* appended to its WHERE."""
+    return _SEARCH_TEMPLATE.format(filters=filters)
+
+# Prepared statements kept per connection. Every query this module issues
+# is a fixed string, so the cache only has to cover that set.
+STATEMENT_CACHE_SIZE = 64
+
+# Buffered query counts are flushed to SQLite once this many distinct
+# queries are pending or this many seconds have passed; past twice the key
+# limit (a flush falling behind), new distinct queries are not counted.
+QUERY_COUNT_FLUSH_KEYS = 1000
+QUERY_COUNT_FLUSH_INTERVAL_S = 60.0
+
+# Database-level settings that a read-only connection cannot change
+_WRITE_ONLY_PRAGMAS = frozenset({"journal_mode"})
+
+
+class ProductRecord(NamedTuple):
+    """Lean product row as decoded from SQLite.
+
+    Read paths return these plain tuples. Pydantic models are only built
+    by to_product() at the API boundary (search_products and friends).
+    """
+
+    sku: str
+    name: str
+    category: str
+    location: str
+    price: float
+    description: str
+    upc: Optional[str] = None
+    ean: Optional[str] = None
+    relevance_score: Optional[float] = None
+
+    def to_product(self) -> SearchProduct:
+        """Build the validated API model for this row."""
+        return SearchProduct(**self._asdict())
+
+
+def connection_profile(name: str) -> Dict[str, Any]:
+    """Return the PRAGMA settings for profile *name*.
+
+    Raises:
+        ValueError: If the profile is unknown
+    """
+    try:
+        return CONNECTION_PROFILES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown SQLite profile {name!r}; expected one of {sorted(CONNECTION_PROFILES)}"
+        ) from None
+
+
+class SearchFilters(NamedTuple):
+    """Facet filters applied inside the L2 query (all optional, ANDed).
+
+    Category and location match exactly but case-insensitively; the price
+    bounds are inclusive. Each is served by a B-tree index on ``products``.
+    """
+
+    category: Optional[str] = None
+    location: Optional[str] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+
+    def where(self) -> Tuple[str, tuple]:
+        """Return ``AND ...`` clauses over table alias ``p`` and their parameters."""
+        clauses: List[str] = []
+        params: List[Any] = []
+        if self.category is not None:
+            clauses.append("p.category = ? COLLATE NOCASE")
+            params.append(self.category)
+        if self.location is not None:
+            clauses.append("p.location = ? COLLATE NOCASE")
+            params.append(self.location)
+        if self.min_price is not None:
+            clauses.append("p.price >= ?")
+            params.append(self.min_price)
+        if self.max_price is not None:
+            clauses.append("p.price <= ?")
+            params.append(self.max_price)
+        return "".join(" AND " + clause for clause in clauses), tuple(params)
+
+
+def ranking_weights(ranking: Ranking) -> Tuple[float, ...]:
+    """Return bm25() weights, in FTS_COLUMNS order, for *ranking*.
+
+    Args:
+        ranking: A RANKING_PROFILES name or a column -> weight mapping
+
+    Raises:
+        ValueError: If the profile or a column name is unknown
+    """
+    if isinstance(ranking, str):
+        try:
+            weights = RANKING_PROFILES[ranking]
+        except KeyError:
+            raise ValueError(
+                f"Unknown ranking profile {ranking!r}; expected one of {sorted(RANKING_PROFILES)}"
+            ) from None
+    else:
+        weights = ranking
+    unknown = set(weights) - set(FTS_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown FTS columns in ranking: {sorted(unknown)}")
+    return tuple(float(weights.get(column, 1.0)) for column in FTS_COLUMNS)
+
+
 class ProductCache:
     """SQLite FTS5-based product cache with full-text search.
     
@@ -30,18 +236,34 @@ class ProductCache:
     
     Attributes:
         db_path: Path to SQLite database file
+        profile: Name of the PRAGMA profile applied to the connection
+        read_only: Whether the connection is opened with ``mode=ro``
+        ranking: BM25 column-weight profile used to order search results
         _conn: Database connection (lazy-initialized)
     """
     
-    def __init__(self, db_path: str = "data/products.db"):
+    def __init__(self, db_path: str = "data/products.db", profile: str = "default",
+                 read_only: bool = False, rewriter: Optional[QueryRewriter] = None,
+                 ranking: Ranking = "flat"):
         """Initialize product cache.
         
         Args:
             db_path: Path to SQLite database file (created if doesn't exist)
+            profile: Connection profile name from CONNECTION_PROFILES
+            read_only: Open a read-only connection (database must exist)
+            rewriter: Query rewrite stage (defaults to the shared one)
+            ranking: RANKING_PROFILES name or column -> weight mapping
         """
         self.db_path = Path(db_path)
+        self.profile = profile
+        self.read_only = read_only
+        self.rewriter = rewriter or DEFAULT_REWRITER
+        self.ranking = ranking
+        self._pragmas = connection_profile(profile)
+        self._weights = ranking_weights(ranking)
         self._conn: Optional[sqlite3.Connection] = None
-        logger.info("product_cache_initialized", db_path=str(self.db_path))
+        logger.info("product_cache_initialized", db_path=str(self.db_path), profile=profile,
+                    read_only=read_only)
     
     def _get_connection(self) -> sqlite3.Connection:
         """Get or create database connection.
@@ -50,59 +272,313 @@ class ProductCache:
             Active SQLite connection
         """
         if self._conn is None:
-            # Ensure parent directory exists
-            self.db_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            self._conn = sqlite3.connect(str(self.db_path))
-            self._conn.row_factory = sqlite3.Row  # Enable column access by name
+            if self.read_only:
+                uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+                self._conn = sqlite3.connect(uri, uri=True, cached_statements=STATEMENT_CACHE_SIZE)
+            else:
+                # Ensure parent directory exists
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(str(self.db_path), cached_statements=STATEMENT_CACHE_SIZE)
+            # Column access by name for metadata queries; product reads
+            # decode plain tuples instead (see _records)
+            self._conn.row_factory = sqlite3.Row
+            for pragma, value in self._pragmas.items():
+                if self.read_only and pragma in _WRITE_ONLY_PRAGMAS:
+                    continue
+                self._conn.execute(f"PRAGMA {pragma}={value}")
             logger.debug("database_connection_created", db_path=str(self.db_path))
         
         return self._conn
     
     def initialize(self) -> None:
-        """Initialize database schema with FTS5 virtual table.
+        """Initialize database schema: canonical table plus FTS5 index.
         
-        Creates the products_fts FTS5 virtual table if it doesn't exist.
-        Safe to call multiple times (idempotent).
+        Creates the ``products`` table (one row per SKU, typed price) and the
+        ``products_fts`` external-content FTS5 index over it, kept in sync by
+        triggers. Safe to call multiple times (idempotent). A database from
+        before the canonical table (FTS5-only storage) is migrated in place.
         
         Schema:
-            - sku: Product SKU (searchable)
-            - name: Product name (searchable)
-            - category: Product category (searchable)
-            - location: Store location (searchable)
-            - price: Price in USD (UNINDEXED - not searchable)
-            - description: Full product description (searchable)
+            - products.id: Integer rowid alias, also the FTS5 rowid
+            - products.sku: Product SKU (UNIQUE, B-tree indexed)
+            - products.name / category / location / description: TEXT
+            - products.price: Price in USD (REAL)
+            - products.upc / ean: Optional barcodes (B-tree indexed)
+            - products.category / location / price: B-tree indexed for facets
+            - products_fts: sku, name, category, location, description
+            - category_counts: products per category, kept by triggers
         
         Uses porter stemming and unicode61 tokenizer for better search quality.
+        Also creates the ``cache_meta`` key/value table used to persist the
+        sync version across restarts, and the ``query_stats`` table counting
+        how often each canonical query is asked.
         """
         conn = self._get_connection()
         
-        # Create FTS5 virtual table with BM25 ranking
-        # UNINDEXED on price since we don't search by price
+        legacy = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"
+        ).fetchone()
+        has_products = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products'"
+        ).fetchone()
+        if legacy and not has_products:
+            self._migrate_legacy_fts(conn)
+        
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(products)")}
+        for code_column in ("upc", "ean"):
+            if has_products and code_column not in columns:
+                conn.execute(f"ALTER TABLE products ADD COLUMN {code_column} TEXT")
+        
+        self._create_product_tables(conn, "products", "products_fts")
+        self._create_indexes(conn)
+        self._create_fts_triggers(conn)
+        has_counts = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'category_counts'"
+        ).fetchone()
+        if has_counts and "NOCASE" not in has_counts["sql"]:
+            # Built before categories were grouped case-insensitively
+            conn.execute("DROP TABLE category_counts")
+            has_counts = None
+        self._create_category_counts(conn, "category_counts")
+        if not has_counts:
+            self._rebuild_category_counts(conn)
+        self._create_facet_triggers(conn)
+        conn.execute("DROP TABLE IF EXISTS sku_index")  # Superseded by products.sku
         conn.execute("""
-            CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+            CREATE TABLE IF NOT EXISTS cache_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS query_stats (
+                query TEXT PRIMARY KEY,
+                count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        
+        conn.commit()
+        logger.info("database_initialized", table="products_fts", tokenizer="porter unicode61")
+
+    @staticmethod
+    def _create_product_tables(conn: sqlite3.Connection, table: str, fts_table: str) -> None:
+        """Create canonical table *table* and its FTS5 index *fts_table*.
+
+        The index always points at ``products`` as its content table, so a
+        side-built generation is valid once it has been renamed into place.
+        """
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY,
+                sku TEXT NOT NULL UNIQUE,
+                name TEXT NOT NULL,
+                category TEXT NOT NULL,
+                location TEXT NOT NULL,
+                price REAL NOT NULL,
+                description TEXT NOT NULL,
+                upc TEXT,
+                ean TEXT
+            )
+        """)
+        # External content: the index stores only tokens, rows live in products
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
                 sku,
                 name,
                 category,
                 location,
-                price UNINDEXED,
                 description,
+                content='products',
+                content_rowid='id',
                 tokenize='porter unicode61'
             )
         """)
-        
+
+    @staticmethod
+    def _schema_objects(conn: sqlite3.Connection, kind: str, table: str) -> set:
+        """Return the name suffixes of the *kind* objects (index/trigger) on *table*."""
+        rows = conn.execute("SELECT name FROM sqlite_master WHERE type = ? AND tbl_name = ?", (kind, table))
+        return {_SCHEMA_PREFIX.sub("", row[0]) for row in rows}
+
+    @classmethod
+    def _create_indexes(cls, conn: sqlite3.Connection, table: str = "products", prefix: str = "products") -> None:
+        """Create the barcode lookup and facet indexes on *table* that it lacks.
+
+        Indexes are named ``{prefix}_{suffix}``; one already present under
+        another generation's prefix is not duplicated.
+        """
+        existing = cls._schema_objects(conn, "index", table)
+        for suffix, columns in _PRODUCT_INDEXES.items():
+            if suffix not in existing:
+                conn.execute(f"CREATE INDEX {prefix}_{suffix} ON {table} {columns}")
+
+    @classmethod
+    def _create_fts_triggers(
+        cls,
+        conn: sqlite3.Connection,
+        table: str = "products",
+        fts_table: str = "products_fts",
+        prefix: str = "products",
+    ) -> None:
+        """Create the triggers that mirror *table* writes into *fts_table*."""
+        existing = cls._schema_objects(conn, "trigger", table)
+        triggers = {
+            "ai": f"""
+                AFTER INSERT ON {table} BEGIN
+                    INSERT INTO {fts_table} (rowid, sku, name, category, location, description)
+                    VALUES (new.id, new.sku, new.name, new.category, new.location, new.description);
+                END
+            """,
+            "ad": f"""
+                AFTER DELETE ON {table} BEGIN
+                    INSERT INTO {fts_table} ({fts_table}, rowid, sku, name, category, location, description)
+                    VALUES ('delete', old.id, old.sku, old.name, old.category, old.location, old.description);
+                END
+            """,
+            "au": f"""
+                AFTER UPDATE ON {table} BEGIN
+                    INSERT INTO {fts_table} ({fts_table}, rowid, sku, name, category, location, description)
+                    VALUES ('delete', old.id, old.sku, old.name, old.category, old.location, old.description);
+                    INSERT INTO {fts_table} (rowid, sku, name, category, location, description)
+                    VALUES (new.id, new.sku, new.name, new.category, new.location, new.description);
+                END
+            """,
+        }
+        for suffix, body in triggers.items():
+            if suffix not in existing:
+                conn.execute(f"CREATE TRIGGER {prefix}_{suffix} {body}")
+
+    @classmethod
+    def _create_facet_triggers(
+        cls,
+        conn: sqlite3.Connection,
+        table: str = "products",
+        counts_table: str = "category_counts",
+        prefix: str = "products",
+    ) -> None:
+        """Create the triggers that keep *counts_table* in step with *table*.
+
+        ``category_counts.category`` is ``COLLATE NOCASE``, so categories
+        differing only in case share one row, as they do in SearchFilters.
+        """
+        existing = cls._schema_objects(conn, "trigger", table)
+        triggers = {
+            "facets_ai": f"""
+                AFTER INSERT ON {table} BEGIN
+                    INSERT INTO {counts_table} (category, count) VALUES (new.category, 1)
+                    ON CONFLICT(category) DO UPDATE SET count = count + 1;
+                END
+            """,
+            "facets_ad": f"""
+                AFTER DELETE ON {table} BEGIN
+                    UPDATE {counts_table} SET count = count - 1 WHERE category = old.category;
+                    DELETE FROM {counts_table} WHERE category = old.category AND count <= 0;
+                END
+            """,
+            "facets_au": f"""
+                AFTER UPDATE OF category ON {table}
+                WHEN old.category IS NOT new.category BEGIN
+                    UPDATE {counts_table} SET count = count - 1 WHERE category = old.category;
+                    DELETE FROM {counts_table} WHERE category = old.category AND count <= 0;
+                    INSERT INTO {counts_table} (category, count) VALUES (new.category, 1)
+                    ON CONFLICT(category) DO UPDATE SET count = count + 1;
+                END
+            """,
+        }
+        for suffix, body in triggers.items():
+            if suffix not in existing:
+                conn.execute(f"CREATE TRIGGER {prefix}_{suffix} {body}")
+
+    @staticmethod
+    def _create_category_counts(conn: sqlite3.Connection, counts_table: str) -> None:
+        """Create the per-category aggregate table *counts_table*."""
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {counts_table} (
+                category TEXT PRIMARY KEY COLLATE NOCASE,
+                count INTEGER NOT NULL
+            )
+        """)
+
+    @staticmethod
+    def _rebuild_category_counts(
+        conn: sqlite3.Connection, table: str = "products", counts_table: str = "category_counts"
+    ) -> None:
+        """Recompute *counts_table* from *table* (an index-only scan)."""
+        conn.execute(f"DELETE FROM {counts_table}")
+        conn.execute(f"""
+            INSERT INTO {counts_table} (category, count)
+            SELECT min(category), count(*) FROM {table} GROUP BY category COLLATE NOCASE
+        """)
+
+    def _migrate_legacy_fts(self, conn: sqlite3.Connection) -> None:
+        """Move rows from an FTS5-only ``products_fts`` into ``products``.
+
+        Duplicate SKUs collapse to the row inserted last.
+        """
+        self._create_product_tables(conn, "products", "products_fts_next")
+        conn.execute("""
+            INSERT OR REPLACE INTO products (sku, name, category, location, price, description)
+            SELECT sku, name, category, location, CAST(price AS REAL), description
+            FROM products_fts ORDER BY rowid
+        """)
+        conn.execute("DROP TABLE products_fts")
+        conn.execute("ALTER TABLE products_fts_next RENAME TO products_fts")
+        conn.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+        migrated = conn.execute("SELECT count(*) FROM products").fetchone()[0]
+        logger.info("legacy_fts_migrated", products=migrated)
+
+    @staticmethod
+    def _row_values(product: SearchProduct) -> tuple:
+        """Return the ``products`` column values for *product*."""
+        return (
+            product.sku,
+            product.name,
+            product.category,
+            product.location,
+            product.price,
+            product.description,
+            product.upc,
+            product.ean,
+        )
+
+    def _records(self, sql: str, params: tuple) -> List[ProductRecord]:
+        """Run *sql* (selecting _PRODUCT_COLUMNS) and decode ProductRecords.
+
+        Rows come back as plain tuples and are unpacked positionally,
+        skipping the ``sqlite3.Row`` by-name lookups.
+        """
+        cursor = self._get_connection().cursor()
+        cursor.row_factory = None
+        return list(starmap(ProductRecord, cursor.execute(sql, params)))
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """Return a value from the ``cache_meta`` table, or None if unset."""
+        conn = self._get_connection()
+        try:
+            row = conn.execute("SELECT value FROM cache_meta WHERE key = ?", (key,)).fetchone()
+            return row["value"] if row else None
+        except sqlite3.OperationalError:
+            return None
+
+    def set_meta(self, key: str, value: str) -> None:
+        """Store a value in the ``cache_meta`` table."""
+        conn = self._get_connection()
+        conn.execute(
+            "INSERT INTO cache_meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
         conn.commit()
-        logger.info("database_initialized", table="products_fts", tokenizer="porter unicode61")
 
     def clear(self) -> None:
-        """Delete all rows from the FTS5 table."""
+        """Delete all products (the FTS5 index follows via triggers)."""
         conn = self._get_connection()
-        conn.execute("DELETE FROM products_fts")
+        conn.execute("DELETE FROM products")
         conn.commit()
-        logger.info("database_cleared", table="products_fts")
+        logger.info("database_cleared", table="products")
 
     def insert_product(self, product: SearchProduct) -> None:
-        """Insert a single product into the FTS5 cache.
+        """Insert or update a single product, keyed by SKU.
         
         Args:
             product: Product model to insert
@@ -111,24 +587,13 @@ class ProductCache:
             sqlite3.IntegrityError: If database operation fails
         
         Note:
-            Does not check for duplicate SKUs. FTS5 virtual tables do not
-            support PRIMARY KEY constraints. Consider checking manually if needed.
+            A product whose SKU already exists replaces the stored row in
+            place (same rowid); the FTS5 index is updated by triggers.
         """
         conn = self._get_connection()
         
         try:
-            conn.execute("""
-                INSERT INTO products_fts (sku, name, category, location, price, description)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                product.sku,
-                product.name,
-                product.category,
-                product.location,
-                product.price,
-                product.description
-            ))
-            
+            conn.execute(_UPSERT_SQL.format(table="products"), self._row_values(product))
             conn.commit()
             logger.debug("product_inserted", sku=product.sku, name=product.name)
         except Exception as e:
@@ -137,7 +602,7 @@ class ProductCache:
             raise
     
     def insert_products(self, products: List[SearchProduct]) -> None:
-        """Bulk insert multiple products into the cache.
+        """Bulk insert or update multiple products, keyed by SKU.
         
         Args:
             products: List of Product models to insert
@@ -153,16 +618,7 @@ class ProductCache:
         
         try:
             # Batch insert for better performance
-            data = [
-                (p.sku, p.name, p.category, p.location, p.price, p.description)
-                for p in products
-            ]
-            
-            conn.executemany("""
-                INSERT INTO products_fts (sku, name, category, location, price, description)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, data)
-            
+            conn.executemany(_UPSERT_SQL.format(table="products"), [self._row_values(p) for p in products])
             conn.commit()
             logger.info("products_bulk_inserted", count=len(products))
         except Exception as e:
@@ -170,15 +626,178 @@ class ProductCache:
             logger.error("products_bulk_insert_failed", error=str(e), count=len(products))
             raise
     
-    def search_products(self, query: str, max_results: int = 5) -> List[SearchProduct]:
+    def generation(self) -> int:
+        """Return the ID of the catalog generation currently served."""
+        return int(self.get_meta("generation") or 0)
+
+    def replace_products(self, products: List[SearchProduct], version: Optional[str] = None) -> int:
+        """Atomically replace the whole catalog with *products*.
+
+        The new catalog is built and committed in side tables
+        (``products_next``, its FTS5 index ``products_fts_next`` and
+        ``category_counts_next``), complete with its secondary indexes and
+        aggregate. A short transaction then only drops the old tables,
+        renames the new ones into place, adds the FTS5 sync triggers and
+        bumps the generation ID, so the write lock is not held while
+        anything is built. If *version* is
+        given it is stored in that transaction, so the persisted version
+        always describes the catalog on disk. Readers
+        never see an empty or partial catalog; under WAL, reads already
+        running finish against the old generation.
+
+        Returns:
+            The new generation ID
+        """
+        self.initialize()
+        conn = self._get_connection()
+        generation = self.generation() + 1
+        prefix = f"products_g{generation}"
+        try:
+            # Leftovers of an interrupted build (their indexes and triggers go too)
+            conn.execute("DROP TABLE IF EXISTS products_fts_next")
+            conn.execute("DROP TABLE IF EXISTS products_next")
+            conn.execute("DROP TABLE IF EXISTS category_counts_next")
+            self._create_product_tables(conn, "products_next", "products_fts_next")
+            conn.executemany(_UPSERT_SQL.format(table="products_next"), [self._row_values(p) for p in products])
+            conn.execute("""
+                INSERT INTO products_fts_next (rowid, sku, name, category, location, description)
+                SELECT id, sku, name, category, location, description FROM products_next
+            """)
+            self._create_indexes(conn, "products_next", prefix)
+            self._create_category_counts(conn, "category_counts_next")
+            self._rebuild_category_counts(conn, "products_next", "category_counts_next")
+            # Created after the bulk load; the renames below repoint it at category_counts
+            self._create_facet_triggers(conn, "products_next", "category_counts_next", prefix)
+            conn.commit()
+
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DROP TABLE products")  # Drops its indexes and triggers too
+            conn.execute("DROP TABLE products_fts")
+            conn.execute("DROP TABLE category_counts")
+            conn.execute("ALTER TABLE products_next RENAME TO products")
+            conn.execute("ALTER TABLE products_fts_next RENAME TO products_fts")
+            conn.execute("ALTER TABLE category_counts_next RENAME TO category_counts")
+            # Schema only, but it cannot be built ahead: a rename does not rewrite
+            # the FTS5 command column (named after the table) in trigger bodies
+            self._create_fts_triggers(conn, prefix=prefix)
+            conn.execute(
+                "INSERT INTO cache_meta (key, value) VALUES ('generation', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (str(generation),),
+            )
+            if version is not None:
+                conn.execute(
+                    "INSERT INTO cache_meta (key, value) VALUES ('version', ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                    (version,),
+                )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error("catalog_swap_failed", error=str(e), count=len(products))
+            raise
+        logger.info("catalog_swapped", generation=generation, count=len(products))
+        return generation
+
+    def apply_delta(
+        self,
+        upserted: List[SearchProduct],
+        deleted_skus: List[str],
+        base_version: str,
+        version: str,
+    ) -> int:
+        """Apply an incremental catalog change in one transaction.
+
+        Only the touched SKUs are written: upserts go through the ``sku``
+        unique index (existing rows keep their rowid) and deletions remove
+        the row; triggers keep the FTS5 index in step. The stored version is
+        checked against *base_version* and advanced to *version* inside the
+        same transaction.
+
+        Returns:
+            Number of rows written or deleted
+
+        Raises:
+            DeltaBaseMismatch: If the stored version is not *base_version*
+        """
+        conn = self._get_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            current = self.get_meta("version") or "v0"
+            if current != base_version:
+                raise DeltaBaseMismatch(base_version, current)
+
+            changed = 0
+            for sku in deleted_skus:
+                changed += conn.execute("DELETE FROM products WHERE sku = ?", (sku,)).rowcount
+            if upserted:
+                conn.executemany(_UPSERT_SQL.format(table="products"), [self._row_values(p) for p in upserted])
+                changed += len(upserted)
+
+            conn.execute(
+                "INSERT INTO cache_meta (key, value) VALUES ('version', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (version,),
+            )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.warning("catalog_delta_failed", base_version=base_version, error=str(e))
+            raise
+        logger.info("catalog_delta_applied", version=version, upserted=len(upserted),
+                    deleted=len(deleted_skus), changed=changed)
+        return changed
+
+    def get_product(self, sku: str) -> Optional[SearchProduct]:
+        """Fetch one product by exact SKU (a B-tree lookup, no FTS5)."""
+        records = self._records(f"SELECT {_SELECT_PRODUCT} FROM products WHERE sku = ?", (sku,))
+        return records[0].to_product() if records else None
+
+    def lookup_code(self, code: str) -> Optional[SearchProduct]:
+        """Fetch one product by exact SKU, UPC or EAN without touching FTS5.
+
+        SKUs are tried as given and upper-cased. Numeric codes also match
+        the other GTIN width, since a UPC-A is an EAN-13 with a leading 0.
+        """
+        record = self.lookup_record(code)
+        return record.to_product() if record is not None else None
+
+    def lookup_record(self, code: str) -> Optional[ProductRecord]:
+        """Like lookup_code, returning a lean ProductRecord."""
+        code = code.strip()
+        if not code:
+            return None
+        lookups = [("sku", code)]
+        if code.upper() != code:
+            lookups.append(("sku", code.upper()))
+        if code.isdigit():
+            upc = code[1:] if len(code) == 13 and code.startswith("0") else code
+            ean = "0" + code if len(code) == 12 else code
+            lookups += [("upc", upc), ("ean", ean)]
+        for column, value in lookups:
+            records = self._records(
+                f"SELECT {_SELECT_PRODUCT} FROM products WHERE {column} = ? LIMIT 1", (value,)
+            )
+            if records:
+                return records[0]
+        return None
+
+    def search_products(self, query: str, max_results: int = 5,
+                        filters: Optional[SearchFilters] = None) -> List[SearchProduct]:
         """Search products using FTS5 full-text search with BM25 ranking.
         
         Searches across sku, name, category, location, and description fields.
-        Results are ranked by relevance using BM25 algorithm.
+        Results are ranked by BM25 with this cache's column weights (see
+        RANKING_PROFILES), entirely inside SQLite. The query text
+        is first rewritten (see query_rewrite): stop words dropped, typos
+        repaired, synonyms added and every term quoted, so user input never
+        reaches MATCH as FTS5 syntax. Only if that finds nothing is a
+        prefix-wildcard variant tried.
         
         Args:
             query: Search query string (can be multi-word)
             max_results: Maximum number of results to return (default: 5)
+            filters: Optional facet filters, applied in the same SQL query
         
         Returns:
             List of matching Product models, ordered by relevance (highest first)
@@ -187,86 +806,191 @@ class ProductCache:
         Performance:
             Target latency: <100ms for up to 50 products (NFR4)
         """
-        # Handle empty query
+        return [record.to_product() for record in self.search_records(query, max_results, filters)]
+
+    def search_records(self, query: str, max_results: int = 5,
+                       filters: Optional[SearchFilters] = None) -> List[ProductRecord]:
+        """Search like search_products, returning lean ProductRecords.
+
+        For internal callers that only read fields and do not need the
+        pydantic model.
+        """
         if not query or not query.strip():
             return []
         
-        conn = self._get_connection()
+        rewritten = self.rewriter.rewrite(query)
+        if not rewritten.match:
+            return []
         
+        results = self._match(rewritten.match, max_results, filters)
+        if not results:
+            results = self._match(rewritten.prefix_match, max_results, filters)
+        return results
+    
+    def _match(self, fts_query: str, max_results: int,
+               filters: Optional[SearchFilters] = None) -> List[ProductRecord]:
+        """Run one FTS5 MATCH and return ranked records."""
+        filter_sql, filter_params = filters.where() if filters else ("", ())
         try:
-            # FTS5 search with BM25 ranking
-            # bm25() returns negative scores, lower (more negative) = more relevant
-            cursor = conn.execute("""
-                SELECT sku, name, category, location, price, description,
-                       bm25(products_fts) as relevance_score
-                FROM products_fts
-                WHERE products_fts MATCH ?
-                ORDER BY bm25(products_fts)
-                LIMIT ?
-            """, (query, max_results))
-            
-            results = []
-            for row in cursor.fetchall():
-                # Convert BM25 score (negative) to positive relevance score
-                # More negative = more relevant, so negate and add offset
-                relevance = abs(float(row['relevance_score']))
-                
-                product = SearchProduct(
-                    sku=row['sku'],
-                    name=row['name'],
-                    category=row['category'],
-                    location=row['location'],
-                    price=float(row['price']),
-                    description=row['description'],
-                    relevance_score=relevance
-                )
-                results.append(product)
-            
-            logger.debug(
-                "search_completed",
-                query=query,
-                result_count=len(results),
-                max_results=max_results
+            # Row data comes from the canonical table via the shared rowid
+            return self._records(
+                _search_sql(filter_sql), (*self._weights, fts_query, *filter_params, max_results)
             )
-            
-            return results
-        
         except sqlite3.OperationalError as e:
-            # Handle FTS5 query syntax errors gracefully
-            logger.warning("search_failed", query=query, error=str(e))
+            # Rewritten queries are always valid syntax; this covers a missing
+            # or corrupt index
+            logger.warning("search_failed", fts_query=fts_query, error=str(e))
             return []
     
+    def facet_counts(self, query: str = "", filters: Optional[SearchFilters] = None) -> Dict[str, Any]:
+        """Count products per category and location, plus the price range.
+
+        Counts cover everything matching *query* (the whole catalog if it is
+        blank) and *filters*, not only the page of results a search returns.
+        As in search_records, the prefix variant of the query is used only
+        when the exact terms match nothing.
+
+        Returns:
+            ``{"total": n, "category": {name: n}, "location": {name: n},
+            "price": {"min": p, "max": p}}``
+        """
+        filter_sql, filter_params = filters.where() if filters else ("", ())
+        if not query.strip():
+            return self._facets("products p WHERE 1" + filter_sql, filter_params)
+
+        rewritten = self.rewriter.rewrite(query)
+        facets: Dict[str, Any] = {"total": 0, "price": {"min": None, "max": None}, "category": {}, "location": {}}
+        source = "products_fts JOIN products p ON p.id = products_fts.rowid WHERE products_fts MATCH ?"
+        for fts_query in filter(None, (rewritten.match, rewritten.prefix_match)):
+            try:
+                facets = self._facets(source + filter_sql, (fts_query, *filter_params))
+            except sqlite3.OperationalError as e:
+                logger.warning("facet_count_failed", fts_query=fts_query, error=str(e))
+                break
+            if facets["total"]:
+                break
+        return facets
+
+    def _facets(self, source: str, params: tuple) -> Dict[str, Any]:
+        """Aggregate facet counts over ``SELECT ... FROM {source}``."""
+        conn = self._get_connection()
+        total, low, high = conn.execute(
+            f"SELECT count(*), min(p.price), max(p.price) FROM {source}", params
+        ).fetchone()
+        facets: Dict[str, Any] = {"total": total, "price": {"min": low, "max": high}}
+        for column in ("category", "location"):
+            rows = conn.execute(
+                f"SELECT min(p.{column}), count(*) FROM {source} "
+                f"GROUP BY p.{column} COLLATE NOCASE ORDER BY 2 DESC, 1",
+                params,
+            ).fetchall()
+            facets[column] = {row[0]: row[1] for row in rows}
+        return facets
+
+    def category_counts(self) -> Dict[str, int]:
+        """Return products per category from the precomputed aggregate."""
+        conn = self._get_connection()
+        try:
+            rows = conn.execute("SELECT category, count FROM category_counts ORDER BY category").fetchall()
+        except sqlite3.OperationalError:
+            return {}
+        return {row["category"]: row["count"] for row in rows}
+
+    def list_records(self, after_sku: Optional[str] = None, limit: int = 100) -> List[ProductRecord]:
+        """Return up to *limit* products in SKU order, starting after *after_sku*.
+
+        Keyset pagination over the ``sku`` unique index: every page is one
+        index range scan however deep it is, and a cursor stays valid
+        across catalog swaps (rowids do not).
+        """
+        if after_sku is None:
+            return self._records(f"SELECT {_SELECT_PRODUCT} FROM products ORDER BY sku LIMIT ?", (limit,))
+        return self._records(
+            f"SELECT {_SELECT_PRODUCT} FROM products WHERE sku > ? ORDER BY sku LIMIT ?", (after_sku, limit)
+        )
+
+    def iter_records(self, batch_size: int = 500) -> Iterator[ProductRecord]:
+        """Yield every product in SKU order, reading *batch_size* rows at a time."""
+        after: Optional[str] = None
+        while True:
+            batch = self.list_records(after, batch_size)
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            after = batch[-1].sku
+
     def get_all_products(self, limit: int = 100) -> List[SearchProduct]:
         """Return all products (unranked), limited by *limit*."""
-        conn = self._get_connection()
         try:
-            cursor = conn.execute(
-                "SELECT sku, name, category, location, price, description FROM products_fts LIMIT ?",
-                (limit,),
-            )
-            return [
-                SearchProduct(
-                    sku=row["sku"],
-                    name=row["name"],
-                    category=row["category"],
-                    location=row["location"],
-                    price=float(row["price"]),
-                    description=row["description"],
-                )
-                for row in cursor.fetchall()
-            ]
+            records = self._records(f"SELECT {_SELECT_PRODUCT} FROM products ORDER BY id LIMIT ?", (limit,))
+            return [record.to_product() for record in records]
         except Exception:
             return []
 
     def product_count(self) -> int:
-        """Return total number of products in the FTS5 table."""
+        """Return total number of products."""
         conn = self._get_connection()
         try:
-            row = conn.execute("SELECT count(*) AS c FROM products_fts").fetchone()
+            row = conn.execute("SELECT count(*) AS c FROM products").fetchone()
             return int(row["c"]) if row else 0
         except Exception:
             return 0
 
+    def vocabulary(self, min_length: int = MIN_REPAIR_LENGTH - 1) -> Dict[str, int]:
+        """Return the FTS5 index vocabulary as term -> document count.
+
+        Read through an ``fts5vocab`` table over ``products_fts``, so the
+        terms are porter stems. Only alphabetic terms of at least
+        *min_length* characters are returned; nothing shorter is a useful
+        typo-repair target.
+        """
+        conn = self._get_connection()
+        try:
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS temp.products_vocab "
+                "USING fts5vocab(main, products_fts, row)"
+            )
+            cursor = conn.execute(
+                "SELECT term, doc FROM temp.products_vocab WHERE length(term) >= ?", (min_length,)
+            )
+            return {row["term"]: int(row["doc"]) for row in cursor if row["term"].isalpha()}
+        except sqlite3.OperationalError as e:
+            logger.warning("vocabulary_read_failed", error=str(e))
+            return {}
+
+    def typo_index(self) -> TypoIndex:
+        """Build a TypoIndex over the current catalog vocabulary."""
+        return TypoIndex(self.vocabulary())
+
+    def add_query_counts(self, counts: Dict[str, int]) -> None:
+        """Add *counts* to the persisted per-query frequencies."""
+        if not counts:
+            return
+        conn = self._get_connection()
+        try:
+            conn.executemany(
+                "INSERT INTO query_stats (query, count) VALUES (?, ?) "
+                "ON CONFLICT(query) DO UPDATE SET count = count + excluded.count",
+                list(counts.items()),
+            )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error("query_counts_update_failed", error=str(e), count=len(counts))
+            raise
+
+    def top_queries(self, limit: int = 50) -> List[Tuple[str, int]]:
+        """Return the most frequently asked queries as (query, count) pairs."""
+        conn = self._get_connection()
+        try:
+            cursor = conn.execute(
+                "SELECT query, count FROM query_stats ORDER BY count DESC, query LIMIT ?",
+                (limit,),
+            )
+            return [(row["query"], int(row["count"])) for row in cursor.fetchall()]
+        except sqlite3.OperationalError:
+            return []
+
     def close(self) -> None:
         """Close database connection.
         
@@ -305,13 +1029,22 @@ class ThreadSafeProductCache:
         request-scoped ProductCache instances instead of this wrapper.
     """
     
-    def __init__(self, db_path: str = "data/products.db"):
+    def __init__(self, db_path: str = "data/products.db", profile: str = "default",
+                 rewriter: Optional[QueryRewriter] = None, ranking: Ranking = "flat"):
         """Initialize thread-safe cache wrapper.
         
         Args:
             db_path: Path to SQLite database file (shared across threads)
+            profile: Connection profile name from CONNECTION_PROFILES
+            rewriter: Query rewrite stage shared by every thread's cache
+            ranking: BM25 column-weight profile for every thread's cache
         """
         self.db_path = db_path
+        self.profile = profile
+        self.rewriter = rewriter
+        self.ranking = ranking
+        connection_profile(profile)  # Fail fast on a bad profile name
+        ranking_weights(ranking)
         self._local = threading.local()
         logger.info("thread_safe_cache_initialized", db_path=self.db_path)
     
@@ -322,7 +1055,8 @@ class ThreadSafeProductCache:
             ProductCache instance for current thread
         """
         if not hasattr(self._local, 'cache'):
-            self._local.cache = ProductCache(self.db_path)
+            self._local.cache = ProductCache(self.db_path, profile=self.profile, rewriter=self.rewriter,
+                                             ranking=self.ranking)
             logger.debug("thread_local_cache_created", thread_id=threading.get_ident())
         return self._local.cache
     
@@ -342,18 +1076,85 @@ class ThreadSafeProductCache:
         """Clear all products (thread-safe)."""
         self._get_cache().clear()
 
-    def search_products(self, query: str, max_results: int = 5) -> List[SearchProduct]:
+    def replace_products(self, products: List[SearchProduct], version: Optional[str] = None) -> int:
+        """Swap in a new catalog generation (thread-safe)."""
+        return self._get_cache().replace_products(products, version)
+
+    def generation(self) -> int:
+        """Return the served catalog generation (thread-safe)."""
+        return self._get_cache().generation()
+
+    def apply_delta(self, upserted: List[SearchProduct], deleted_skus: List[str],
+                    base_version: str, version: str) -> int:
+        """Apply an incremental catalog change (thread-safe)."""
+        return self._get_cache().apply_delta(upserted, deleted_skus, base_version, version)
+
+    def get_product(self, sku: str) -> Optional[SearchProduct]:
+        """Fetch one product by exact SKU (thread-safe)."""
+        return self._get_cache().get_product(sku)
+
+    def lookup_code(self, code: str) -> Optional[SearchProduct]:
+        """Fetch one product by exact SKU/UPC/EAN (thread-safe)."""
+        return self._get_cache().lookup_code(code)
+
+    def lookup_record(self, code: str) -> Optional[ProductRecord]:
+        """Fetch one product record by exact SKU/UPC/EAN (thread-safe)."""
+        return self._get_cache().lookup_record(code)
+
+    def search_products(self, query: str, max_results: int = 5,
+                        filters: Optional[SearchFilters] = None) -> List[SearchProduct]:
         """Search products (thread-safe)."""
-        return self._get_cache().search_products(query, max_results)
+        return self._get_cache().search_products(query, max_results, filters)
+
+    def search_records(self, query: str, max_results: int = 5,
+                       filters: Optional[SearchFilters] = None) -> List[ProductRecord]:
+        """Search products as lean records (thread-safe)."""
+        return self._get_cache().search_records(query, max_results, filters)
+
+    def facet_counts(self, query: str = "", filters: Optional[SearchFilters] = None) -> Dict[str, Any]:
+        """Count matches per facet (thread-safe)."""
+        return self._get_cache().facet_counts(query, filters)
+
+    def category_counts(self) -> Dict[str, int]:
+        """Return products per category (thread-safe)."""
+        return self._get_cache().category_counts()
 
     def get_all_products(self, limit: int = 100) -> List[SearchProduct]:
         """Return all products (thread-safe)."""
         return self._get_cache().get_all_products(limit)
 
+    def list_records(self, after_sku: Optional[str] = None, limit: int = 100) -> List[ProductRecord]:
+        """Return one keyset page of products (thread-safe)."""
+        return self._get_cache().list_records(after_sku, limit)
+
     def product_count(self) -> int:
         """Return product count (thread-safe)."""
         return self._get_cache().product_count()
 
+    def vocabulary(self) -> Dict[str, int]:
+        """Return the FTS5 vocabulary (thread-safe)."""
+        return self._get_cache().vocabulary()
+
+    def typo_index(self) -> TypoIndex:
+        """Build a typo index over the catalog vocabulary (thread-safe)."""
+        return self._get_cache().typo_index()
+
+    def add_query_counts(self, counts: Dict[str, int]) -> None:
+        """Add query frequencies (thread-safe)."""
+        self._get_cache().add_query_counts(counts)
+
+    def top_queries(self, limit: int = 50) -> List[Tuple[str, int]]:
+        """Return most frequent queries (thread-safe)."""
+        return self._get_cache().top_queries(limit)
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """Read a cache_meta value (thread-safe)."""
+        return self._get_cache().get_meta(key)
+
+    def set_meta(self, key: str, value: str) -> None:
+        """Write a cache_meta value (thread-safe)."""
+        self._get_cache().set_meta(key, value)
+
     def close(self) -> None:
         """Close current thread's connection."""
         if hasattr(self._local, 'cache'):
@@ -379,20 +1180,194 @@ class ThreadSafeProductCache:
         self.close()
 
 
+def _resolve(future: asyncio.Future, result: Any, error: Optional[BaseException]) -> None:
+    """Complete *future* on its event loop unless the waiter gave up."""
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class SQLiteReadPool:
+    """Fixed pool of worker threads, each owning one read connection.
+
+    Lets async callers run blocking SQLite reads without stalling the event
+    loop. Jobs wait in a FIFO queue; each worker pulls a job, runs it against
+    its own ProductCache and resolves the caller's future via the loop.
+    With ``workers=1`` and a writable connection it also serves as a
+    serialized writer that keeps catalog rebuilds off the event loop.
+
+    Usage:
+        pool = SQLiteReadPool("data/cache.db", workers=4)
+        results = await pool.run(ProductCache.search_products, "diesel", 5)
+    """
+
+    def __init__(self, db_path: str, workers: int = 4, profile: str = "default",
+                 read_only: bool = False, rewriter: Optional[QueryRewriter] = None,
+                 ranking: Ranking = "flat"):
+        """Start *workers* threads reading from *db_path*.
+
+        With ``read_only=True`` the database must already exist; every worker
+        connection is then opened with ``mode=ro``.
+        """
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        connection_profile(profile)
+        ranking_weights(ranking)
+        self.db_path = db_path
+        self.workers = workers
+        self.profile = profile
+        self.read_only = read_only
+        self.rewriter = rewriter
+        self.ranking = ranking
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._wait_ms: deque[float] = deque(maxlen=512)  # recent queue wait times
+        self._busy = 0
+        self._completed = 0
+        self._failed = 0
+        self._stats_lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"l2-read-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info("sqlite_read_pool_started", db_path=db_path, workers=workers,
+                    profile=profile, read_only=read_only)
+
+    def _worker(self) -> None:
+        """Worker loop: run queued jobs on this thread's connection."""
+        cache = ProductCache(self.db_path, profile=self.profile, read_only=self.read_only,
+                             rewriter=self.rewriter, ranking=self.ranking)
+        try:
+            while True:
+                job = self._queue.get()
+                if job is None:
+                    break
+                fn, args, loop, future, enqueued = job
+                with self._stats_lock:
+                    self._wait_ms.append((time.perf_counter() - enqueued) * 1000)
+                    self._busy += 1
+                result, error = None, None
+                try:
+                    result = fn(cache, *args)
+                except BaseException as exc:
+                    error = exc
+                with self._stats_lock:
+                    self._busy -= 1
+                    if error is None:
+                        self._completed += 1
+                    else:
+                        self._failed += 1
+                try:
+                    loop.call_soon_threadsafe(_resolve, future, result, error)
+                except RuntimeError:
+                    pass  # Event loop already closed; nobody is waiting
+        finally:
+            cache.close()
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(product_cache, *args)`` on a worker and await the result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((fn, args, loop, future, time.perf_counter()))
+        return await future
+
+    def close(self) -> None:
+        """Stop all workers after the queued jobs drain."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+        logger.info("sqlite_read_pool_closed", db_path=self.db_path)
+
+    def stats(self) -> dict:
+        """Queue depth and wait-time metrics."""
+        with self._stats_lock:
+            waits = sorted(self._wait_ms)
+            busy, completed, failed = self._busy, self._completed, self._failed
+        return {
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize(),
+            "busy_workers": busy,
+            "completed": completed,
+            "failed": failed,
+            "avg_wait_ms": round(sum(waits) / len(waits), 3) if waits else 0.0,
+            "p95_wait_ms": round(waits[int(len(waits) * 0.95)], 3) if waits else 0.0,
+            "max_wait_ms": round(waits[-1], 3) if waits else 0.0,
+        }
+
 
 class L2Cache:
     """Async-friendly cache facade used by FastAPI app and tools.
 
     This wraps ProductCache (FTS5 search) and a lightweight promo/version store
-    to provide the methods used by the interaction layer.
+    to provide the methods used by the interaction layer. Reads run on a
+    SQLiteReadPool so FTS5 queries never block the event loop.
     """
 
-    def __init__(self, db_path: str = "./data/cache.db"):
+    def __init__(self, db_path: str = "./data/cache.db", read_workers: int = 4,
+                 profile: str = "default", ranking: Ranking = "flat"):
         self.db_path = db_path
-        self._products = ThreadSafeProductCache(db_path)
+        self.profile = profile
+        self.ranking = ranking
+        self.rewriter = QueryRewriter()
+        self._products = ThreadSafeProductCache(db_path, profile=profile, rewriter=self.rewriter,
+                                                ranking=ranking)
         self._products.initialize()
         self._promos: dict[str, Promo] = {}
-        self._version: str = "v0"
+        self._version: str = self._products.get_meta("version") or "v0"
+        self._pending_query_counts: Counter[str] = Counter()
+        self._counts_flushed_at = time.monotonic()
+        self._flush_tasks: set[asyncio.Task] = set()
+        self._read_workers = read_workers
+        self._pool: Optional[SQLiteReadPool] = None
+        self._writer: Optional[SQLiteReadPool] = None
+        self._pool_lock = threading.Lock()
+        self._generation: int = self._products.generation()
+        self._categories: Optional[Tuple[Tuple[str, int], Dict[str, int]]] = None
+        self._building_generation: Optional[int] = None
+        self._swapped_at: Optional[float] = None
+        # Kept current by every catalog write, so stats() never queries SQLite
+        self._product_count: int = self._products.product_count()
+        if self._product_count:
+            self.rewriter.set_index(self._products.typo_index())
+
+    @property
+    def read_pool(self) -> SQLiteReadPool:
+        """Worker pool for reads, started on first use."""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = SQLiteReadPool(
+                        self.db_path, workers=self._read_workers,
+                        profile=self.profile, read_only=True, rewriter=self.rewriter,
+                        ranking=self.ranking,
+                    )
+        return self._pool
+
+    @property
+    def writer(self) -> SQLiteReadPool:
+        """Single writable worker for catalog rebuilds, started on first use."""
+        if self._writer is None:
+            with self._pool_lock:
+                if self._writer is None:
+                    self._writer = SQLiteReadPool(
+                        self.db_path, workers=1, profile=self.profile, rewriter=self.rewriter,
+                    )
+        return self._writer
+
+    def close(self) -> None:
+        """Stop the worker pools and close this thread's connection."""
+        with self._pool_lock:
+            pools = [self._pool, self._writer]
+            self._pool = self._writer = None
+        for pool in pools:
+            if pool is not None:
+                pool.close()
+        self._products.close()
 
     @staticmethod
     def _to_search_product(product: CacheProduct) -> SearchProduct:
@@ -405,6 +1380,8 @@ class L2Cache:
             location=location,
             price=product.price or 0.0,
             description=product.description or "",
+            upc=product.upc,
+            ean=product.ean,
         )
 
     @staticmethod
@@ -417,7 +1394,7 @@ class L2Cache:
         return location
 
     @staticmethod
-    def _to_cache_product(product: SearchProduct) -> CacheProduct:
+    def _to_cache_product(product: SearchProduct | ProductRecord) -> CacheProduct:
         """Convert FTS search product model to cache schema product."""
         return CacheProduct(
             sku=product.sku,
@@ -426,34 +1403,166 @@ class L2Cache:
             category=product.category,
             price=product.price,
             description=product.description,
+            upc=product.upc,
+            ean=product.ean,
         )
 
-    async def update_products(self, products: list[CacheProduct]) -> None:
-        """Replace product cache with new set of products."""
-        self._products.initialize()
-        self._products.clear()
+    async def update_products(self, products: list[CacheProduct], version: Optional[str] = None) -> None:
+        """Replace product cache with new set of products.
+
+        The new catalog is built as a fresh generation on the writer thread
+        and swapped in atomically; searches keep serving the previous
+        generation until the swap commits. A given *version* is stored in
+        the swap transaction.
+        """
         search_products = [self._to_search_product(p) for p in products]
-        self._products.insert_products(search_products)
+        self._building_generation = self._generation + 1
+        try:
+            self._generation = await self.writer.run(ProductCache.replace_products, search_products, version)
+        finally:
+            self._building_generation = None
+        if version is not None:
+            self._version = version
+        self._swapped_at = time.time()
+        self._product_count = await self.writer.run(ProductCache.product_count)
+        await self.refresh_typo_index()
 
-    async def search_products(self, query: str, max_results: int = 5) -> list[SearchProduct]:
+    async def apply_delta(
+        self,
+        upserted: list[CacheProduct],
+        deleted_skus: list[str],
+        base_version: str,
+        version: str,
+    ) -> int:
+        """Apply an incremental catalog change on the writer thread.
+
+        Only the touched SKUs are written, and the new *version* is stored
+        in the same transaction.
+
+        Returns:
+            Number of rows written or deleted
+
+        Raises:
+            DeltaBaseMismatch: If the catalog is not at *base_version*
+        """
+        rows = [self._to_search_product(p) for p in upserted]
+        changed = await self.writer.run(
+            ProductCache.apply_delta, rows, deleted_skus, base_version, version
+        )
+        self._version = version
+        self._product_count = await self.writer.run(ProductCache.product_count)
+        await self.refresh_typo_index()
+        return changed
+
+    async def refresh_typo_index(self) -> None:
+        """Rebuild the typo-correction index from the catalog vocabulary.
+
+        The index is built on the writer thread and then swapped into the
+        shared rewriter, which also starts a fresh rewrite memo.
+        """
+        index = await self.writer.run(ProductCache.typo_index)
+        self.rewriter.set_index(index)
+        logger.info("typo_index_built", terms=len(index), build_ms=round(index.build_ms, 2))
+
+    async def search_products(self, query: str, max_results: int = 5,
+                              filters: Optional[SearchFilters] = None) -> list[SearchProduct]:
         """Search products using FTS5 full-text search with BM25 ranking.
 
         Args:
             query: Search query string
             max_results: Maximum number of results to return
+            filters: Optional category/location/price filters
 
         Returns:
             List of matching products ordered by relevance
         """
-        return self._products.search_products(query, max_results=max_results)
+        return await self.read_pool.run(ProductCache.search_products, query, max_results, filters)
+
+    async def facet_counts(self, query: str = "", filters: Optional[SearchFilters] = None) -> dict:
+        """Category/location counts and price range for a (filtered) search."""
+        return await self.read_pool.run(ProductCache.facet_counts, query, filters)
+
+    async def categories(self) -> Dict[str, int]:
+        """Products per category, memoized per catalog version and generation.
+
+        Reads the ``category_counts`` aggregate once per catalog change;
+        repeated calls in between are served from memory.
+        """
+        key = (self._version, self._generation)
+        cached = self._categories
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        counts = await self.read_pool.run(ProductCache.category_counts)
+        self._categories = (key, counts)
+        return counts
 
     async def get_all_products(self, limit: int = 100) -> list[SearchProduct]:
         """Return all products (unranked), limited by *limit*."""
-        return self._products.get_all_products(limit)
+        return await self.read_pool.run(ProductCache.get_all_products, limit)
+
+    async def list_products(
+        self, cursor: Optional[str] = None, limit: int = 100
+    ) -> Tuple[list[SearchProduct], Optional[str]]:
+        """Return one page of products in SKU order.
+
+        Args:
+            cursor: ``next_cursor`` from the previous page (None for the first)
+            limit: Page size
+
+        Returns:
+            (products, next_cursor); next_cursor is None on the last page
+        """
+        records = await self.read_pool.run(ProductCache.list_records, cursor, limit + 1)
+        page = records[:limit]
+        next_cursor = page[-1].sku if len(records) > limit else None
+        return [record.to_product() for record in page], next_cursor
+
+    async def iter_products(self, batch_size: int = 500) -> AsyncIterator[ProductRecord]:
+        """Yield every product in SKU order as lean records.
+
+        Each batch is one keyset read on the pool, so memory stays at one
+        batch however large the catalog is, and no read transaction is held
+        open between batches.
+        """
+        after: Optional[str] = None
+        while True:
+            batch = await self.read_pool.run(ProductCache.list_records, after, batch_size)
+            for record in batch:
+                yield record
+            if len(batch) < batch_size:
+                return
+            after = batch[-1].sku
+
+    async def get_product(self, sku: str) -> Optional[SearchProduct]:
+        """Fetch one product by exact SKU (indexed lookup, no FTS5)."""
+        return await self.read_pool.run(ProductCache.get_product, sku)
+
+    async def lookup_code(self, code: str) -> list[SearchProduct]:
+        """Exact SKU/UPC/EAN lookup, shaped like search results.
+
+        Returns:
+            A one-item list on a match, otherwise an empty list
+        """
+        product = await self.read_pool.run(ProductCache.lookup_code, code)
+        return [product] if product is not None else []
+
+    async def lookup_records(self, code: str) -> list[ProductRecord]:
+        """Like lookup_code, returning lean ProductRecords."""
+        record = await self.read_pool.run(ProductCache.lookup_record, code)
+        return [record] if record is not None else []
+
+    async def product_count(self) -> int:
+        """Return the number of cached products."""
+        return await self.read_pool.run(ProductCache.product_count)
+
+    async def search_records(self, query: str, max_results: int = 5,
+                             filters: Optional[SearchFilters] = None) -> list[ProductRecord]:
+        """Search like search_products, without building pydantic models."""
+        return await self.read_pool.run(ProductCache.search_records, query, max_results, filters)
 
     async def search_product(self, query: str) -> Optional[CacheProduct]:
         """Find the best matching product for a query."""
-        results = self._products.search_products(query, max_results=1)
+        results = await self.search_records(query, max_results=1)
         if not results:
             return None
         return self._to_cache_product(results[0])
@@ -469,20 +1578,88 @@ class L2Cache:
         return ordered[:limit]
 
     async def set_version(self, version: str) -> None:
-        """Set sync version marker."""
+        """Set sync version marker (persisted so it survives restarts)."""
         self._version = version
+        self._products.set_meta("version", version)
+
+    @property
+    def version(self) -> str:
+        """Current sync version marker."""
+        return self._version
 
-    async def preload_hot_data(self, l1_cache) -> None:
-        """Preload frequently used keys into L1 cache."""
+    @property
+    def generation(self) -> int:
+        """ID of the catalog generation currently served."""
+        return self._generation
+
+    def record_query(self, canonical_query: str) -> None:
+        """Count one occurrence of a canonical product query.
+
+        Counts are buffered in memory and flushed on the writer thread once
+        QUERY_COUNT_FLUSH_KEYS distinct queries are pending or
+        QUERY_COUNT_FLUSH_INTERVAL_S has passed, so the buffer stays bounded
+        however many distinct queries (typos included) arrive.
+        """
+        if not canonical_query:
+            return
+        pending = self._pending_query_counts
+        if canonical_query not in pending and len(pending) >= 2 * QUERY_COUNT_FLUSH_KEYS:
+            return
+        pending[canonical_query] += 1
+        if self._flush_tasks:
+            return  # A flush is already scheduled
+        if (len(pending) >= QUERY_COUNT_FLUSH_KEYS
+                or time.monotonic() - self._counts_flushed_at >= QUERY_COUNT_FLUSH_INTERVAL_S):
+            try:
+                task = asyncio.get_running_loop().create_task(self.flush_query_counts())
+            except RuntimeError:
+                return  # No event loop; the next flush_query_counts() call persists them
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+
+    async def flush_query_counts(self) -> None:
+        """Persist buffered query counts to the ``query_stats`` table."""
+        self._counts_flushed_at = time.monotonic()
+        if not self._pending_query_counts:
+            return
+        pending = dict(self._pending_query_counts)
+        self._pending_query_counts.clear()
+        await self.writer.run(ProductCache.add_query_counts, pending)
+
+    async def preload_hot_data(self, l1_cache, top_n: int = 50) -> None:
+        """Preload frequently used keys into L1 cache.
+
+        Besides active promos, runs the *top_n* most frequently asked product
+        searches against the current catalog and stores their results
+        (ProductRecords) under the same L1 keys the request handlers use.
+        """
         promos = await self.get_active_promos(limit=3)
         if promos:
             l1_cache.set("active_promos", promos)
 
+        if top_n <= 0:
+            return
+        await self.flush_query_counts()
+        preloaded = 0
+        for query, _count in await self.read_pool.run(ProductCache.top_queries, top_n):
+            results = await self.search_records(query, max_results=PRODUCT_RESULT_DEPTH)
+            if results:
+                l1_cache.set(product_cache_key(query), results)
+                preloaded += 1
+        logger.info("l1_hot_queries_preloaded", count=preloaded, top_n=top_n)
+
     def stats(self) -> dict:
-        """Expose cache stats for health checks."""
+        """Expose cache stats for health checks (in-memory only; no SQLite reads)."""
         return {
             "version": self._version,
-            "product_count": self._products.product_count(),
+            "product_count": self._product_count,
             "promo_count": len(self._promos),
             "status": "active",
+            "generation": self._generation,
+            "building_generation": self._building_generation,
+            "swapped_at": self._swapped_at,
+            "sqlite_profile": self.profile,
+            "ranking_profile": self.ranking if isinstance(self.ranking, str) else dict(self.ranking),
+            "query_rewrite": self.rewriter.stats(),
+            "read_pool": self._pool.stats() if self._pool is not None else None,
         }
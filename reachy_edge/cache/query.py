@@ -0,0 +1,71 @@
+"""Query canonicalization shared by every L1 product lookup path.
+
+Kiosk questions arrive in many surface forms ("Where is diesel?", "diesel ",
+"DIESEL") that should resolve to the same cached result. Canonicalizing
+before building the cache key lets all of them share one L1 entry.
+"""
+import re
+from functools import lru_cache
+from typing import Optional
+
+# Filler words that never narrow a product search
+STOP_WORDS = frozenset({
+    "a", "am", "an", "and", "any", "anything", "are", "as", "at", "be", "buy",
+    "by", "can", "could", "do", "does", "find", "for", "from", "get", "got",
+    "has", "have", "he", "help", "her", "his", "how", "i", "if", "im", "in",
+    "is", "it", "looking", "m", "me", "my", "need", "of", "on", "or", "our",
+    "please", "s", "sell", "she", "should", "so", "some", "that", "the",
+    "their", "them", "there", "they", "this", "to", "up", "want", "we",
+    "what", "when", "where", "which", "who", "will", "with", "you", "your",
+})
+
+PRODUCT_KEY_PREFIX = "product:"
+CODE_KEY_PREFIX = "code:"
+
+# Every product entry in L1 holds this many ranked results so callers with
+# different limits can share it and slice what they need.
+PRODUCT_RESULT_DEPTH = 20
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Scanner-style input: one alphanumeric run (dash/underscore/dot separated)
+# containing at least one digit, e.g. "FUEL-DEF-001" or "012345678905".
+_CODE_RE = re.compile(r"(?=[^\s]*\d)[A-Za-z0-9]+(?:[-_.][A-Za-z0-9]+)*")
+
+
+@lru_cache(maxsize=4096)
+def canonicalize_query(query: str) -> str:
+    """Reduce a free-text query to its canonical form.
+
+    Lowercases, strips punctuation, drops stop words and sorts the remaining
+    tokens so word order does not matter. If every token is a stop word the
+    unfiltered tokens are kept instead of returning an empty string.
+
+    Returns:
+        Space-separated canonical tokens, safe to pass to FTS5 MATCH
+    """
+    tokens = _TOKEN_RE.findall(query.lower())
+    kept = [t for t in tokens if t not in STOP_WORDS] or tokens
+    return " ".join(sorted(set(kept)))
+
+
+def product_cache_key(query: str) -> str:
+    """Return the L1 key for a product search query."""
+    return f"{PRODUCT_KEY_PREFIX}{canonicalize_query(query)}"
+
+
+def product_code(query: str) -> Optional[str]:
+    """Return *query* as an exact SKU/UPC/EAN candidate, or None.
+
+    Only single-token input that contains a digit qualifies, so ordinary
+    questions skip the exact-code lookup entirely.
+    """
+    candidate = query.strip()
+    if 4 <= len(candidate) <= 32 and _CODE_RE.fullmatch(candidate):
+        return candidate
+    return None
+
+
+def code_cache_key(code: str) -> str:
+    """Return the L1 key for an exact product code lookup."""
+    return f"{CODE_KEY_PREFIX}{code.upper()}"
@@ -0,0 +1,247 @@
+"""Query rewriting between user text and the FTS5 ``MATCH`` expression.
+
+Every search passes through one memoized rewrite stage:
+
+1. sanitize: split into word tokens, keeping code-like runs ("FUEL-DEF-001")
+   together so they become one quoted phrase instead of FTS5 operators
+2. drop stop words (unless nothing would remain)
+3. repair typos against a TypoIndex (SymSpell-style delete index)
+4. expand synonyms ("hungry" -> food, snack, ...)
+
+The result is a safe OR expression of quoted terms that hits the index once,
+plus a prefix variant used only when the first query returns nothing.
+
+The TypoIndex starts from the small PRODUCT_TERMS table and is replaced by
+the catalog's own FTS5 vocabulary each time a catalog is loaded. Those
+vocabulary entries are porter stems ("coffe", "batteri"), so repaired terms
+are emitted as prefix queries.
+"""
+import re
+import time
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Mapping, NamedTuple, Optional, Set, Tuple, Union
+
+from .query import STOP_WORDS
+
+# Maps intent words to product-relevant search terms
+SYNONYMS: Dict[str, Tuple[str, ...]] = {
+    "hungry": ("food", "meal", "snack", "pizza", "burger", "sandwich", "chicken"),
+    "thirsty": ("water", "drink", "beverage", "coffee", "soda"),
+    "tired": ("energy", "coffee", "caffeine"),
+    "sleepy": ("energy", "coffee", "caffeine"),
+    "eat": ("food", "meal", "snack"),
+    "drink": ("beverage", "water", "coffee", "soda"),
+    "gas": ("fuel", "diesel"),
+    "restroom": ("shower", "bathroom"),
+    "bathroom": ("shower", "restroom"),
+}
+
+# Known product terms used for typo repair until a catalog vocabulary loads
+PRODUCT_TERMS: FrozenSet[str] = frozenset({
+    "diesel", "fuel", "coffee", "shower", "radio", "tire", "oil",
+    "battery", "snack", "energy", "burger", "pizza", "sandwich",
+    "water", "wash", "parking", "vest", "flashlight", "chain",
+    "gloves", "tarp", "strap", "logbook", "gps", "headset", "jerky",
+    "nuts", "donut", "muffin", "chicken", "taco", "chili", "salad",
+    "charger", "coolant", "antifreeze", "sunglasses", "drinks",
+})
+
+# Shortest token that typo repair will touch; shorter words have too many
+# single-edit neighbours to correct reliably.
+MIN_REPAIR_LENGTH = 5
+
+# Tokens at least this long may be repaired with up to two edits
+LONG_TOKEN_LENGTH = 8
+
+_TOKEN_RE = re.compile(r"\w+(?:[-_.]\w+)*", re.UNICODE)
+
+
+class RewrittenQuery(NamedTuple):
+    """Output of the rewrite stage."""
+
+    terms: Tuple[str, ...]
+    """Final search terms (after stop words, repair and expansion)."""
+    match: str
+    """FTS5 MATCH expression; empty if the query has no searchable terms."""
+    prefix_match: str
+    """Prefix-wildcard fallback expression for zero-result queries."""
+
+
+def _deletes(word: str) -> Set[str]:
+    """Return every string one deleted character away from *word*."""
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def _osa_distance(a: str, b: str, max_distance: int) -> int:
+    """Optimal string alignment distance between *a* and *b*.
+
+    Stops early and returns ``max_distance + 1`` once the distance is known
+    to exceed *max_distance*.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    before: list[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (a[i - 1] != b[j - 1]),
+            )
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+class TypoIndex:
+    """Delete-neighbourhood index for typo repair (SymSpell style).
+
+    Every term and each single-character deletion of it is stored in a
+    dict, so a lookup touches only the deletions of the query token rather
+    than scanning the vocabulary. Candidates are checked with an exact
+    edit distance. Distance 1 is always found. Distance 2 is found when the
+    token has two extra characters, or one edit on each side.
+
+    Usage:
+        index = TypoIndex({"diesel": 12, "coffe": 30})
+        index.lookup("dielsel")  # 'diesel'
+    """
+
+    def __init__(self, terms: Union[Mapping[str, int], Iterable[str]]):
+        """Build the index.
+
+        Args:
+            terms: Vocabulary, either term -> document frequency (ties go to
+                the more frequent term) or a plain iterable of terms
+        """
+        start = time.perf_counter()
+        self.counts: Dict[str, int] = (
+            dict(terms) if isinstance(terms, Mapping) else dict.fromkeys(terms, 1)
+        )
+        neighbours: Dict[str, list[str]] = {}
+        for term in self.counts:
+            neighbours.setdefault(term, []).append(term)
+            for deleted in _deletes(term):
+                neighbours.setdefault(deleted, []).append(term)
+        self._neighbours = neighbours
+        self.build_ms = (time.perf_counter() - start) * 1000
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def __contains__(self, term: object) -> bool:
+        return term in self.counts
+
+    def lookup(self, token: str, max_distance: int = 1) -> Optional[str]:
+        """Return the closest indexed term to *token*, or None.
+
+        Closest means the smallest edit distance, then the highest
+        frequency, then alphabetical order.
+        """
+        variants = {token} | _deletes(token)
+        if max_distance >= 2:
+            variants |= {d for v in list(variants) for d in _deletes(v)}
+        candidates = {term for v in variants for term in self._neighbours.get(v, ())}
+
+        best: Optional[Tuple[int, int, str]] = None
+        for term in candidates:
+            distance = _osa_distance(token, term, max_distance)
+            if distance <= max_distance:
+                key = (distance, -self.counts[term], term)
+                if best is None or key < best:
+                    best = key
+        return best[2] if best else None
+
+
+def _quote(term: str) -> str:
+    """Quote *term* as an FTS5 string so no character acts as an operator."""
+    return '"' + term.replace('"', '""') + '"'
+
+
+class QueryRewriter:
+    """Memoized user-text -> FTS5 MATCH rewriter.
+
+    Tables are frozen at construction, so one instance can be shared by every
+    reader thread; rewrites are cached in a thread-safe LRU. set_index()
+    swaps in a new typo index (and a fresh memo) when the catalog changes.
+
+    Usage:
+        rewriter = QueryRewriter()
+        rewriter.rewrite("Where can I get diesel?").match  # '"diesel"'
+    """
+
+    def __init__(
+        self,
+        terms: Iterable[str] = PRODUCT_TERMS,
+        synonyms: Optional[Dict[str, Tuple[str, ...]]] = None,
+        stop_words: FrozenSet[str] = STOP_WORDS,
+        memo_size: int = 4096,
+    ):
+        self.index = TypoIndex(terms)
+        self.synonyms = dict(SYNONYMS if synonyms is None else synonyms)
+        self.stop_words = stop_words
+        self.memo_size = memo_size
+        self._rewrite = lru_cache(maxsize=memo_size)(self._rewrite_uncached)
+
+    def set_index(self, index: TypoIndex) -> None:
+        """Swap in a new typo index and start a fresh memo.
+
+        Both are replaced by plain attribute assignment, so concurrent
+        rewrites see either the old pair or the new one.
+        """
+        self.index = index
+        self._rewrite = lru_cache(maxsize=self.memo_size)(self._rewrite_uncached)
+
+    def correct(self, token: str) -> Optional[str]:
+        """Return the indexed term closest to a misspelt *token*, or None."""
+        if len(token) < MIN_REPAIR_LENGTH or not token.isalpha() or token in self.index:
+            return None
+        max_distance = 2 if len(token) >= LONG_TOKEN_LENGTH else 1
+        return self.index.lookup(token, max_distance)
+
+    def rewrite(self, query: str) -> RewrittenQuery:
+        """Rewrite *query* (memoized)."""
+        return self._rewrite(query)
+
+    def _rewrite_uncached(self, query: str) -> RewrittenQuery:
+        tokens = _TOKEN_RE.findall(query.lower())
+        kept = [t for t in tokens if t not in self.stop_words] or tokens
+
+        terms: list[str] = []
+        repaired: Set[str] = set()
+        for token in kept:
+            terms.append(token)
+            corrected = self.correct(token)
+            if corrected:
+                terms.append(corrected)
+                repaired.add(corrected)
+            terms.extend(self.synonyms.get(token) or self.synonyms.get(corrected or "", ()))
+        terms = list(dict.fromkeys(terms))  # Dedupe, keep order
+
+        if not terms:
+            return RewrittenQuery((), "", "")
+        return RewrittenQuery(
+            terms=tuple(terms),
+            # Repaired terms may be index stems, so match them as prefixes
+            match=" OR ".join(_quote(t) + ("*" if t in repaired else "") for t in terms),
+            prefix_match=" OR ".join(_quote(t) + "*" for t in terms),
+        )
+
+    def stats(self) -> dict:
+        """Memo statistics."""
+        info = self._rewrite.cache_info()
+        return {
+            "terms": len(self.index),
+            "index_build_ms": round(self.index.build_ms, 2),
+            "memo_hits": info.hits,
+            "memo_misses": info.misses,
+            "memo_size": info.currsize,
+        }
+
+
+DEFAULT_REWRITER = QueryRewriter()
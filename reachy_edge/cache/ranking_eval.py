@@ -0,0 +1,61 @@
+"""Offline relevance evaluation for L2 ranking profiles.
+
+Scores a ProductCache (and so its BM25 column weights) against graded
+query judgments, so ranking changes can be compared before they ship:
+
+    cache = ProductCache(db_path, ranking="name_first")
+    evaluate_ranking(cache, RANKING_JUDGMENTS)["ndcg"]
+"""
+import math
+from typing import Dict, Iterable, List, Tuple
+
+Judgments = Iterable[Tuple[str, Dict[str, int]]]
+
+
+def _dcg(gains: List[int]) -> float:
+    """Discounted cumulative gain of *gains* in rank order."""
+    return sum((2 ** g - 1) / math.log2(rank + 2) for rank, g in enumerate(gains))
+
+
+def score_ranking(ranked_skus: List[str], relevant: Dict[str, int], k: int) -> Dict[str, float]:
+    """Score one ranked result list against graded judgments.
+
+    Returns:
+        ``ndcg`` (at *k*), ``mrr`` (reciprocal rank of the first relevant
+        result), ``p_at_1`` (top result has the highest grade among the
+        judgments for this query) and ``recall``
+        (share of relevant SKUs in the top *k*)
+    """
+    top = ranked_skus[:k]
+    ideal = _dcg(sorted(relevant.values(), reverse=True)[:k])
+    first = next((i for i, sku in enumerate(top) if relevant.get(sku, 0) > 0), None)
+    best = max(relevant.values(), default=0)
+    return {
+        "ndcg": _dcg([relevant.get(sku, 0) for sku in top]) / ideal if ideal else 0.0,
+        "mrr": 1.0 / (first + 1) if first is not None else 0.0,
+        "p_at_1": 1.0 if top and relevant.get(top[0], 0) == best > 0 else 0.0,
+        "recall": sum(1 for sku in top if relevant.get(sku, 0) > 0) / len(relevant) if relevant else 0.0,
+    }
+
+
+def evaluate_ranking(cache, judgments: Judgments, k: int = 5) -> Dict[str, float]:
+    """Average score_ranking() over every judged query.
+
+    Args:
+        cache: ProductCache (or anything with ``search_records``) to evaluate
+        judgments: (query, {sku: grade}) pairs
+        k: Result depth scored
+
+    Returns:
+        Mean ``ndcg``, ``mrr``, ``p_at_1`` and ``recall``, plus ``queries``
+    """
+    totals: Dict[str, float] = {"ndcg": 0.0, "mrr": 0.0, "p_at_1": 0.0, "recall": 0.0}
+    count = 0
+    for query, relevant in judgments:
+        ranked = [record.sku for record in cache.search_records(query, max_results=k)]
+        for metric, value in score_ranking(ranked, relevant, k).items():
+            totals[metric] += value
+        count += 1
+    averages = {metric: total / count if count else 0.0 for metric, total in totals.items()}
+    averages["queries"] = count
+    return averages
@@ -0,0 +1,76 @@
+"""Pre-rendered response cache for the /interact endpoint.
+
+Stores fully serialized JSON response bodies for repeated kiosk questions so
+a hit skips the tool pipeline, pydantic construction and JSON encoding.
+Entries are keyed by canonical query, intent and cache version, so a catalog
+sync naturally stops old bodies from being served.
+"""
+from typing import Any, Dict, Optional, Tuple
+import logging
+
+from pydantic import BaseModel
+
+from .l1_cache import L1Cache
+from .query import canonicalize_query
+
+logger = logging.getLogger(__name__)
+
+# Placeholder written into the rendered body where the per-request latency
+# goes; it is split out once at store time and spliced back on every hit.
+_LATENCY_SENTINEL = -1.0
+_LATENCY_FIELD = b'"latency_ms":'
+
+
+class ResponseCache:
+    """LRU cache of serialized responses with a per-hit latency slot."""
+
+    def __init__(self, max_size: int = 500, ttl_seconds: int = 300):
+        self.enabled = max_size > 0
+        self._cache = L1Cache(max_size=max(max_size, 1), ttl_seconds=ttl_seconds)
+
+    @staticmethod
+    def key(query: str, intent: str, version: str) -> str:
+        """Build the cache key for *query* under catalog *version*."""
+        return f"{version}:{intent}:{canonicalize_query(query)}"
+
+    def store(self, key: str, response: BaseModel) -> None:
+        """Serialize *response* once and keep it for later hits.
+
+        The stored body is marked ``cache_hit=true``; its ``latency_ms`` is
+        filled in per request by :meth:`render`.
+        """
+        if not self.enabled:
+            return
+        template = response.model_copy(update={"latency_ms": _LATENCY_SENTINEL, "cache_hit": True})
+        body = template.model_dump_json().encode()
+        marker = _LATENCY_FIELD + str(_LATENCY_SENTINEL).encode()
+        head, sep, tail = body.partition(marker)
+        if not sep:
+            logger.warning("Response has no latency_ms field, not cached")
+            return
+        self._cache.set(key, (head + _LATENCY_FIELD, tail))
+
+    def render(self, key: str, latency_ms: float) -> Optional[bytes]:
+        """Return the cached body for *key* with *latency_ms* filled in."""
+        if not self.enabled:
+            return None
+        parts: Optional[Tuple[bytes, bytes]] = self._cache.get(key)
+        if parts is None:
+            return None
+        head, tail = parts
+        return head + repr(round(latency_ms, 3)).encode() + tail
+
+    def invalidate(self) -> None:
+        """Drop every cached response."""
+        self._cache.invalidate()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return response cache statistics."""
+        stats = self._cache.stats()
+        return {
+            "enabled": self.enabled,
+            "size": stats["size"],
+            "hits": stats["hits"],
+            "misses": stats["misses"],
+            "hit_rate_pct": stats["hit_rate_pct"],
+        }
@@ -1,5 +1,5 @@
 """Cache data schemas."""
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
@@ -12,6 +12,8 @@ class Product(BaseModel):
     category: str
     price: Optional[float] = None
     description: Optional[str] = None
+    upc: Optional[str] = None
+    ean: Optional[str] = None
 
 
 class Promo(BaseModel):
@@ -26,9 +28,29 @@ class Promo(BaseModel):
 
 
 class CacheSyncPayload(BaseModel):
-    """Payload for cache sync from the Second Brain."""
+    """Payload for cache sync from the Second Brain.
+
+    Either ``products`` replaces the whole catalog, or ``base_version`` with
+    ``upserted``/``deleted_skus`` describes a delta against that version.
+    """
     version: str
     timestamp: datetime
     products: Optional[List[Product]] = None
     promos: Optional[List[Promo]] = None
     store_config: Optional[Dict[str, Any]] = None
+    base_version: Optional[str] = None
+    upserted: Optional[List[Product]] = None
+    deleted_skus: Optional[List[str]] = None
+
+    @model_validator(mode="after")
+    def _check_delta(self) -> "CacheSyncPayload":
+        if (self.upserted or self.deleted_skus) and self.base_version is None:
+            raise ValueError("delta sync requires base_version")
+        if self.base_version is not None and self.products is not None:
+            raise ValueError("products and delta fields are mutually exclusive")
+        return self
+
+    @property
+    def is_delta(self) -> bool:
+        """Whether this payload is an incremental catalog change."""
+        return self.base_version is not None
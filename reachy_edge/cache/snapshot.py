@@ -0,0 +1,102 @@
+"""L1 warm-start snapshots persisted next to the L2 database.
+
+On shutdown the hottest product searches in L1 are written to a compact JSON
+file; on the next startup they are reloaded, but only if the L2 catalog is
+still the one they were computed from (same sync version and product count).
+"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+import structlog
+
+from .l1_cache import L1Cache
+from .l2_cache import ProductRecord
+from .query import PRODUCT_KEY_PREFIX
+
+logger = structlog.get_logger(__name__)
+
+SNAPSHOT_FORMAT = 1
+
+
+def snapshot_path(db_path: str) -> Path:
+    """Return the snapshot file location for the L2 database at *db_path*."""
+    return Path(f"{db_path}.l1.json")
+
+
+def _fingerprint(l2_cache) -> Dict[str, Any]:
+    """Identify the L2 catalog a snapshot belongs to."""
+    stats = l2_cache.stats()
+    return {"version": stats["version"], "product_count": stats["product_count"]}
+
+
+def save_l1_snapshot(l1_cache: L1Cache, l2_cache, path: Path, max_keys: int = 200) -> int:
+    """Write the hottest L1 product entries to *path*.
+
+    Returns:
+        Number of entries written
+    """
+    entries = [
+        {
+            "key": item["key"],
+            "hits": item["hits"],
+            "products": [
+                {k: v for k, v in p._asdict().items() if v is not None} for p in item["value"]
+            ],
+        }
+        for item in l1_cache.snapshot(max_keys=max_keys, prefix=PRODUCT_KEY_PREFIX)
+        if isinstance(item["value"], list)
+    ]
+    payload = {
+        "format": SNAPSHOT_FORMAT,
+        "saved_at": time.time(),
+        **_fingerprint(l2_cache),
+        "entries": entries,
+    }
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp_path, path)  # Atomic: a crash never leaves a torn snapshot
+    logger.info("l1_snapshot_saved", path=str(path), entries=len(entries))
+    return len(entries)
+
+
+def load_l1_snapshot(l1_cache: L1Cache, l2_cache, path: Path) -> int:
+    """Restore L1 entries from *path* if it matches the current L2 catalog.
+
+    Returns:
+        Number of entries restored (0 if missing, stale or unreadable)
+    """
+    if not path.exists():
+        return 0
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        logger.warning("l1_snapshot_unreadable", path=str(path), error=str(e))
+        return 0
+
+    current = _fingerprint(l2_cache)
+    saved = {k: payload.get(k) for k in current}
+    if payload.get("format") != SNAPSHOT_FORMAT or saved != current:
+        logger.info("l1_snapshot_stale", path=str(path), saved=saved, current=current)
+        return 0
+
+    try:
+        entries = [
+            {
+                "key": item["key"],
+                "hits": item.get("hits", 0),
+                "value": [ProductRecord(**p) for p in item["products"]],
+            }
+            for item in payload.get("entries", [])
+        ]
+    except (KeyError, TypeError, ValueError) as e:
+        logger.warning("l1_snapshot_invalid", path=str(path), error=str(e))
+        return 0
+
+    restored = l1_cache.restore(entries)
+    logger.info("l1_snapshot_loaded", path=str(path), entries=restored)
+    return restored
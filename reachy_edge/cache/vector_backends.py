@@ -2,11 +2,15 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
 from typing import Optional
-import math
-import sqlite3
+import threading
+import time
 
+from ..models import Product as SearchProduct
+from .l2_cache import ThreadSafeProductCache
+from .query_rewrite import QueryRewriter
 from .schemas import Product as CacheProduct
 
 
@@ -19,42 +23,40 @@ class ProductRetrievalBackend(ABC):
     def search_one(self, query: str) -> Optional[CacheProduct]:
         pass
 
+    def search(self, query: str, k: int = 5) -> list[tuple[CacheProduct, float]]:
+        """Return up to *k* (product, score) pairs, best first."""
+        hit = self.search_one(query)
+        return [(hit, 1.0)] if hit else []
+
+    @abstractmethod
+    def replace_products(self, products: list[CacheProduct]) -> None:
+        """Make *products* the whole catalog; SKUs not listed are removed."""
+
     @abstractmethod
     def stats(self) -> dict:
         pass
 
 
 class SQLiteKeywordBackend(ProductRetrievalBackend):
-    """SQLite FTS-backed backend with light aisle schema mapping."""
+    """SQLite FTS-backed backend with light aisle schema mapping.
 
-    def __init__(self, db_path: str):
+    Storage and search are delegated to ProductCache, so this backend shares
+    the canonical ``products`` table and its external-content FTS5 index.
+    Connections are per thread, so it can be searched from a worker pool.
+
+    Without a *rewriter* the backend owns one and rebuilds its typo index
+    from the catalog vocabulary on every replace. A rewriter passed in
+    (such as ``L2Cache.rewriter``) is used as is; its owner keeps the index.
+    """
+
+    def __init__(self, db_path: str, rewriter: Optional[QueryRewriter] = None):
         self.db_path = Path(db_path)
-        self._conn: Optional[sqlite3.Connection] = None
-        self._init_db()
-
-    def _connect(self) -> sqlite3.Connection:
-        if self._conn is None:
-            self.db_path.parent.mkdir(parents=True, exist_ok=True)
-            self._conn = sqlite3.connect(str(self.db_path))
-            self._conn.row_factory = sqlite3.Row
-        return self._conn
-
-    def _init_db(self) -> None:
-        conn = self._connect()
-        conn.execute(
-            """
-            CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
-                sku,
-                name,
-                category,
-                location,
-                price UNINDEXED,
-                description,
-                tokenize='porter unicode61'
-            )
-            """
-        )
-        conn.commit()
+        self._owns_rewriter = rewriter is None
+        self.rewriter = rewriter or QueryRewriter()
+        self._cache = ThreadSafeProductCache(str(self.db_path), rewriter=self.rewriter)
+        self._cache.initialize()
+        if self._owns_rewriter and self._cache.product_count():
+            self.rewriter.set_index(self._cache.typo_index())
 
     @staticmethod
     def _to_location(aisle: str) -> str:
@@ -69,69 +71,243 @@ class SQLiteKeywordBackend(ProductRetrievalBackend):
         return location
 
     def upsert_products(self, products: list[CacheProduct]) -> None:
-        conn = self._connect()
-        conn.execute("DELETE FROM products_fts")
-        rows = [
-            (
-                p.sku,
-                p.name,
-                p.category,
-                self._to_location(p.aisle),
-                p.price,
-                p.description or "",
+        """Swap in *products* as the catalog (this backend always replaces)."""
+        self.replace_products(products)
+
+    def replace_products(self, products: list[CacheProduct]) -> None:
+        self._cache.replace_products([
+            SearchProduct(
+                sku=p.sku,
+                name=p.name,
+                category=p.category,
+                location=self._to_location(p.aisle),
+                price=p.price or 0.0,
+                description=p.description or "",
+                upc=p.upc,
+                ean=p.ean,
             )
             for p in products
+        ])
+        if self._owns_rewriter:
+            self.rewriter.set_index(self._cache.typo_index())
+
+    def search(self, query: str, k: int = 5) -> list[tuple[CacheProduct, float]]:
+        """Return up to *k* (product, BM25 relevance) pairs, best first."""
+        if not query.strip():
+            return []
+        return [
+            (
+                CacheProduct(
+                    sku=row.sku,
+                    name=row.name,
+                    aisle=self._to_aisle(row.location),
+                    category=row.category,
+                    price=row.price,
+                    description=row.description,
+                    upc=row.upc,
+                    ean=row.ean,
+                ),
+                row.relevance_score,
+            )
+            for row in self._cache.search_records(query, max_results=k)
         ]
-        conn.executemany(
-            """
-            INSERT INTO products_fts (sku, name, category, location, price, description)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """,
-            rows,
-        )
-        conn.commit()
 
     def search_one(self, query: str) -> Optional[CacheProduct]:
-        if not query.strip():
-            return None
-        conn = self._connect()
-        cursor = conn.execute(
-            """
-            SELECT sku, name, category, location, price, description
-            FROM products_fts
-            WHERE products_fts MATCH ?
-            ORDER BY bm25(products_fts)
-            LIMIT 1
-            """,
-            (query,),
-        )
-        row = cursor.fetchone()
-        if not row:
+        hits = self.search(query, k=1)
+        return hits[0][0] if hits else None
+
+    def stats(self) -> dict:
+        return {"backend": "sqlite", "product_count": self._cache.product_count()}
+
+
+def _product_text(p: CacheProduct) -> str:
+    return f"{p.sku} {p.name} {p.category} {p.description or ''}"
+
+
+class LocalVectorBackend(ProductRetrievalBackend):
+    """Offline semantic backend: catalog embeddings in a memory-mapped matrix.
+
+    Products are embedded with a local embedder (hashed n-gram TF-IDF by
+    default, or a sentence-transformers model) into one float32 matrix and
+    searched exactly (``index="exact"``, one matrix-vector product) or with
+    an IVF-flat ANN index (``index="ivf"``, tuned by ``nlist``/``nprobe``).
+    With *index_dir* set, vectors, index, embedder state and product
+    payloads are saved there and memory-mapped again on restart; without it
+    everything stays in memory. Requires NumPy.
+    """
+
+    def __init__(
+        self,
+        index_dir: Optional[str] = None,
+        embedding_dim: int = 1024,
+        embedder: str = "hashed",
+        model: str = "",
+        min_score: float = 0.13,
+        index: str = "exact",
+        refit_ratio: float = 0.2,
+        **index_params,
+    ):
+        from . import embeddings, vector_index
+
+        self._emb = embeddings
+        self._vi = vector_index
+        self.index_dir = Path(index_dir) if index_dir else None
+        self.min_score = min_score
+        self.refit_ratio = refit_ratio
+        self._products: dict[str, CacheProduct] = {}
+        self._skus: list[str] = []  # row id -> SKU
+        self._rows: dict[str, int] = {}
+        self._fitted_count = 0
+
+        meta = embeddings.load_meta(self.index_dir) if self.index_dir else None
+        if meta is None:
+            self.embedder = embeddings.make_embedder(embedder, embedding_dim, model)
+            self.store = vector_index.VectorStore(self.embedder.dim, self._vectors_path())
+            self.index = vector_index.make_index(index, self.store, **index_params)
+            return
+        self.embedder = embeddings.EMBEDDERS[meta["embedder"]["kind"]].load(self.index_dir, meta["embedder"])
+        self._products = {p["sku"]: CacheProduct(**p) for p in meta["products"]}
+        self._skus = list(self._products)
+        self._rows = {sku: row for row, sku in enumerate(self._skus)}
+        self._fitted_count = meta["fitted_count"]
+        self.store = vector_index.VectorStore(self.embedder.dim, self._vectors_path(), len(self._skus))
+        if meta["index"]["kind"] == index:
+            self.index = vector_index.ANN_INDEXES[index].load(self.store, self.index_dir, meta["index"])
+            for name, value in index_params.items():  # e.g. a retuned nprobe
+                setattr(self.index, name, value)
+        else:
+            self.index = vector_index.make_index(index, self.store, **index_params)
+            self._reorder(self.index.rebuild())
+
+    def _vectors_path(self) -> Optional[Path]:
+        if not self.index_dir:
             return None
-        return CacheProduct(
-            sku=row["sku"],
-            name=row["name"],
-            aisle=self._to_aisle(row["location"]),
-            category=row["category"],
-            price=row["price"],
-            description=row["description"],
-        )
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        return self.index_dir / self._vi.VECTORS_FILE
+
+    def _reorder(self, order) -> None:
+        """Follow a row permutation applied to the store by the index."""
+        if order is not None:
+            self._skus = [self._skus[row] for row in order]
+            self._rows = {sku: row for row, sku in enumerate(self._skus)}
+
+    def _embed_batches(self, skus: list[str], batch_size: int = 4096):
+        for start in range(0, len(skus), batch_size):
+            yield self.embedder.embed([_product_text(self._products[sku]) for sku in skus[start:start + batch_size]])
+
+    def upsert_products(self, products: list[CacheProduct]) -> None:
+        """Merge *products* by SKU and index them.
+
+        Small upserts embed only *products* with the current embedder: new
+        SKUs are appended to the matrix and the ANN index, changed ones are
+        rewritten in place. Once new SKUs exceed ``refit_ratio`` of the
+        catalog the embedder was fitted on, it is refitted (IDF depends on
+        every product) and the whole matrix and index are rebuilt, in
+        batches, straight to disk.
+        """
+        for p in products:
+            self._products[p.sku] = p
+        new = len(self._products) - len(self._rows)
+
+        if not self._fitted_count or new > self.refit_ratio * self._fitted_count:
+            skus = list(self._products)
+            self.embedder.fit(_product_text(self._products[sku]) for sku in skus)
+            self.store.replace(self._embed_batches(skus))
+            self._skus = skus
+            self._rows = {sku: row for row, sku in enumerate(skus)}
+            self._fitted_count = len(skus)
+            self._reorder(self.index.rebuild())
+        else:
+            np = self._emb.np
+            changed = list(dict.fromkeys(p.sku for p in products if p.sku in self._rows))
+            added = list(dict.fromkeys(p.sku for p in products if p.sku not in self._rows))
+            rows = []
+            if changed:
+                changed_rows = np.array([self._rows[sku] for sku in changed])
+                self.store.update(changed_rows, np.concatenate(list(self._embed_batches(changed))))
+                rows.append(changed_rows)
+            if added:
+                rows.append(self.store.append(np.concatenate(list(self._embed_batches(added)))))
+                self._rows.update((sku, row) for row, sku in enumerate(added, start=len(self._skus)))
+                self._skus.extend(added)
+            if rows:
+                self._reorder(self.index.add(np.concatenate(rows)))
+
+        if self.index_dir:
+            self._emb.save_meta(self.index_dir, {
+                "embedder": self.embedder.save(self.index_dir),
+                "index": self.index.save(self.index_dir),
+                "fitted_count": self._fitted_count,
+                "products": [self._products[sku].model_dump() for sku in self._skus],  # row order
+            })
+
+    def replace_products(self, products: list[CacheProduct]) -> None:
+        """Make *products* the whole catalog, dropping every other SKU.
+
+        Refits the embedder and rebuilds the matrix and index from scratch.
+        """
+        self._products = {}
+        self._fitted_count = 0
+        self.upsert_products(products)
+
+    def embed_query(self, query: str):
+        return self.embedder.embed([query])[0]
+
+    def search(self, query: str, k: int = 5) -> list[tuple[CacheProduct, float]]:
+        """Return up to *k* (product, cosine) pairs scoring at least min_score."""
+        if not query.strip():
+            return []
+        return [
+            (self._products[self._skus[row]], score)
+            for row, score in self.index.search(self.embed_query(query), k)
+            if score >= self.min_score
+        ]
+
+    def search_one(self, query: str) -> Optional[CacheProduct]:
+        hits = self.search(query, k=1)
+        return hits[0][0] if hits else None
 
     def stats(self) -> dict:
-        return {"backend": "sqlite"}
+        matrix = self.store.matrix
+        return {
+            "backend": "local_vector",
+            "embedder": self.embedder.kind,
+            "embedding_dim": self.embedder.dim,
+            "product_count": len(self.store),
+            "memory_mapped": isinstance(matrix, self._emb.np.memmap),
+            "index_bytes": int(matrix.nbytes),
+            "index": self.index.stats(),
+        }
 
 
 class QdrantVectorBackend(ProductRetrievalBackend):
-    """Optional Qdrant-backed backend with graceful local fallback."""
+    """Optional Qdrant-backed backend with graceful local fallback.
+
+    Vectors come from the same offline embedder as LocalVectorBackend, which
+    also answers queries whenever Qdrant is unreachable. The local backend
+    is built on first use; without NumPy there are no vectors and queries
+    fall back to a substring match over the cached products.
+    """
 
     def __init__(self, url: str, collection: str, embedding_dim: int):
         self.url = url
         self.collection = collection
         self.embedding_dim = embedding_dim
         self._products: dict[str, CacheProduct] = {}
+        self._local: Optional[LocalVectorBackend] = None
+        self._local_unavailable = False
         self._client = None
         self._init_client()
 
+    def _local_backend(self) -> Optional[LocalVectorBackend]:
+        """Return the local vector backend, building it once; None without NumPy."""
+        if self._local is None and not self._local_unavailable:
+            try:
+                self._local = LocalVectorBackend(embedding_dim=self.embedding_dim)
+            except ImportError:
+                self._local_unavailable = True
+        return self._local
+
     def _init_client(self) -> None:
         try:
             from qdrant_client import QdrantClient  # type: ignore
@@ -140,15 +316,8 @@ class QdrantVectorBackend(ProductRetrievalBackend):
         except Exception:
             self._client = None
 
-    @staticmethod
-    def _embed(text: str, dim: int) -> list[float]:
-        vec = [0.0] * dim
-        if not text:
-            return vec
-        for idx, ch in enumerate(text.lower()):
-            vec[idx % dim] += (ord(ch) % 31) / 31.0
-        norm = math.sqrt(sum(v * v for v in vec)) or 1.0
-        return [v / norm for v in vec]
+    def _embed(self, text: str) -> list[float]:
+        return self._local_backend().embed_query(text).tolist()
 
     def _ensure_collection(self) -> None:
         if not self._client:
@@ -166,7 +335,27 @@ class QdrantVectorBackend(ProductRetrievalBackend):
     def upsert_products(self, products: list[CacheProduct]) -> None:
         for p in products:
             self._products[p.sku] = p
+        local = self._local_backend()
+        if local is None:
+            return
+        # Refitting the embedder moves every vector, so the whole catalog is
+        # re-uploaded, not just *products*.
+        local.upsert_products(products)
+        self._upload_catalog(local)
+
+    def replace_products(self, products: list[CacheProduct]) -> None:
+        self._products = {p.sku: p for p in products}
+        local = self._local_backend()
+        if local is None:
+            return
+        local.replace_products(products)
+        self._upload_catalog(local)
 
+    def _upload_catalog(self, local: LocalVectorBackend) -> None:
+        """Recreate the collection and upload every vector in *local*.
+
+        Recreating drops points for SKUs no longer in the catalog.
+        """
         if not self._client:
             return
 
@@ -174,13 +363,13 @@ class QdrantVectorBackend(ProductRetrievalBackend):
         try:
             from qdrant_client.models import PointStruct  # type: ignore
 
+            catalog = [local._products[sku] for sku in local._skus]
             points = []
-            for idx, p in enumerate(products):
-                text = f"{p.sku} {p.name} {p.category} {p.aisle} {p.description or ''}"
+            for idx, (p, vector) in enumerate(zip(catalog, local.store.matrix)):
                 points.append(
                     PointStruct(
                         id=idx,
-                        vector=self._embed(text, self.embedding_dim),
+                        vector=vector.tolist(),
                         payload={
                             "sku": p.sku,
                             "name": p.name,
@@ -196,11 +385,12 @@ class QdrantVectorBackend(ProductRetrievalBackend):
             self._client = None
 
     def search_one(self, query: str) -> Optional[CacheProduct]:
-        if self._client:
+        local = self._local_backend()
+        if self._client and local is not None:
             try:
                 hits = self._client.search(
                     collection_name=self.collection,
-                    query_vector=self._embed(query, self.embedding_dim),
+                    query_vector=self._embed(query),
                     limit=1,
                 )
                 if hits:
@@ -216,16 +406,199 @@ class QdrantVectorBackend(ProductRetrievalBackend):
             except Exception:
                 self._client = None
 
+        if local is not None:
+            return local.search_one(query)
         q = query.lower().strip()
         for p in self._products.values():
             hay = f"{p.sku} {p.name} {p.category} {p.aisle} {p.description or ''}".lower()
-            if q in hay:
+            if q and q in hay:
                 return p
-        return next(iter(self._products.values()), None)
+        return None
 
     def stats(self) -> dict:
         return {
             "backend": "qdrant",
             "client_enabled": self._client is not None,
+            "vectors_enabled": self._local is not None,
             "cached_products": len(self._products),
         }
+
+
+class _Leg:
+    """One retrieval backend inside HybridBackend, with its timing counters."""
+
+    def __init__(self, name: str, backend: ProductRetrievalBackend, weight: float, workers: int):
+        self.name = name
+        self.backend = backend
+        self.weight = weight
+        # Own pool per leg, so a stalled leg cannot take the other's threads
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"hybrid-{name}")
+        self.calls = 0
+        self.dropped = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.last_ms = 0.0
+        self.max_ms = 0.0
+
+    def stats(self) -> dict:
+        return {
+            **self.backend.stats(),
+            "weight": self.weight,
+            "calls": self.calls,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "last_ms": round(self.last_ms, 3),
+            "mean_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+class HybridBackend(ProductRetrievalBackend):
+    """Keyword and vector retrieval run concurrently, fused by reciprocal rank.
+
+    Each leg returns its top ``depth`` products; a product's fused score is
+    ``sum(weight / (rrf_k + rank))`` over the legs that returned it, so
+    keyword hits (exact SKUs, rare words) and vector hits (paraphrases,
+    typos) both surface without comparing BM25 and cosine scales. A query
+    that is exactly a SKU returns the keyword match first.
+
+    Every query submits its own call to each leg, on a per-leg pool of
+    *workers* threads, and waits at most ``budget_ms`` for them: a leg that
+    has not answered by then is dropped from that query's fusion instead of
+    blocking it (and its call is cancelled if it never started). Per-leg
+    call counts, drops, errors and timings are reported by stats().
+    """
+
+    def __init__(
+        self,
+        keyword: ProductRetrievalBackend,
+        vector: ProductRetrievalBackend,
+        budget_ms: float = 50.0,
+        rrf_k: int = 60,
+        depth: int = 20,
+        weights: Optional[dict[str, float]] = None,
+        workers: int = 4,
+    ):
+        weights = weights or {}
+        self._legs = [
+            _Leg("keyword", keyword, weights.get("keyword", 1.0), workers),
+            _Leg("vector", vector, weights.get("vector", 1.0), workers),
+        ]
+        self.budget_ms = budget_ms
+        self.rrf_k = rrf_k
+        self.depth = depth
+        self._lock = threading.Lock()
+
+    def upsert_products(self, products: list[CacheProduct]) -> None:
+        """Replace the catalog in both legs.
+
+        The legs must agree on which SKUs exist, or fusion would surface
+        products one leg has already dropped.
+        """
+        self.replace_products(products)
+
+    def replace_products(self, products: list[CacheProduct]) -> None:
+        for leg in self._legs:
+            leg.backend.replace_products(products)
+
+    def _run_leg(self, leg: _Leg, query: str, k: int) -> list[tuple[CacheProduct, float]]:
+        start = time.perf_counter()
+        failed = False
+        try:
+            return leg.backend.search(query, k)
+        except Exception:
+            failed = True
+            return []
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                leg.calls += 1
+                leg.errors += failed
+                leg.total_ms += elapsed_ms
+                leg.last_ms = elapsed_ms
+                leg.max_ms = max(leg.max_ms, elapsed_ms)
+
+    def search(self, query: str, k: int = 5) -> list[tuple[CacheProduct, float]]:
+        """Return up to *k* (product, fused RRF score) pairs, best first."""
+        if not query.strip():
+            return []
+        futures = {
+            leg.pool.submit(self._run_leg, leg, query, max(k, self.depth)): leg for leg in self._legs
+        }
+        done, late = wait(futures, timeout=self.budget_ms / 1000)
+        with self._lock:
+            for future in late:
+                future.cancel()
+                futures[future].dropped += 1
+
+        scores: dict[str, float] = {}
+        products: dict[str, CacheProduct] = {}
+        pinned = None
+        for leg in self._legs:  # keyword first, so it wins ties
+            future = next((f for f in done if futures[f] is leg), None)
+            if future is None:
+                continue
+            for rank, (product, _) in enumerate(future.result(), start=1):
+                scores[product.sku] = scores.get(product.sku, 0.0) + leg.weight / (self.rrf_k + rank)
+                products.setdefault(product.sku, product)
+                if rank == 1 and leg.name == "keyword" and product.sku.lower() == query.strip().lower():
+                    pinned = product.sku
+        ranked = sorted(scores, key=lambda sku: (sku != pinned, -scores[sku]))
+        return [(products[sku], scores[sku]) for sku in ranked[:k]]
+
+    def search_one(self, query: str) -> Optional[CacheProduct]:
+        hits = self.search(query, k=1)
+        return hits[0][0] if hits else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            legs = {leg.name: leg.stats() for leg in self._legs}
+        return {
+            "backend": "hybrid",
+            "fusion": "rrf",
+            "rrf_k": self.rrf_k,
+            "budget_ms": self.budget_ms,
+            "legs": legs,
+        }
+
+    def close(self) -> None:
+        for leg in self._legs:
+            leg.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def create_backend(settings) -> ProductRetrievalBackend:
+    """Build the retrieval backend named by ``settings.l2_backend``.
+
+    For scripts and experiments: the API itself always serves searches
+    from L2Cache (SQLite FTS5), whatever ``l2_backend`` says.
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if settings.l2_backend == "sqlite":
+        return SQLiteKeywordBackend(settings.l2_db_path)
+    if settings.l2_backend == "qdrant":
+        return QdrantVectorBackend(settings.qdrant_url, settings.qdrant_collection, settings.vector_embedding_dim)
+    if settings.l2_backend in ("local", "hybrid"):
+        index_params = {}
+        if settings.vector_index == "ivf":
+            index_params = {"nlist": settings.vector_ivf_nlist, "nprobe": settings.vector_ivf_nprobe}
+        vector = LocalVectorBackend(
+            index_dir=settings.vector_index_dir,
+            embedding_dim=settings.vector_embedding_dim,
+            embedder=settings.vector_embedder,
+            model=settings.vector_embedding_model,
+            index=settings.vector_index,
+            **index_params,
+        )
+        if settings.l2_backend == "local":
+            return vector
+        return HybridBackend(
+            SQLiteKeywordBackend(settings.l2_db_path),
+            vector,
+            budget_ms=settings.hybrid_budget_ms,
+            rrf_k=settings.hybrid_rrf_k,
+            weights=settings.hybrid_weights,
+            workers=settings.hybrid_leg_workers,
+        )
+    raise ValueError(f"Unknown l2_backend {settings.l2_backend!r}; expected sqlite, qdrant, local or hybrid")
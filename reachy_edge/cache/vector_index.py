@@ -0,0 +1,341 @@
+"""Vector storage and nearest-neighbour indexes for LocalVectorBackend.
+
+- VectorStore: float32 rows in one raw file, memory-mapped for reads and
+  grown in place (appends and row rewrites), so an upsert never rewrites
+  the whole matrix.
+- ExactIndex: brute-force cosine search, one matrix-vector product.
+- IVFIndex: IVF-flat approximate search. Spherical k-means splits the rows
+  into ``nlist`` cells, stored contiguously; a query scores the ``nprobe``
+  nearest centroids and then only the rows in those cells. Raising
+  ``nprobe`` trades latency for recall (``nprobe == nlist`` is exact).
+
+Rows are L2-normalised, so the dot product is the cosine. Requires NumPy.
+"""
+import math
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Type
+
+import numpy as np
+
+from .embeddings import _replace_file
+
+VECTORS_FILE = "vectors.f32"
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the *k* highest *scores*, best first."""
+    if k < len(scores):
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top], kind="stable")]
+    return np.argsort(-scores, kind="stable")
+
+
+class VectorStore:
+    """Contiguous float32 matrix of ``dim``-wide rows.
+
+    With a *path* the rows live in a headerless file mapped read-only; the
+    row count is tracked by the caller's metadata, so bytes past it (from an
+    interrupted append) are ignored and overwritten. Without a path the
+    matrix is an in-memory array.
+    """
+
+    def __init__(self, dim: int, path: Optional[Path] = None, count: int = 0):
+        self.dim = dim
+        self.path = path
+        self.count = count
+        self.matrix = self._map()
+
+    @property
+    def _row_bytes(self) -> int:
+        return self.dim * 4
+
+    def _map(self) -> np.ndarray:
+        if self.path is None or self.count == 0:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.memmap(self.path, dtype=np.float32, mode="r", shape=(self.count, self.dim))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def replace(self, batches) -> None:
+        """Rebuild the store from an iterable of row batches.
+
+        File-backed stores write a new file and rename it over the old one,
+        so readers holding the previous mapping keep a consistent view.
+        """
+        if self.path is None:
+            parts = [np.asarray(b, dtype=np.float32) for b in batches]
+            self.matrix = np.concatenate(parts) if parts else np.empty((0, self.dim), dtype=np.float32)
+            self.count = len(self.matrix)
+            return
+        count = 0
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            for batch in batches:
+                f.write(np.ascontiguousarray(batch, dtype=np.float32).tobytes())
+                count += len(batch)
+        os.replace(tmp_path, self.path)
+        self.count = count
+        self.matrix = self._map()
+
+    def append(self, vectors: np.ndarray) -> np.ndarray:
+        """Add rows at the end and return their row ids."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        rows = np.arange(self.count, self.count + len(vectors))
+        if self.path is None:
+            self.matrix = np.concatenate([self.matrix, vectors])
+        else:
+            with open(self.path, "r+b" if self.path.exists() else "wb") as f:
+                f.truncate(self.count * self._row_bytes)
+                f.seek(0, os.SEEK_END)
+                f.write(vectors.tobytes())
+        self.count += len(vectors)
+        if self.path is not None:
+            self.matrix = self._map()
+        return rows
+
+    def update(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """Overwrite existing *rows* in place."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if self.path is None:
+            self.matrix[rows] = vectors
+            return
+        with open(self.path, "r+b") as f:
+            for row, vector in zip(rows, vectors):
+                f.seek(int(row) * self._row_bytes)
+                f.write(vector.tobytes())
+
+
+class ExactIndex:
+    """Brute-force cosine search over every row of a VectorStore."""
+
+    kind = "exact"
+
+    def __init__(self, store: VectorStore):
+        self.store = store
+
+    def rebuild(self) -> Optional[np.ndarray]:
+        """Re-index every row; returns a row permutation if the store was reordered."""
+        return None
+
+    def add(self, rows: np.ndarray) -> Optional[np.ndarray]:
+        """Index new or rewritten *rows*; returns a permutation like rebuild()."""
+        return None
+
+    def search(self, query: np.ndarray, k: int = 5) -> List[Tuple[int, float]]:
+        """Return the top *k* (row, cosine) pairs for a unit *query*."""
+        if len(self.store) == 0 or k <= 0:
+            return []
+        scores = self.store.matrix @ query
+        return [(int(i), float(scores[i])) for i in _top_k(scores, k)]
+
+    def save(self, directory: Path) -> Dict:
+        return {"kind": self.kind}
+
+    @classmethod
+    def load(cls, store: VectorStore, directory: Path, config: Dict) -> "ExactIndex":
+        return cls(store)
+
+    def stats(self) -> Dict:
+        return {"kind": self.kind}
+
+
+class IVFIndex(ExactIndex):
+    """IVF-flat approximate cosine search.
+
+    Args:
+        store: Vectors to index
+        nlist: Number of k-means cells (0 = ``sqrt(rows)``, fixed at training)
+        nprobe: Cells scanned per query; the recall/latency knob
+        min_train: Below this many rows search stays exact and untrained
+        train_sample: Rows sampled per cell when training centroids
+        iterations: k-means iterations
+
+    Training reorders the store so every cell is one contiguous row range
+    (a probe is a slice, not a gather). Rows added later are assigned to the
+    nearest existing centroid and kept in small per-cell overflow lists;
+    once the store has doubled since training, the index retrains and
+    re-sorts.
+    """
+
+    kind = "ivf"
+
+    def __init__(
+        self,
+        store: VectorStore,
+        nlist: int = 0,
+        nprobe: int = 16,
+        min_train: int = 1024,
+        train_sample: int = 32,
+        iterations: int = 10,
+        seed: int = 0,
+    ):
+        super().__init__(store)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train = min_train
+        self.train_sample = train_sample
+        self.iterations = iterations
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self.offsets = np.zeros(1, dtype=np.int64)  # cell c = rows offsets[c]:offsets[c + 1]
+        self.assign = np.empty(0, dtype=np.int32)  # current cell of every row
+        self._overflow: Optional[List[np.ndarray]] = None
+
+    @property
+    def sorted_count(self) -> int:
+        """Rows in the cell-sorted section written at training time."""
+        return int(self.offsets[-1])
+
+    def rebuild(self) -> Optional[np.ndarray]:
+        """Retrain centroids and re-sort the store by cell.
+
+        Returns:
+            The applied row permutation (new row i was row ``order[i]``), or
+            None if the store is below ``min_train`` and stays untrained
+        """
+        self._overflow = None
+        if len(self.store) < self.min_train:
+            self.centroids = None
+            self.offsets = np.zeros(1, dtype=np.int64)
+            self.assign = np.empty(0, dtype=np.int32)
+            return None
+        self._train()
+        labels = self._nearest(self.store.matrix)
+        order = np.argsort(labels, kind="stable")
+        matrix = self.store.matrix
+        self.store.replace(np.asarray(matrix[order[i:i + 8192]]) for i in range(0, len(order), 8192))
+        self.assign = labels[order]
+        counts = np.bincount(self.assign, minlength=len(self.centroids))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return order
+
+    def add(self, rows: np.ndarray) -> Optional[np.ndarray]:
+        """Assign new or rewritten *rows* to cells; may retrain (see rebuild())."""
+        n = len(self.store)
+        if self.centroids is None or n > 2 * self.sorted_count:
+            return self.rebuild() if n >= self.min_train else None
+        if len(self.assign) < n:
+            self.assign = np.concatenate([self.assign, np.zeros(n - len(self.assign), dtype=np.int32)])
+        rows = np.asarray(rows, dtype=np.int64)
+        self.assign[rows] = self._nearest(self.store.matrix[rows])
+        self._overflow = None
+        return None
+
+    def _train(self) -> None:
+        matrix = self.store.matrix
+        n = len(matrix)
+        nlist = min(self.nlist or max(1, int(math.sqrt(n))), n)
+        rng = np.random.default_rng(self.seed)
+        sample_rows = np.sort(rng.choice(n, min(n, self.train_sample * nlist), replace=False))
+        sample = np.asarray(matrix[sample_rows])
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(self.iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            order = np.argsort(labels, kind="stable")
+            counts = np.bincount(labels, minlength=nlist)
+            filled = np.flatnonzero(counts)
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+            centroids[filled] = np.add.reduceat(sample[order], starts, axis=0)
+            empty = np.flatnonzero(counts == 0)
+            if len(empty):
+                centroids[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            np.divide(centroids, norms, out=centroids, where=norms > 0)
+        self.centroids = centroids.astype(np.float32)
+
+    def _nearest(self, vectors: np.ndarray, batch_size: int = 8192) -> np.ndarray:
+        """Return the nearest centroid of every row in *vectors*."""
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), batch_size):
+            chunk = np.asarray(vectors[start:start + batch_size])
+            labels[start:start + batch_size] = np.argmax(chunk @ self.centroids.T, axis=1)
+        return labels
+
+    def _overflow_lists(self) -> List[np.ndarray]:
+        """Per-cell rows living outside their cell's range: appended or moved."""
+        if self._overflow is None:
+            nlist = len(self.centroids)
+            home = np.repeat(np.arange(nlist, dtype=np.int32), np.diff(self.offsets))
+            moved = np.flatnonzero(self.assign[:self.sorted_count] != home)
+            rows = np.concatenate([moved, np.arange(self.sorted_count, len(self.assign))])
+            rows = rows[np.argsort(self.assign[rows], kind="stable")]
+            counts = np.bincount(self.assign[rows], minlength=nlist)
+            self._overflow = np.split(rows, np.cumsum(counts)[:-1])
+        return self._overflow
+
+    def search(self, query: np.ndarray, k: int = 5, nprobe: Optional[int] = None) -> List[Tuple[int, float]]:
+        if self.centroids is None:
+            return super().search(query, k)
+        if k <= 0:
+            return []
+        matrix = self.store.matrix
+        probe = _top_k(self.centroids @ query, min(nprobe or self.nprobe, len(self.centroids)))
+        ids, scores = [], []
+        for c in probe:
+            start, end = self.offsets[c], self.offsets[c + 1]
+            ids.append(np.arange(start, end))
+            scores.append(matrix[start:end] @ query)
+        extra = np.concatenate([self._overflow_lists()[c] for c in probe])
+        if len(extra):
+            ids.append(extra)
+            scores.append(matrix[extra] @ query)
+        ids, scores = np.concatenate(ids), np.concatenate(scores)
+        hits, seen = [], set()
+        # A moved row is scored in its old range and its new cell's overflow.
+        for i in _top_k(scores, k + len(extra)):
+            row = int(ids[i])
+            if row not in seen:
+                seen.add(row)
+                hits.append((row, float(scores[i])))
+                if len(hits) == k:
+                    break
+        return hits
+
+    def save(self, directory: Path) -> Dict:
+        if self.centroids is not None:
+            _replace_file(directory / "centroids.npy", lambda f: np.save(f, self.centroids))
+            _replace_file(directory / "offsets.npy", lambda f: np.save(f, self.offsets))
+            _replace_file(directory / "assign.npy", lambda f: np.save(f, self.assign))
+        return {
+            "kind": self.kind, "nlist": self.nlist, "nprobe": self.nprobe, "min_train": self.min_train,
+            "trained": self.centroids is not None,
+        }
+
+    @classmethod
+    def load(cls, store: VectorStore, directory: Path, config: Dict) -> "IVFIndex":
+        index = cls(store, nlist=config["nlist"], nprobe=config["nprobe"], min_train=config["min_train"])
+        if config["trained"]:
+            index.centroids = np.load(directory / "centroids.npy")
+            index.offsets = np.load(directory / "offsets.npy")
+            index.assign = np.load(directory / "assign.npy")[:len(store)]
+        return index
+
+    def stats(self) -> Dict:
+        return {
+            "kind": self.kind,
+            "trained": self.centroids is not None,
+            "nlist": 0 if self.centroids is None else len(self.centroids),
+            "nprobe": self.nprobe,
+            "overflow_rows": 0 if self.centroids is None else sum(map(len, self._overflow_lists())),
+        }
+
+
+ANN_INDEXES: Dict[str, Type[ExactIndex]] = {
+    ExactIndex.kind: ExactIndex,
+    IVFIndex.kind: IVFIndex,
+}
+
+
+def make_index(kind: str, store: VectorStore, **params) -> ExactIndex:
+    """Build an empty index by kind name.
+
+    Raises:
+        ValueError: If *kind* is not in ANN_INDEXES
+    """
+    try:
+        index_cls = ANN_INDEXES[kind]
+    except KeyError:
+        raise ValueError(f"Unknown vector index {kind!r}; expected one of {sorted(ANN_INDEXES)}") from None
+    return index_cls(store, **params)
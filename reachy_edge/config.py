@@ -28,10 +28,21 @@ class Settings(BaseSettings):
     embedding_model: str = "text-embedding-3-small"
     embedding_dimensions: int = 1536
 
-    # Retrieval Backend Configuration
-    l2_backend: str = "sqlite"  # sqlite | qdrant
+    # Retrieval Backend Configuration (cache.vector_backends.create_backend; the API serves L2Cache)
+    l2_backend: str = "sqlite"  # sqlite | qdrant | local | hybrid (FTS5 + local vectors, RRF)
     qdrant_url: str = "http://localhost:6333"
     qdrant_collection: str = "reachy_products"
+    vector_index_dir: str = "./data/vectors"  # local backend: memory-mapped embeddings
+    vector_embedder: str = "hashed"  # "hashed" (n-gram TF-IDF, no model) or "sentence-transformers"
+    vector_embedding_model: str = ""  # local model path/name for sentence-transformers
+    vector_embedding_dim: int = 1024  # hashed embedder width (4 KiB per product)
+    vector_index: str = "exact"  # "exact" (brute force) or "ivf" (approximate, for large catalogs)
+    vector_ivf_nlist: int = 0  # IVF cells; 0 = sqrt(catalog size)
+    vector_ivf_nprobe: int = 16  # IVF cells scanned per query: higher = better recall, slower
+    hybrid_budget_ms: float = 50.0  # a retrieval leg slower than this is left out of the fusion
+    hybrid_rrf_k: int = 60  # reciprocal rank fusion constant: higher flattens rank differences
+    hybrid_weights: dict[str, float] = {}  # per-leg RRF weights: {"keyword": 1.0, "vector": 1.0}
+    hybrid_leg_workers: int = 4  # threads per retrieval leg, i.e. concurrent hybrid queries served
 
     # Second Brain Integration
     backend_url: str = "https://brain.example.com"
@@ -42,8 +53,21 @@ class Settings(BaseSettings):
     
     # Cache Configuration
     l2_db_path: str = "./data/cache.db"
+    l2_read_workers: int = 4  # threads serving async L2 reads, one connection each
+    l2_sqlite_profile: str = "read_heavy"  # connection PRAGMAs: "read_heavy" (WAL, mmap) or "default"
+    l2_ranking_profile: str = "name_first"  # BM25 column weights: "name_first", "flat" or a custom profile
+    l2_ranking_profiles: dict[str, dict[str, float]] = {}  # custom profiles: name -> {fts column: weight}
     l1_ttl_seconds: int = 300
     l1_max_size: int = 1000
+    l1_shards: int = 1  # >1 enables lock-striped L1 segments
+    l1_max_bytes: int | None = None  # byte budget; replaces the entry-count limit when set
+    l1_hard_ttl_seconds: int | None = None  # > l1_ttl_seconds enables stale-while-revalidate
+    l1_sweep_interval_s: float = 30.0
+    l1_sweep_batch_size: int = 256
+    response_cache_size: int = 500  # pre-rendered /interact bodies; 0 disables
+    l1_snapshot_enabled: bool = True  # persist hot L1 keys next to l2_db_path
+    l1_snapshot_max_keys: int = 200
+    l1_preload_top_n: int = 50  # most-asked product searches warmed into L1
     
     # Performance Tuning
     max_response_words: int = 35
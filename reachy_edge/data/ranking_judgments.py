@@ -0,0 +1,54 @@
+"""Labeled kiosk queries for offline ranking evaluation.
+
+Each entry maps a customer query to graded relevance judgments over the
+sample catalog (see sample_products.py): 3 = the product asked for,
+2 = a close alternative, 1 = acceptable. Unlisted SKUs count as 0.
+"""
+from typing import Dict, List, Tuple
+
+RANKING_JUDGMENTS: List[Tuple[str, Dict[str, int]]] = [
+    ("diesel", {"FUEL-DIESEL-001": 3, "FUEL-DEF-001": 1, "FUEL-HEET-002": 1}),
+    ("diesel exhaust fluid", {"FUEL-DEF-001": 3}),
+    ("motor oil", {"FUEL-OIL-015": 3}),
+    ("antifreeze", {"FUEL-COOL-003": 3}),
+    ("coolant", {"FUEL-COOL-003": 3}),
+    ("washer fluid", {"FUEL-WASH-007": 3, "FUEL-DEF-001": 1}),
+    ("fuel treatment", {"FUEL-HEET-002": 3, "FUEL-DIESEL-001": 1}),
+    ("truck wash", {"SERV-WASH-003": 3, "FUEL-WASH-007": 1}),
+    ("logbook", {"TRUCK-LOG-101": 3}),
+    ("tie down straps", {"TRUCK-STRAP-205": 3, "TRUCK-BUNGEE-303": 1}),
+    ("bungee cords", {"TRUCK-BUNGEE-303": 3, "TRUCK-STRAP-205": 1}),
+    ("work gloves", {"TRUCK-GLOVE-505": 3}),
+    ("tarp", {"TRUCK-TARP-606": 3}),
+    ("tire chains", {"TRUCK-CHAIN-707": 3}),
+    ("cb radio", {"ELECT-CB-105": 3}),
+    ("truck gps", {"ELECT-GPS-206": 3}),
+    ("dash cam", {"ELECT-DASH-307": 3}),
+    ("phone charger", {"ELECT-CHARGE-408": 3}),
+    ("bluetooth", {"ELECT-HEAD-509": 3, "ELECT-CB-105": 2}),
+    ("bluetooth headset", {"ELECT-HEAD-509": 3}),
+    ("coffee", {"SNACK-COFFEE-301": 3}),
+    ("energy drink", {"SNACK-REDBULL-402": 3, "SNACK-5HOUR-008": 2, "SNACK-BAR-705": 1}),
+    ("energy bars", {"SNACK-BAR-705": 3, "SNACK-TRAIL-806": 1}),
+    ("beef jerky", {"SNACK-JERKY-503": 3}),
+    ("nuts", {"SNACK-NUTS-604": 3, "SNACK-TRAIL-806": 2}),
+    ("water", {"SNACK-WATER-907": 3}),
+    ("pizza", {"FOOD-PIZZA-201": 3}),
+    ("chicken", {"FOOD-CHICKEN-403": 3}),
+    ("breakfast", {"FOOD-BREAK-504": 3}),
+    ("hot dog", {"FOOD-HOT-605": 3}),
+    ("shower", {"SERV-SHOWER-001": 3}),
+    ("laundry", {"SERV-LAUNDRY-002": 3}),
+    ("parking", {"SERV-PARK-004": 3}),
+    ("flashlight", {"SAFE-FLASH-303": 3, "SAFE-LED-101": 1}),
+    ("road flares", {"SAFE-LED-101": 3}),
+    ("led", {"SAFE-LED-101": 3, "SAFE-FLASH-303": 3}),
+    ("safety vest", {"SAFE-VEST-202": 3}),
+    ("first aid", {"SAFE-FIRST-404": 3}),
+    ("emergency kit", {"SAFE-FIRST-404": 3, "SAFE-LED-101": 1}),
+    ("sunglasses", {"CONV-SUNGL-501": 3}),
+    ("wipes", {"CONV-WIPES-602": 3}),
+    ("pain reliever", {"CONV-ASPIRIN-703": 3}),
+    ("toothbrush", {"CONV-TOOTH-804": 3}),
+    ("drivers", {"TRUCK-LOG-101": 2, "ELECT-HEAD-509": 2, "TRUCK-GLOVE-505": 1}),
+]
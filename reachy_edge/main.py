@@ -14,7 +14,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from .config import settings
-from .cache import L1Cache, L2Cache, CacheSyncPayload
+from .cache import L1Cache, L2Cache, CacheSyncPayload, DeltaBaseMismatch, ResponseCache
+from .cache.query import canonicalize_query, product_code
+from .cache.snapshot import load_l1_snapshot, save_l1_snapshot, snapshot_path
 from .fsm import InteractionStateMachine
 from .brain_client import EventEmitter
 from .tools import (
@@ -25,7 +27,7 @@ from .tools import (
     MovementTool
 )
 from .llm import PromptManager, LLMInference
-from .models import HealthResponse, InteractionRequest, InteractionResponse
+from .models import HealthResponse, InteractionRequest, InteractionResponse, EventType
 from .mind import mind_bus, MindEvent, EVENT_REQUEST, EVENT_RESPONSE, EVENT_ERROR
 from .mind.routes import router as mind_router
 from .api.routes import router as api_router
@@ -47,8 +49,23 @@ async def lifespan(app: FastAPI):
     """Manage application lifecycle."""
     logger.info("starting_reachy_edge")
 
-    app.state.l2_cache = L2Cache(settings.l2_db_path)
-    app.state.l1_cache = L1Cache(max_size=settings.l1_max_size, ttl_seconds=settings.l1_ttl_seconds)
+    app.state.l2_cache = L2Cache(
+        settings.l2_db_path,
+        read_workers=settings.l2_read_workers,
+        profile=settings.l2_sqlite_profile,
+        ranking=settings.l2_ranking_profiles.get(settings.l2_ranking_profile, settings.l2_ranking_profile),
+    )
+    app.state.l1_cache = L1Cache(
+        max_size=settings.l1_max_size,
+        ttl_seconds=settings.l1_ttl_seconds,
+        shards=settings.l1_shards,
+        max_bytes=settings.l1_max_bytes,
+        hard_ttl_seconds=settings.l1_hard_ttl_seconds,
+    )
+    app.state.response_cache = ResponseCache(
+        max_size=settings.response_cache_size,
+        ttl_seconds=settings.l1_ttl_seconds,
+    )
     app.state.event_emitter = EventEmitter()
     app.state.llm = LLMInference(
         mode=settings.llm_mode,
@@ -78,11 +95,19 @@ async def lifespan(app: FastAPI):
         )
         for p in sample
     ]
-    await app.state.l2_cache.update_products(cache_products)
+    # The seed replaces any synced catalog, so reset the version with it;
+    # otherwise a delta against the old catalog's version would be accepted.
+    await app.state.l2_cache.update_products(cache_products, version="v0")
     logger.info("sample_products_loaded", count=len(sample))
 
-    await app.state.l2_cache.preload_hot_data(app.state.l1_cache)
+    await app.state.l2_cache.preload_hot_data(app.state.l1_cache, top_n=settings.l1_preload_top_n)
+    if settings.l1_snapshot_enabled:
+        load_l1_snapshot(app.state.l1_cache, app.state.l2_cache, snapshot_path(settings.l2_db_path))
     asyncio.create_task(app.state.event_emitter.worker())
+    l1_sweeper = asyncio.create_task(app.state.l1_cache.sweeper(
+        interval_s=settings.l1_sweep_interval_s,
+        batch_size=settings.l1_sweep_batch_size,
+    ))
 
     app.state._start_time = time.time()
     mind_bus.publish_sync(MindEvent(type="startup", data={
@@ -103,6 +128,23 @@ async def lifespan(app: FastAPI):
 
     logger.info("shutting_down_reachy_edge")
     mind_bus.publish_sync(MindEvent(type="shutdown", data={}))
+    if settings.l1_snapshot_enabled:
+        try:
+            save_l1_snapshot(
+                app.state.l1_cache,
+                app.state.l2_cache,
+                snapshot_path(settings.l2_db_path),
+                max_keys=settings.l1_snapshot_max_keys,
+            )
+        except Exception as exc:
+            logger.error("l1_snapshot_save_failed", error=str(exc))
+    try:
+        await app.state.l2_cache.flush_query_counts()
+    except Exception as exc:
+        logger.error("query_counts_flush_failed", error=str(exc))
+    app.state.l1_cache.stop_sweeper()
+    l1_sweeper.cancel()
+    app.state.l2_cache.close()
     app.state.event_emitter.stop()
     await app.state.event_emitter.flush()
 
@@ -197,12 +239,14 @@ async def get_health() -> dict[str, Any]:
     timestamp = datetime.now(timezone.utc)
     l1 = getattr(app.state, "l1_cache", None)
     l2 = getattr(app.state, "l2_cache", None)
+    response_cache = getattr(app.state, "response_cache", None)
     emitter = getattr(app.state, "event_emitter", None)
     llm = getattr(app.state, "llm", None)
 
     details = {
         "l1": l1.stats() if l1 else {"status": "not_initialized"},
         "l2": l2.stats() if l2 else {"status": "not_initialized"},
+        "response_cache": response_cache.stats() if response_cache else {"status": "not_initialized"},
         "event_emitter": emitter.stats() if emitter else {"status": "not_initialized"},
         "llm": llm.get_stats() if llm else {"status": "not_initialized"},
         "models": {
@@ -220,16 +264,48 @@ async def get_health() -> dict[str, Any]:
     }
 
 
+# Intents whose answers depend only on the query and the synced catalog, so a
+# rendered response can be replayed until the next /cache/sync.
+_CACHEABLE_INTENTS = {"product_lookup"}
+
+
 @app.post("/interact", response_model=InteractionResponse)
 async def interact(request: InteractionRequest) -> InteractionResponse:
     """Main interaction endpoint (Story 1.5 + Epic 2 core flow)."""
     start = time.time()
+    intent = _classify_intent(request.query)
+
+    # Pre-rendered response fast path: skips tools, pydantic and JSON encoding
+    response_cache: ResponseCache = app.state.response_cache
+    response_key = ResponseCache.key(request.query, intent, app.state.l2_cache.version)
+    latency_ms = (time.time() - start) * 1000
+    body = response_cache.render(response_key, latency_ms=latency_ms)
+    if body is not None:
+        if intent == "product_lookup" and not product_code(request.query):
+            # Count it as ProductLookupTool would have, or the most replayed
+            # questions would be the most undercounted in hot-query preload
+            app.state.l2_cache.record_query(canonicalize_query(request.query))
+        mind_bus.publish_sync(MindEvent(
+            type="cache_hit",
+            data={"query": request.query, "intent": intent, "tier": "response",
+                  "latency_ms": round(latency_ms, 2)},
+        ))
+        await app.state.event_emitter.emit({
+            "event_type": EventType.CACHE_HIT,
+            "query": request.query,
+            "tool_used": _intent_to_tool(intent),
+            "latency_ms": latency_ms,
+            "reachy_id": settings.reachy_id,
+            "store_id": settings.store_id,
+            "zone_id": settings.zone_id,
+        })
+        return Response(content=body, media_type="application/json")
+
     deps = _get_tool_deps()
     fsm: InteractionStateMachine = app.state.fsm
 
     try:
         fsm.begin()
-        intent = _classify_intent(request.query)
         tool_name = _intent_to_tool(intent)
         tool = app.state.tools[tool_name]
 
@@ -271,7 +347,7 @@ async def interact(request: InteractionRequest) -> InteractionResponse:
             "result_count": (result.data or {}).get("result_count", 0),
         }
 
-        return InteractionResponse(
+        response = InteractionResponse(
             response=result.data["response"],
             intent=intent,
             tool_used=tool_name,
@@ -279,6 +355,9 @@ async def interact(request: InteractionRequest) -> InteractionResponse:
             cache_hit=cache_hit,
             metadata=metadata,
         )
+        if intent in _CACHEABLE_INTENTS:
+            response_cache.store(response_key, response)
+        return response
     except Exception as exc:
         logger.error("interaction_error", error=str(exc), exc_info=True)
         raise HTTPException(status_code=500, detail=str(exc))
@@ -289,23 +368,43 @@ async def interact(request: InteractionRequest) -> InteractionResponse:
 @app.post("/cache/sync")
 @app.post("/cache/apply")
 async def apply_cache(payload: CacheSyncPayload) -> dict[str, Any]:
-    """Receive cache updates from the Second Brain and apply them to local caches."""
+    """Receive cache updates from the Second Brain and apply them to local caches.
+
+    A payload with ``base_version`` is applied as a delta (only the listed
+    SKUs change) and is rejected with 409 if the catalog has moved on.
+    """
     try:
-        if payload.products:
-            await app.state.l2_cache.update_products(payload.products)
+        products_updated = 0
+        if payload.is_delta:
+            products_updated = await app.state.l2_cache.apply_delta(
+                payload.upserted or [],
+                payload.deleted_skus or [],
+                base_version=payload.base_version,
+                version=payload.version,
+            )
+        elif payload.products:
+            await app.state.l2_cache.update_products(payload.products, version=payload.version)
+            products_updated = len(payload.products)
+        else:
+            await app.state.l2_cache.set_version(payload.version)
         if payload.promos:
             await app.state.l2_cache.update_promos(payload.promos)
-
-        await app.state.l2_cache.set_version(payload.version)
         app.state.l1_cache.invalidate()
-        await app.state.l2_cache.preload_hot_data(app.state.l1_cache)
+        app.state.response_cache.invalidate()
+        await app.state.l2_cache.preload_hot_data(app.state.l1_cache, top_n=settings.l1_preload_top_n)
 
         return {
             "status": "synced",
             "version": payload.version,
-            "products_updated": len(payload.products) if payload.products else 0,
+            "generation": app.state.l2_cache.generation,
+            "mode": "delta" if payload.is_delta else "full",
+            "products_updated": products_updated,
             "promos_updated": len(payload.promos) if payload.promos else 0,
         }
+    except DeltaBaseMismatch as exc:
+        logger.warning("cache_sync_base_mismatch", base_version=exc.base_version,
+                       current_version=exc.current_version)
+        raise HTTPException(status_code=409, detail=str(exc))
     except Exception as exc:
         logger.error("cache_sync_error", error=str(exc), exc_info=True)
         raise HTTPException(status_code=500, detail=str(exc))
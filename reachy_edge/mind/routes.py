@@ -4,7 +4,8 @@ Mounts under /mind on the FastAPI app:
   GET /mind          → HTML dashboard
   GET /mind/events   → SSE event stream (real-time)
   GET /mind/state    → JSON snapshot (initial load)
-  GET /mind/products → Product catalog browser
+  GET /mind/products → Product catalog browser (cursor-paginated)
+  GET /mind/products/export → Full catalog as streamed NDJSON
   POST /mind/signal  → Receive forwarded Karen Whisperer signals
 """
 from __future__ import annotations
@@ -14,7 +15,7 @@ from pathlib import Path
 from typing import Any, Dict
 
 import structlog
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Query, Request
 from fastapi.responses import HTMLResponse, StreamingResponse
 
 from . import MindEvent, mind_bus, EVENT_SIGNAL
@@ -76,16 +77,27 @@ async def mind_state(request: Request) -> Dict[str, Any]:
 # ---------------------------------------------------------------------------
 
 @router.get("/products")
-async def mind_products(request: Request, q: str = "", limit: int = 20):
-    """Search the product catalog (or list all if no query)."""
+async def mind_products(
+    request: Request,
+    q: str = "",
+    limit: int = Query(20, ge=1, le=500),
+    cursor: str | None = None,
+):
+    """Search the product catalog, or page through all of it if no query.
+
+    Listing is keyset-paginated by SKU: pass the returned ``next_cursor``
+    as ``cursor`` to get the following page. ``count`` is the number of
+    products in this response, ``total`` the size of the whole catalog.
+    """
     l2 = getattr(request.app.state, "l2_cache", None)
     if l2 is None:
-        return {"products": [], "total": 0}
+        return {"products": [], "count": 0, "total": 0, "next_cursor": None}
 
+    next_cursor = None
     if q.strip():
         results = await l2.search_products(q, max_results=limit)
     else:
-        results = await l2.get_all_products(limit=limit)
+        results, next_cursor = await l2.list_products(cursor, limit)
 
     return {
         "products": [
@@ -99,11 +111,39 @@ async def mind_products(request: Request, q: str = "", limit: int = 20):
             }
             for p in results
         ],
-        "total": len(results),
+        "count": len(results),
+        "total": l2.stats()["product_count"],
         "query": q,
+        "next_cursor": next_cursor,
     }
 
 
+@router.get("/products/export")
+async def mind_products_export(request: Request, batch_size: int = Query(500, ge=1, le=5000)):
+    """Stream the whole catalog as NDJSON, one product per line, in SKU order.
+
+    Rows are read in keyset batches and written as they arrive, so memory
+    use does not grow with the catalog.
+    """
+    l2 = getattr(request.app.state, "l2_cache", None)
+
+    async def ndjson():
+        if l2 is None:
+            return
+        lines = []
+        async for record in l2.iter_products(batch_size=batch_size):
+            row = record._asdict()
+            del row["relevance_score"]
+            lines.append(json.dumps(row, separators=(",", ":")))
+            if len(lines) >= batch_size:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
 # ---------------------------------------------------------------------------
 # Signal ingestion (from Karen Whisperer)
 # ---------------------------------------------------------------------------
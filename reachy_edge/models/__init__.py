@@ -43,6 +43,8 @@ class Product(BaseModel):
         location: Physical location in store (e.g., "Aisle 2", "Fuel Island 3")
         price: Product price in USD
         description: Full product description with keywords
+        upc: UPC-A barcode (optional)
+        ean: EAN-13 barcode (optional)
         relevance_score: Search relevance score from FTS5 BM25 ranking (optional)
     """
     sku: str = Field(..., description="Unique product SKU")
@@ -51,6 +53,8 @@ class Product(BaseModel):
     location: str = Field(..., description="Store location")
     price: float = Field(..., ge=0, description="Price in USD")
     description: str = Field(..., description="Product description")
+    upc: Optional[str] = Field(default=None, description="UPC-A barcode")
+    ean: Optional[str] = Field(default=None, description="EAN-13 barcode")
     relevance_score: Optional[float] = Field(default=None, description="FTS5 search relevance score")
     
     model_config = {
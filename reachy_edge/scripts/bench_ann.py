@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Benchmark IVF-flat ANN search against exact cosine search.
+
+Builds a synthetic catalog (default 100k products: 200 categories with
+their own vocabulary, random brands and attributes), embeds it with the
+hashed n-gram embedder, then for each ``--nprobe`` value reports recall@k
+against the exact top-k, how often the exact top hit is returned first
+(top-1) and per-query latency. Queries are product names
+with one word dropped, so they are close to, but not copies of, a row.
+
+Usage:
+    python scripts/bench_ann.py [--products N] [--queries N] [--k N] [--nlist N] [--nprobe 1,4,16,64]
+"""
+import sys
+import argparse
+import logging
+import random
+import statistics
+import time
+from pathlib import Path
+
+import structlog
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from reachy_edge.cache.embeddings import HashedNgramEmbedder
+from reachy_edge.cache.vector_index import ExactIndex, IVFIndex, VectorStore
+
+SYLLABLES = ["ka", "lo", "mi", "ter", "van", "su", "rex", "do", "pli", "gor", "nu", "bra", "sel", "ti", "mon"]
+
+
+def make_texts(count: int, seed: int = 0) -> list[str]:
+    """Build *count* synthetic product texts with category-level vocabulary."""
+    rng = random.Random(seed)
+
+    def word() -> str:
+        return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3)))
+
+    categories = [[word() for _ in range(12)] for _ in range(200)]
+    brands = [word() for _ in range(500)]
+    texts = []
+    for i in range(count):
+        vocab = categories[i % len(categories)]
+        words = [rng.choice(brands)] + rng.sample(vocab, 3) + [word()]
+        texts.append(f"SKU-{i:07d} " + " ".join(words))
+    return texts
+
+
+def timed_search(index, queries, k: int, **kwargs) -> tuple[list[list[int]], list[float]]:
+    """Run every query and return (row ids per query, latencies in ms)."""
+    results, latencies = [], []
+    for q in queries:
+        start = time.perf_counter()
+        hits = index.search(q, k, **kwargs)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append([row for row, _ in hits])
+    return results, latencies
+
+
+def main():
+    """Build exact and IVF indexes and print a recall/latency table."""
+    parser = argparse.ArgumentParser(description="Benchmark IVF ANN search vs exact search")
+    parser.add_argument("--products", type=int, default=100_000, help="Catalog size (default: 100000)")
+    parser.add_argument("--queries", type=int, default=500, help="Queries to run (default: 500)")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per query (default: 10)")
+    parser.add_argument("--dim", type=int, default=1024, help="Embedding width (default: 1024)")
+    parser.add_argument("--nlist", type=int, default=0, help="IVF cells (default: sqrt(products))")
+    parser.add_argument("--nprobe", default="1,4,8,16,32,64",
+                        help="Comma-separated nprobe values to sweep (default: 1,4,8,16,32,64)")
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    texts = make_texts(args.products)
+    embedder = HashedNgramEmbedder(dim=args.dim)
+    start = time.perf_counter()
+    embedder.fit(texts)
+    store = VectorStore(args.dim)
+    store.replace(embedder.embed(texts[i:i + 4096]) for i in range(0, len(texts), 4096))
+    print(f"catalog: {args.products} products, dim {args.dim}, embedded in {time.perf_counter() - start:.1f}s")
+
+    rng = random.Random(1)
+    query_texts = []
+    for text in rng.sample(texts, min(args.queries, len(texts))):
+        words = text.split()[1:]
+        words.pop(rng.randrange(len(words)))
+        query_texts.append(" ".join(words))
+    queries = embedder.embed(query_texts)
+
+    # Training re-sorts the store by cell, so build IVF before taking exact row ids.
+    ivf = IVFIndex(store, nlist=args.nlist)
+    start = time.perf_counter()
+    ivf.rebuild()
+    print(f"ivf: nlist {ivf.stats()['nlist']}, trained and sorted in {time.perf_counter() - start:.1f}s")
+
+    exact, exact_ms = timed_search(ExactIndex(store), queries, args.k)
+    print(f"{'index':>10}  {'recall@' + str(args.k):>9}  {'top-1':>6}  {'p50 ms':>8}  {'p99 ms':>8}")
+    print(f"{'exact':>10}  {1.0:>9.3f}  {1.0:>6.3f}  {statistics.median(exact_ms):>8.2f}  "
+          f"{statistics.quantiles(exact_ms, n=100)[98]:>8.2f}")
+    for nprobe in (int(n) for n in args.nprobe.split(",")):
+        approx, approx_ms = timed_search(ivf, queries, args.k, nprobe=nprobe)
+        recall = statistics.fmean(
+            len(set(a) & set(e)) / len(e) for a, e in zip(approx, exact) if e
+        )
+        top1 = statistics.fmean(bool(a) and a[0] == e[0] for a, e in zip(approx, exact) if e)
+        print(f"{'nprobe=' + str(nprobe):>10}  {recall:>9.3f}  {top1:>6.3f}  {statistics.median(approx_ms):>8.2f}  "
+              f"{statistics.quantiles(approx_ms, n=100)[98]:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
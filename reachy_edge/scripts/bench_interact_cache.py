@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Benchmark /interact latency with and without the pre-rendered response cache.
+
+Replays a set of common kiosk questions through the ``interact`` handler
+(app lifespan included, HTTP transport excluded) and prints p50/p99 latency
+for the tool pipeline (response cache disabled, model serialized to JSON as
+FastAPI would) and for pre-rendered hits.
+
+Usage:
+    python scripts/bench_interact_cache.py [--rounds N]
+"""
+import sys
+import argparse
+import asyncio
+import statistics
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from fastapi import Response
+
+from reachy_edge.cache import ResponseCache
+from reachy_edge.main import app, interact, lifespan
+from reachy_edge.models import InteractionRequest
+
+QUESTIONS = [
+    "Where is diesel?", "where can I find coffee", "Do you have energy drinks?",
+    "where is the beef jerky", "I need a phone charger", "where are the showers",
+    "Where is DEF?", "do you sell CB radios", "where is the water", "sunglasses?",
+]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Return the *pct* percentile of *samples*."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def replay(rounds: int) -> list[float]:
+    """Send every question *rounds* times and return latencies in ms."""
+    requests = [InteractionRequest(query=q, session_id="bench") for q in QUESTIONS]
+    latencies = []
+    for _ in range(rounds):
+        for request in requests:
+            start = time.perf_counter()
+            result = await interact(request)
+            if not isinstance(result, Response):
+                result.model_dump_json()  # Serialization FastAPI performs on the model
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def run(rounds: int) -> tuple[list[float], list[float]]:
+    """Measure the tool pipeline, then pre-rendered hits."""
+    async with lifespan(app):
+        app.state.response_cache = ResponseCache(max_size=0)
+        await replay(1)  # Warm L1 so both modes start from a hot product cache
+        pipeline = await replay(rounds)
+
+        app.state.response_cache = ResponseCache(max_size=500)
+        await replay(1)  # Render each response once
+        prerendered = await replay(rounds)
+    return pipeline, prerendered
+
+
+def main():
+    """Run both modes and print a latency table."""
+    parser = argparse.ArgumentParser(description="Benchmark the /interact response cache")
+    parser.add_argument("--rounds", type=int, default=200,
+                        help="Times each question is replayed per mode (default: 200)")
+    args = parser.parse_args()
+
+    pipeline, prerendered = asyncio.run(run(args.rounds))
+
+    print(f"{'mode':>14}  {'p50 ms':>8}  {'p99 ms':>8}  {'mean ms':>8}")
+    for label, samples in (("tool pipeline", pipeline), ("pre-rendered", prerendered)):
+        print(
+            f"{label:>14}  {percentile(samples, 50):>8.3f}  "
+            f"{percentile(samples, 99):>8.3f}  {statistics.mean(samples):>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
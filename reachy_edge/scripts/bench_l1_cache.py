@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Microbenchmark for L1 cache set() cost as the cache grows.
+
+Fills an L1Cache to capacity and then measures the per-call cost of
+``set()`` with fresh keys, which forces one LRU eviction per insert.
+With an O(1) LRU the cost should stay flat from 1k to 1M entries.
+
+Usage:
+    python scripts/bench_l1_cache.py [--sizes 1000,10000,100000,1000000] [--ops N]
+"""
+import sys
+import argparse
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from reachy_edge.cache.l1_cache import L1Cache
+
+
+def bench_set_at_capacity(max_size: int, ops: int) -> float:
+    """Return mean nanoseconds per ``set()`` on a full cache."""
+    cache = L1Cache(max_size=max_size, ttl_seconds=3600)
+    for i in range(max_size):
+        cache.set(f"warm:{i}", i)
+
+    start = time.perf_counter_ns()
+    for i in range(ops):
+        cache.set(f"new:{i}", i)
+    elapsed = time.perf_counter_ns() - start
+    return elapsed / ops
+
+
+def main():
+    """Run the benchmark across cache sizes and print a table."""
+    parser = argparse.ArgumentParser(description="Benchmark L1Cache.set() at capacity")
+    parser.add_argument(
+        "--sizes",
+        type=str,
+        default="1000,10000,100000,1000000",
+        help="Comma-separated cache sizes (default: 1000,10000,100000,1000000)"
+    )
+    parser.add_argument(
+        "--ops",
+        type=int,
+        default=100_000,
+        help="Number of set() calls measured per size (default: 100000)"
+    )
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    print(f"{'max_size':>10}  {'ns/set':>10}")
+    for size in sizes:
+        ns = bench_set_at_capacity(size, args.ops)
+        print(f"{size:>10}  {ns:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
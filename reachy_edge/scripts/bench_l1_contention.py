@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Contention benchmark for single-lock vs sharded L1 cache.
+
+Runs N threads that hammer ``get``/``set`` on a shared L1Cache and reports
+total throughput for an increasing thread count, once with a single lock
+and once with lock-striped shards.
+
+Note: on a GIL build of CPython pure-Python work cannot run in parallel, so
+sharding mostly removes lock hand-off stalls; near-linear scaling needs a
+free-threaded interpreter (python3.13t and newer).
+
+Usage:
+    python scripts/bench_l1_contention.py [--threads 1,2,4,8,16,32] [--shards 16] [--ops N]
+"""
+import sys
+import argparse
+import random
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from reachy_edge.cache.l1_cache import L1Cache
+
+
+def run(cache: L1Cache, threads: int, ops: int, keyspace: int) -> float:
+    """Return aggregate operations per second across *threads* workers."""
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(seed: int) -> None:
+        rng = random.Random(seed)
+        keys = [f"product:{rng.randrange(keyspace)}" for _ in range(ops)]
+        barrier.wait()
+        for i, key in enumerate(keys):
+            if i % 4 == 0:
+                cache.set(key, i)
+            else:
+                cache.get(key)
+
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    return threads * ops / elapsed
+
+
+def main():
+    """Compare single-lock and sharded throughput across thread counts."""
+    parser = argparse.ArgumentParser(description="Benchmark L1Cache lock contention")
+    parser.add_argument("--threads", type=str, default="1,2,4,8,16,32",
+                        help="Comma-separated thread counts (default: 1,2,4,8,16,32)")
+    parser.add_argument("--shards", type=int, default=16,
+                        help="Shard count for the striped cache (default: 16)")
+    parser.add_argument("--ops", type=int, default=50_000,
+                        help="Operations per thread (default: 50000)")
+    parser.add_argument("--keyspace", type=int, default=5_000,
+                        help="Distinct keys (default: 5000)")
+    args = parser.parse_args()
+
+    counts = [int(t) for t in args.threads.split(",") if t.strip()]
+
+    print(f"{'threads':>8}  {'1 shard ops/s':>14}  {f'{args.shards} shards ops/s':>16}")
+    for n in counts:
+        single = run(L1Cache(max_size=1000, ttl_seconds=3600), n, args.ops, args.keyspace)
+        striped = run(
+            L1Cache(max_size=1000, ttl_seconds=3600, shards=args.shards),
+            n, args.ops, args.keyspace,
+        )
+        print(f"{n:>8}  {single:>14,.0f}  {striped:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
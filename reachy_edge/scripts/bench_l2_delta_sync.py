@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Benchmark full catalog replacement against an incremental delta sync.
+
+Builds a synthetic catalog, then times a full ``replace_products`` swap and
+a series of small ``apply_delta`` calls (a few repriced SKUs each) on the
+same database.
+
+Usage:
+    python scripts/bench_l2_delta_sync.py [--products N] [--changes N] [--rounds N]
+"""
+import sys
+import argparse
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import structlog
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from reachy_edge.cache.l2_cache import ProductCache
+from reachy_edge.models import Product
+
+
+def make_product(i: int, price: float) -> Product:
+    """Build synthetic product number *i*."""
+    return Product(
+        sku=f"SKU-{i:06d}",
+        name=f"Product {i}",
+        category=f"Category {i % 40}",
+        location=f"Aisle {i % 12}",
+        price=price,
+        description=f"Synthetic catalog item number {i}",
+    )
+
+
+def main():
+    """Time one full swap and several deltas, then print a summary."""
+    parser = argparse.ArgumentParser(description="Benchmark full vs delta catalog sync")
+    parser.add_argument("--products", type=int, default=100_000,
+                        help="Catalog size (default: 100000)")
+    parser.add_argument("--changes", type=int, default=3,
+                        help="SKUs repriced per delta (default: 3)")
+    parser.add_argument("--rounds", type=int, default=50,
+                        help="Number of deltas to time (default: 50)")
+    parser.add_argument("--profile", default="read_heavy",
+                        help="SQLite connection profile (default: read_heavy)")
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    catalog = [make_product(i, 1.0) for i in range(args.products)]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = ProductCache(str(Path(tmpdir) / "bench.db"), profile=args.profile)
+        cache.initialize()
+        cache.replace_products(catalog)
+        cache.set_meta("version", "r0")
+
+        start = time.perf_counter()
+        cache.replace_products(catalog)
+        full_ms = (time.perf_counter() - start) * 1000
+
+        delta_ms = []
+        for r in range(args.rounds):
+            changed = [
+                make_product((r * 7919 + k * 104729) % args.products, 2.0 + r)
+                for k in range(args.changes)
+            ]
+            start = time.perf_counter()
+            cache.apply_delta(changed, [], base_version=f"r{r}", version=f"r{r + 1}")
+            delta_ms.append((time.perf_counter() - start) * 1000)
+        cache.close()
+
+    print(f"catalog: {args.products} SKUs, {args.changes} changed per delta, profile={args.profile}")
+    print(f"{'full swap':>12}  {full_ms:>10.2f} ms")
+    print(f"{'delta p50':>12}  {statistics.median(delta_ms):>10.2f} ms")
+    print(f"{'delta max':>12}  {max(delta_ms):>10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Benchmark L2 search latency while a catalog sync is writing.
+
+For each SQLite connection profile, a writer thread repeatedly rewrites the
+catalog while reader threads run FTS5 searches on their own connections.
+Prints reader throughput and p50/p99 latency, plus how many searches failed
+with ``database is locked``.
+
+Writers (``--writer``):
+
+- rewrite: deletes and re-inserts every row of the live table in one
+  transaction, like a delta sync touching the whole catalog. Readers
+  contend with a long write transaction, which is what the WAL profile is
+  for.
+- swap: ProductCache.replace_products, as a full ``/cache/sync`` does. The
+  new generation is built in side tables and swapped in by a short
+  transaction, so profiles differ much less.
+
+Usage:
+    python scripts/bench_l2_read_during_write.py [--products N] [--readers N] [--seconds S] [--writer rewrite|swap]
+"""
+import sys
+import argparse
+import logging
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import structlog
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from reachy_edge.cache.l2_cache import CONNECTION_PROFILES, ProductCache
+from reachy_edge.models import Product
+
+QUERIES = ["diesel", "coffee", "charger", "jerky", "water", "radio", "oil", "snack"]
+
+
+def make_products(count: int) -> list[Product]:
+    """Build a synthetic catalog of *count* products."""
+    return [
+        Product(
+            sku=f"SKU-{i:06d}",
+            name=f"{QUERIES[i % len(QUERIES)]} item {i}",
+            category=f"Category {i % 20}",
+            location=f"Aisle {i % 12}",
+            price=float(i % 50) + 0.99,
+            description=f"Synthetic {QUERIES[(i * 7) % len(QUERIES)]} product number {i}",
+        )
+        for i in range(count)
+    ]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Return the *pct* percentile of *samples*."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_profile(profile: str, products: list[Product], readers: int, seconds: float,
+                writer_mode: str = "rewrite") -> dict:
+    """Measure reader latency under a concurrent writer for one profile."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = str(Path(tmpdir) / "bench.db")
+        setup = ProductCache(db_path, profile=profile)
+        setup.initialize()
+        setup.insert_products(products)
+        setup.close()
+
+        stop = threading.Event()
+        latencies: list[float] = []
+        locked = [0]
+        syncs = [0]
+        lock = threading.Lock()
+
+        def writer():
+            cache = ProductCache(db_path, profile=profile)
+            conn = cache._get_connection()
+            rows = [(p.sku, p.name, p.category, p.location, p.price, p.description) for p in products]
+            while not stop.is_set():
+                if writer_mode == "swap":
+                    cache.replace_products(products)
+                    syncs[0] += 1
+                    continue
+                with conn:
+                    conn.execute("DELETE FROM products")
+                    conn.executemany(
+                        "INSERT INTO products (sku, name, category, location, price, description) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        rows,
+                    )
+                syncs[0] += 1
+            cache.close()
+
+        def reader(offset: int):
+            cache = ProductCache(db_path, profile=profile, read_only=True)
+            local: list[float] = []
+            failures = 0
+            i = offset
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    cache.search_products(QUERIES[i % len(QUERIES)], max_results=5)
+                    local.append((time.perf_counter() - start) * 1000)
+                except sqlite3.OperationalError:
+                    failures += 1
+                i += 1
+            cache.close()
+            with lock:
+                latencies.extend(local)
+                locked[0] += failures
+
+        threads = [threading.Thread(target=writer)]
+        threads += [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    return {
+        "profile": profile,
+        "reads_per_s": len(latencies) / seconds,
+        "p50": percentile(latencies, 50) if latencies else float("nan"),
+        "p99": percentile(latencies, 99) if latencies else float("nan"),
+        "mean": statistics.mean(latencies) if latencies else float("nan"),
+        "locked": locked[0],
+        "syncs": syncs[0],
+    }
+
+
+def main():
+    """Run every profile and print a comparison table."""
+    parser = argparse.ArgumentParser(description="Benchmark L2 reads during a catalog write")
+    parser.add_argument("--products", type=int, default=50000,
+                        help="Catalog size rewritten by each sync (default: 50000)")
+    parser.add_argument("--readers", type=int, default=4,
+                        help="Concurrent reader threads (default: 4)")
+    parser.add_argument("--seconds", type=float, default=5.0,
+                        help="Duration per profile (default: 5.0)")
+    parser.add_argument("--writer", choices=("rewrite", "swap"), default="rewrite",
+                        help="In-place rewrite or generation swap (default: rewrite)")
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    products = make_products(args.products)
+    print(f"{'profile':>10}  {'reads/s':>9}  {'p50 ms':>8}  {'p99 ms':>8}  "
+          f"{'mean ms':>8}  {'locked':>6}  {'syncs':>5}")
+    for profile in CONNECTION_PROFILES:
+        r = run_profile(profile, products, args.readers, args.seconds, args.writer)
+        print(
+            f"{r['profile']:>10}  {r['reads_per_s']:>9.0f}  {r['p50']:>8.3f}  {r['p99']:>8.3f}  "
+            f"{r['mean']:>8.3f}  {r['locked']:>6}  {r['syncs']:>5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
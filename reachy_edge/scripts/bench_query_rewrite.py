@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Benchmark the query rewrite stage (cold and memoized).
+
+Rewrites a set of kiosk questions with a fresh QueryRewriter (cold: every
+rewrite computed) and then again (memoized) and prints per-query cost.
+
+Usage:
+    python scripts/bench_query_rewrite.py [--rounds N]
+"""
+import sys
+import argparse
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from reachy_edge.cache.query_rewrite import QueryRewriter
+
+QUESTIONS = [
+    "Where can I get diesel?", "where can I find coffee", "Do you have energy drinks?",
+    "where is the beef jerky", "I need a phone charger", "where are the showers",
+    "Where is DEF?", "do you sell CB radios", "I'm hungry", "dielsel", "cofee please",
+    "FUEL-DEF-001", "where can i find sunglases", "I am so tired", "antifreze for my truck",
+]
+
+
+def main():
+    """Time cold and memoized rewrites and print microseconds per query."""
+    parser = argparse.ArgumentParser(description="Benchmark the query rewrite stage")
+    parser.add_argument("--rounds", type=int, default=200,
+                        help="Times the question set is rewritten (default: 200)")
+    args = parser.parse_args()
+
+    cold_s = 0.0
+    for _ in range(args.rounds):
+        rewriter = QueryRewriter()
+        start = time.perf_counter()
+        for q in QUESTIONS:
+            rewriter.rewrite(q)
+        cold_s += time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for q in QUESTIONS:
+            rewriter.rewrite(q)
+    memo_s = time.perf_counter() - start
+
+    n = args.rounds * len(QUESTIONS)
+    print(f"{'cold':>6}  {cold_s / n * 1e6:>8.1f} us/query")
+    print(f"{'memo':>6}  {memo_s / n * 1e6:>8.1f} us/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Benchmark search row decoding on a large catalog.
+
+Runs FTS5 searches over a synthetic catalog (default 50k products) where
+each query term tags one group of ``--rows`` products, so every search
+returns that many rows without a large bm25 sort dominating the timing.
+Reports decoded rows per second for:
+
+- legacy:  ``sqlite3.Row`` by-name access into a validated pydantic model
+           per row, as ProductCache.search_products used to do
+- records: ProductCache.search_records (plain tuples into ProductRecord)
+- models:  ProductCache.search_products (records, then pydantic at the end)
+- no stmt cache: search_records with the prepared-statement cache disabled
+
+Usage:
+    python scripts/bench_row_decoding.py [--products N] [--rows N] [--rounds N]
+"""
+import sys
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+import structlog
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from reachy_edge.cache import l2_cache
+from reachy_edge.cache.l2_cache import _SEARCH_SQL, ProductCache
+from reachy_edge.models import Product
+
+WORDS = ["diesel", "coffee", "charger", "jerky", "water", "radio", "oil", "snack"]
+
+
+def make_products(count: int, group_size: int) -> list[Product]:
+    """Build a synthetic catalog of *count* products in tagged groups."""
+    return [
+        Product(
+            sku=f"SKU-{i:06d}",
+            name=f"{WORDS[i % len(WORDS)]} item {i}",
+            category=f"Category {i % 20}",
+            location=f"Aisle {i % 12}",
+            price=float(i % 50) + 0.99,
+            description=f"Synthetic product number {i} group{i // group_size}",
+        )
+        for i in range(count)
+    ]
+
+
+def legacy_search(cache: ProductCache, query: str, max_results: int) -> list[Product]:
+    """The previous decode path: named row access and a validated model per row."""
+    params = (*cache._weights, f'"{query}"', max_results)
+    rows = cache._get_connection().execute(_SEARCH_SQL, params).fetchall()
+    return [
+        Product(
+            sku=row["sku"], name=row["name"], category=row["category"],
+            location=row["location"], price=row["price"], description=row["description"],
+            upc=row["upc"], ean=row["ean"], relevance_score=abs(float(row[8])),
+        )
+        for row in rows
+    ]
+
+
+def rows_per_second(search, cache: ProductCache, groups: int, max_results: int, rounds: int) -> float:
+    """Search every group *rounds* times and return decoded rows/s."""
+    rows = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for group in range(groups):
+            rows += len(search(cache, f"group{group}", max_results))
+    return rows / (time.perf_counter() - start)
+
+
+def main():
+    """Build the catalog, time each decode path and print rows/s."""
+    parser = argparse.ArgumentParser(description="Benchmark search row decoding")
+    parser.add_argument("--products", type=int, default=50_000,
+                        help="Catalog size (default: 50000)")
+    parser.add_argument("--rows", type=int, default=50,
+                        help="Products per group, and max_results per search (default: 50)")
+    parser.add_argument("--rounds", type=int, default=3,
+                        help="Passes over all groups (default: 3)")
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = str(Path(tmpdir) / "bench.db")
+        setup = ProductCache(db_path)
+        setup.initialize()
+        setup.replace_products(make_products(args.products, args.rows))
+        setup.close()
+
+        cache = ProductCache(db_path, read_only=True)
+        paths = {
+            "legacy": legacy_search,
+            "records": ProductCache.search_records,
+            "models": ProductCache.search_products,
+        }
+        print(f"catalog: {args.products} products, {args.rows} rows per search")
+        groups = args.products // args.rows
+        for name, search in paths.items():
+            rate = rows_per_second(search, cache, groups, args.rows, args.rounds)
+            print(f"{name:>14}  {rate:>12,.0f} rows/s")
+        cache.close()
+
+        l2_cache.STATEMENT_CACHE_SIZE = 0
+        uncached = ProductCache(db_path, read_only=True)
+        rate = rows_per_second(ProductCache.search_records, uncached, groups, args.rows, args.rounds)
+        print(f"{'no stmt cache':>14}  {rate:>12,.0f} rows/s")
+        uncached.close()
+
+
+if __name__ == "__main__":
+    main()
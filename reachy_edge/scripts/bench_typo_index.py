@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Benchmark typo repair with the TypoIndex against a linear vocabulary scan.
+
+Builds a synthetic vocabulary (default 50k terms), misspells a sample of
+its terms with one or two random edits, and times index build and lookup
+latency. A handful of the same lookups is also timed as a full scan of the
+vocabulary, which is what a per-keyword fuzzy match does.
+
+Usage:
+    python scripts/bench_typo_index.py [--terms N] [--queries N]
+"""
+import sys
+import argparse
+import random
+import string
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from reachy_edge.cache.query_rewrite import LONG_TOKEN_LENGTH, TypoIndex, _osa_distance
+
+
+def make_vocabulary(count: int, rng: random.Random) -> dict[str, int]:
+    """Build *count* distinct pseudo-words with random document counts."""
+    vocabulary: dict[str, int] = {}
+    while len(vocabulary) < count:
+        word = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 12)))
+        vocabulary[word] = rng.randint(1, 500)
+    return vocabulary
+
+
+def misspell(word: str, rng: random.Random) -> str:
+    """Apply one random insert, delete, replace or transpose to *word*."""
+    i = rng.randrange(len(word) - 1)
+    op = rng.choice("idrt")
+    if op == "i":
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i:]
+    if op == "d":
+        return word[:i] + word[i + 1:]
+    if op == "r":
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Return the *pct* percentile of *samples*."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    """Build the index, time lookups and a scan baseline, print a summary."""
+    parser = argparse.ArgumentParser(description="Benchmark the typo-correction index")
+    parser.add_argument("--terms", type=int, default=50_000,
+                        help="Vocabulary size (default: 50000)")
+    parser.add_argument("--queries", type=int, default=2_000,
+                        help="Misspelt lookups to time (default: 2000)")
+    parser.add_argument("--scan-queries", type=int, default=20,
+                        help="Lookups timed with a full vocabulary scan (default: 20)")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    vocabulary = make_vocabulary(args.terms, rng)
+    index = TypoIndex(vocabulary)
+
+    words = rng.sample(sorted(vocabulary), args.queries)
+    typos = [misspell(w, rng) for w in words]
+    typos = [t if rng.random() < 0.5 or len(t) < LONG_TOKEN_LENGTH else misspell(t, rng) for t in typos]
+
+    latencies = []
+    found = 0
+    for typo in typos:
+        max_distance = 2 if len(typo) >= LONG_TOKEN_LENGTH else 1
+        start = time.perf_counter()
+        found += index.lookup(typo, max_distance) is not None
+        latencies.append((time.perf_counter() - start) * 1e6)
+
+    scan = []
+    terms = list(vocabulary)
+    for typo in typos[:args.scan_queries]:
+        start = time.perf_counter()
+        min(terms, key=lambda t: _osa_distance(typo, t, 2))
+        scan.append((time.perf_counter() - start) * 1e6)
+
+    print(f"vocabulary: {len(index)} terms, index built in {index.build_ms:.0f} ms")
+    print(f"{'index p50':>10}  {percentile(latencies, 50):>10.1f} us")
+    print(f"{'index p99':>10}  {percentile(latencies, 99):>10.1f} us")
+    print(f"{'scan p50':>10}  {percentile(scan, 50):>10.1f} us")
+    print(f"repaired {found}/{len(typos)} misspellings")
+
+
+if __name__ == "__main__":
+    main()
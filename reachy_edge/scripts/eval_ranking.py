@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Score BM25 ranking profiles against the labeled kiosk query set.
+
+Loads the sample catalog into a temporary database and evaluates every
+profile in RANKING_PROFILES (plus any ``--weights`` candidates) with
+nDCG@k, MRR, precision@1 and recall@k. Add judgments to
+reachy_edge/data/ranking_judgments.py as new query patterns show up.
+
+Usage:
+    python scripts/eval_ranking.py [--k N] [--weights '{"name": 8, "sku": 2}'] [--verbose]
+"""
+import sys
+import argparse
+import json
+import logging
+import tempfile
+from pathlib import Path
+
+import structlog
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from reachy_edge.cache.l2_cache import RANKING_PROFILES, ProductCache
+from reachy_edge.cache.ranking_eval import evaluate_ranking, score_ranking
+from reachy_edge.data.ranking_judgments import RANKING_JUDGMENTS
+from reachy_edge.data.sample_products import get_sample_products
+
+
+def main():
+    """Evaluate each profile and print a comparison table."""
+    parser = argparse.ArgumentParser(description="Evaluate L2 ranking profiles offline")
+    parser.add_argument("--k", type=int, default=5, help="Result depth scored (default: 5)")
+    parser.add_argument("--weights", action="append", default=[],
+                        help="Extra candidate as a JSON column -> weight object (repeatable)")
+    parser.add_argument("--verbose", action="store_true",
+                        help="Print per-query nDCG for queries where profiles disagree")
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    candidates = dict(RANKING_PROFILES)
+    for i, raw in enumerate(args.weights, start=1):
+        candidates[f"candidate{i}"] = json.loads(raw)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = str(Path(tmpdir) / "eval.db")
+        setup = ProductCache(db_path)
+        setup.initialize()
+        setup.replace_products(get_sample_products())
+        setup.close()
+
+        caches = {name: ProductCache(db_path, read_only=True, ranking=weights)
+                  for name, weights in candidates.items()}
+        print(f"{len(RANKING_JUDGMENTS)} judged queries, k={args.k}")
+        print(f"{'profile':>12}  {'nDCG':>6}  {'MRR':>6}  {'P@1':>6}  {'recall':>6}")
+        for name, cache in caches.items():
+            m = evaluate_ranking(cache, RANKING_JUDGMENTS, k=args.k)
+            print(f"{name:>12}  {m['ndcg']:>6.3f}  {m['mrr']:>6.3f}  {m['p_at_1']:>6.3f}  {m['recall']:>6.3f}")
+
+        if args.verbose:
+            for query, relevant in RANKING_JUDGMENTS:
+                scores = {
+                    name: score_ranking([r.sku for r in cache.search_records(query, args.k)], relevant, args.k)["ndcg"]
+                    for name, cache in caches.items()
+                }
+                if len(set(scores.values())) > 1:
+                    print(f"{query!r:>28}  " + "  ".join(f"{n}={v:.2f}" for n, v in scores.items()))
+        for cache in caches.values():
+            cache.close()
+
+
+if __name__ == "__main__":
+    main()
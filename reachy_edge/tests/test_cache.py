@@ -27,6 +27,33 @@ def test_l1_cache_eviction():
     assert cache.get("key3") == "value3"
 
 
+def test_l1_cache_get_refreshes_recency():
+    """Test that a hit moves the key to the most-recently-used position."""
+    cache = L1Cache(max_size=2, ttl_seconds=60)
+    
+    cache.set("key1", "value1")
+    cache.set("key2", "value2")
+    cache.get("key1")  # key2 is now least recently used
+    cache.set("key3", "value3")  # Should evict key2
+    
+    assert cache.get("key1") == "value1"
+    assert cache.get("key2") is None
+    assert cache.get("key3") == "value3"
+
+
+def test_l1_cache_overwrite_does_not_evict():
+    """Test that re-setting an existing key at capacity keeps other keys."""
+    cache = L1Cache(max_size=2, ttl_seconds=60)
+    
+    cache.set("key1", "value1")
+    cache.set("key2", "value2")
+    cache.set("key1", "updated")
+    
+    assert cache.size() == 2
+    assert cache.get("key1") == "updated"
+    assert cache.get("key2") == "value2"
+
+
 def test_l1_cache_stats():
     """Test L1 cache statistics."""
     cache = L1Cache()
@@ -41,6 +68,531 @@ def test_l1_cache_stats():
     assert stats["hit_rate_pct"] == 50.0
 
 
+def test_l1_cache_sharded_set_get():
+    """Test sharded L1 cache routes keys to segments transparently."""
+    cache = L1Cache(max_size=100, ttl_seconds=60, shards=4)
+    
+    for i in range(50):
+        cache.set(f"key{i}", i)
+    
+    assert cache.size() == 50
+    assert all(cache.get(f"key{i}") == i for i in range(50))
+    
+    cache.invalidate("key0")
+    assert cache.get("key0") is None
+    cache.invalidate()
+    assert cache.size() == 0
+
+
+def test_l1_cache_sharded_stats_aggregate():
+    """Test per-shard counters are aggregated in stats()."""
+    cache = L1Cache(max_size=100, ttl_seconds=60, shards=4)
+    
+    for i in range(20):
+        cache.set(f"key{i}", i)
+        cache.get(f"key{i}")  # Hit
+        cache.get(f"missing{i}")  # Miss
+    
+    stats = cache.stats()
+    assert stats["shards"] == 4
+    assert len(stats["shard_stats"]) == 4
+    assert stats["hits"] == 20
+    assert stats["misses"] == 20
+    assert sum(s["hits"] for s in stats["shard_stats"]) == 20
+    assert stats["hit_rate_pct"] == 50.0
+
+
+def test_l1_cache_rejects_zero_shards():
+    """Test invalid shard count is rejected."""
+    with pytest.raises(ValueError):
+        L1Cache(shards=0)
+
+
+def test_l1_cache_sweep_expired():
+    """Test the expiry sweeper evicts keys nobody reads again."""
+    import time
+    
+    cache = L1Cache(max_size=100, ttl_seconds=0, shards=2)
+    for i in range(10):
+        cache.set(f"key{i}", i)
+    time.sleep(0.01)
+    
+    assert cache.size() == 10
+    assert cache.sweep_expired(max_batch=100) == 10
+    assert cache.size() == 0
+    assert cache.stats()["expired_evictions"] == 10
+
+
+def test_l1_cache_sweep_is_batched():
+    """Test a single sweep touches at most max_batch entries."""
+    import time
+    
+    cache = L1Cache(max_size=100, ttl_seconds=0)
+    for i in range(10):
+        cache.set(f"key{i}", i)
+    time.sleep(0.01)
+    
+    assert cache.sweep_expired(max_batch=4) == 4
+    assert cache.size() == 6
+
+
+def test_l1_cache_sweep_keeps_live_entries():
+    """Test overwritten keys are not evicted by their stale expiry."""
+    import time
+    
+    cache = L1Cache(max_size=100, ttl_seconds=0)
+    cache.set("key1", "old")
+    time.sleep(0.01)
+    cache.ttl_seconds = 60
+    cache.set("key1", "new")
+    
+    assert cache.sweep_expired() == 0
+    assert cache.get("key1") == "new"
+
+
+def test_l1_cache_per_key_ttl():
+    """Test a per-entry TTL overrides the cache default."""
+    import time
+    
+    cache = L1Cache(max_size=10, ttl_seconds=60)
+    cache.set("short", "value", ttl=0)
+    cache.set("long", "value")
+    time.sleep(0.01)
+    
+    assert cache.get("short") is None
+    assert cache.get("long") == "value"
+
+
+def test_l1_cache_byte_budget_eviction():
+    """Test eviction is driven by total bytes when max_bytes is set."""
+    cache = L1Cache(max_size=1000, ttl_seconds=60, max_bytes=1000, size_estimator=lambda v: 300)
+    
+    cache.set("key1", "a")
+    cache.set("key2", "b")
+    cache.set("key3", "c")  # 3 * (300 + key) bytes exceed the budget -> key1 evicted
+    
+    stats = cache.stats()
+    assert cache.get("key1") is None
+    assert cache.get("key3") == "c"
+    assert stats["bytes"] <= 1000
+    assert stats["max_bytes"] == 1000
+
+
+def test_l1_cache_byte_budget_rejects_oversized_value():
+    """Test a value larger than the whole budget is not cached."""
+    cache = L1Cache(max_bytes=100)
+    
+    cache.set("big", "x" * 1000)
+    assert cache.get("big") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_l1_cache_byte_accounting_on_remove():
+    """Test bytes are released on overwrite, invalidate and expiry."""
+    cache = L1Cache(max_bytes=10_000)
+    
+    cache.set("key1", [Product(sku="SKU001", name="Milk", aisle="5", category="Dairy")])
+    first = cache.stats()["bytes"]
+    assert first > 0
+    
+    cache.set("key1", [Product(sku="SKU001", name="Milk", aisle="5", category="Dairy")])
+    assert cache.stats()["bytes"] == first
+    
+    cache.invalidate("key1")
+    assert cache.stats()["bytes"] == 0
+
+
+def test_estimate_size_counts_nested_models():
+    """Test the size estimator walks lists of pydantic models."""
+    from reachy_edge.cache.l1_cache import estimate_size
+    
+    one = [Product(sku="SKU001", name="Milk", aisle="5", category="Dairy")]
+    two = one + [Product(sku="SKU002", name="Bread", aisle="2", category="Bakery")]
+    
+    assert estimate_size(two) > estimate_size(one) > estimate_size([])
+
+
+@pytest.mark.asyncio
+async def test_l1_cache_sweeper_task():
+    """Test the background sweeper runs and stops cleanly."""
+    import asyncio
+    
+    cache = L1Cache(max_size=100, ttl_seconds=0)
+    cache.set("key1", "value1")
+    
+    task = asyncio.create_task(cache.sweeper(interval_s=0.01, batch_size=10))
+    await asyncio.sleep(0.05)
+    cache.stop_sweeper()
+    task.cancel()
+    
+    assert cache.size() == 0
+    assert cache.stats()["expired_evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_l1_cache_get_or_load_coalesces_misses():
+    """Test concurrent misses for one key share a single loader call."""
+    import asyncio
+    
+    cache = L1Cache()
+    calls = 0
+    
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return ["diesel"]
+    
+    results = await asyncio.gather(*(cache.get_or_load("product:diesel", loader) for _ in range(10)))
+    
+    assert calls == 1
+    assert all(value == ["diesel"] for value, _ in results)
+    assert cache.stats()["coalesced"] == 9
+    assert await cache.get_or_load("product:diesel", loader) == (["diesel"], True)
+
+
+@pytest.mark.asyncio
+async def test_l1_cache_get_or_load_shares_errors():
+    """Test a failing load is raised to every waiter and not cached."""
+    import asyncio
+    
+    cache = L1Cache()
+    
+    async def loader():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("l2 down")
+    
+    results = await asyncio.gather(
+        *(cache.get_or_load("key", loader) for _ in range(3)), return_exceptions=True
+    )
+    
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert cache.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_l1_cache_get_or_load_survives_owner_cancel():
+    """Test cancelling the caller that started a load does not fail coalesced waiters."""
+    import asyncio
+    
+    cache = L1Cache()
+    release = asyncio.Event()
+    calls = 0
+    
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return ["diesel"]
+    
+    owner = asyncio.create_task(cache.get_or_load("key", loader))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cache.get_or_load("key", loader))
+    await asyncio.sleep(0)
+    owner.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    
+    assert await waiter == (["diesel"], False)
+    assert owner.cancelled()
+    assert calls == 1
+    assert cache.get("key") == ["diesel"]
+
+
+@pytest.mark.asyncio
+async def test_l1_cache_get_or_load_cancelled_when_unwaited():
+    """Test a load is cancelled once every caller waiting on it is cancelled."""
+    import asyncio
+    
+    cache = L1Cache()
+    cancelled = asyncio.Event()
+    
+    async def loader():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+    
+    callers = [asyncio.create_task(cache.get_or_load("key", loader)) for _ in range(2)]
+    await asyncio.sleep(0)
+    for caller in callers:
+        caller.cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+    await asyncio.sleep(0)
+    assert cache.get("key") is None
+    assert not cache._inflight
+
+
+@pytest.mark.asyncio
+async def test_l1_cache_invalidate_discards_inflight_load():
+    """Test a load started before invalidate() is not cached and not joined."""
+    import asyncio
+    
+    cache = L1Cache()
+    release = asyncio.Event()
+    
+    async def old_catalog():
+        await release.wait()
+        return ["old"]
+    
+    async def new_catalog():
+        return ["new"]
+    
+    before = asyncio.create_task(cache.get_or_load("key", old_catalog))
+    await asyncio.sleep(0)
+    cache.invalidate()
+    
+    assert await asyncio.wait_for(cache.get_or_load("key", new_catalog), 1) == (["new"], False)
+    release.set()
+    assert await before == (["old"], False)  # Its own caller still gets a result
+    assert cache.get("key") == ["new"]
+    assert not cache._inflight
+
+
+@pytest.mark.asyncio
+async def test_l1_cache_get_or_load_skips_empty_results():
+    """Test empty results are returned but not cached."""
+    cache = L1Cache()
+    
+    async def loader():
+        return []
+    
+    assert await cache.get_or_load("key", loader) == ([], False)
+    assert cache.size() == 0
+
+
+@pytest.mark.asyncio
+async def test_l1_cache_stale_while_revalidate():
+    """Test stale values are served immediately and refreshed in background."""
+    import asyncio
+    
+    cache = L1Cache(ttl_seconds=0, hard_ttl_seconds=60)
+    version = 0
+    
+    async def loader():
+        nonlocal version
+        version += 1
+        return [f"v{version}"]
+    
+    assert await cache.get_or_load("key", loader) == (["v1"], False)
+    await asyncio.sleep(0.01)  # Past the soft TTL
+    
+    assert cache.get("key") == ["v1"]  # Stale value, refresh scheduled
+    await asyncio.sleep(0.01)
+    
+    stats = cache.stats()
+    assert stats["stale_served"] == 1
+    assert stats["refreshes"] == 1
+    assert version == 2
+
+
+@pytest.mark.asyncio
+async def test_l1_cache_stale_refresh_failure_keeps_value():
+    """Test a failed background refresh keeps serving the stale value."""
+    import asyncio
+    
+    cache = L1Cache(ttl_seconds=0, hard_ttl_seconds=60)
+    calls = 0
+    
+    async def loader():
+        nonlocal calls
+        calls += 1
+        if calls > 1:
+            raise RuntimeError("l2 down")
+        return ["v1"]
+    
+    await cache.get_or_load("key", loader)
+    await asyncio.sleep(0.01)
+    assert cache.get("key") == ["v1"]
+    await asyncio.sleep(0.01)
+    
+    assert cache.get("key") == ["v1"]
+    assert cache.stats()["refresh_failures"] >= 1
+
+
+def test_l1_cache_stale_mode_ignores_plain_set():
+    """Test entries written without a loader still expire at the soft TTL."""
+    import time
+    
+    cache = L1Cache(ttl_seconds=0, hard_ttl_seconds=60)
+    cache.set("key", "value")
+    time.sleep(0.01)
+    
+    assert cache.get("key") is None
+    assert cache.stats()["stale_served"] == 0
+
+
+def test_canonicalize_query_variants_share_key():
+    """Test surface variants of one question map to the same L1 key."""
+    from reachy_edge.cache import canonicalize_query, product_cache_key
+    
+    variants = ["Where is diesel?", "diesel", "diesel ", "DIESEL", "do you have diesel"]
+    assert {product_cache_key(v) for v in variants} == {"product:diesel"}
+    assert canonicalize_query("energy drinks") == canonicalize_query("Drinks, energy!")
+    assert canonicalize_query("where is it") == "is it where"  # Only stop words: keep tokens
+
+
+def test_product_code_detects_scanner_input():
+    """Test only single tokens containing a digit are treated as exact codes."""
+    from reachy_edge.cache.query import code_cache_key, product_code
+    
+    assert product_code(" FUEL-DEF-001 ") == "FUEL-DEF-001"
+    assert product_code("012345678905") == "012345678905"
+    assert product_code("diesel") is None
+    assert product_code("where is FUEL-DEF-001") is None
+    assert product_code("A1") is None  # Too short to be a code
+    assert code_cache_key("fuel-def-001") == code_cache_key("FUEL-DEF-001")
+
+
+def test_query_rewriter_builds_safe_match():
+    """Test rewriting drops filler, repairs typos, expands synonyms and quotes terms."""
+    from reachy_edge.cache.query_rewrite import QueryRewriter
+    
+    rewriter = QueryRewriter()
+    assert rewriter.rewrite("Where can I get diesel?").match == '"diesel"'
+    assert rewriter.rewrite("dielsel").terms == ("dielsel", "diesel")
+    assert "snack" in rewriter.rewrite("I'm hungry").terms
+    assert rewriter.rewrite('FUEL-DEF-001 AND ("').match == '"fuel-def-001"'
+    assert rewriter.rewrite("?!").match == ""
+    
+    rewriter.rewrite("Where can I get diesel?")
+    assert rewriter.stats()["memo_hits"] == 1
+
+
+def test_typo_index_lookup():
+    """Test the delete index finds single and double edits and prefers frequent terms."""
+    from reachy_edge.cache.query_rewrite import QueryRewriter, TypoIndex
+    
+    index = TypoIndex({"diesel": 3, "coffe": 9, "batteri": 1, "charger": 2, "changer": 5})
+    assert index.lookup("dielsel") == "diesel"      # Insert
+    assert index.lookup("deisel") == "diesel"       # Transpose
+    assert index.lookup("cofee") == "coffe"         # Replace
+    assert index.lookup("batterys") is None
+    assert index.lookup("batterys", max_distance=2) == "batteri"
+    assert index.lookup("chanrer") == "changer"     # Tie broken by frequency
+    assert index.lookup("xylophone") is None
+    
+    rewriter = QueryRewriter()
+    rewriter.rewrite("cofee")
+    rewriter.set_index(index)
+    assert rewriter.stats()["memo_size"] == 0
+    assert rewriter.rewrite("cofee").match == '"cofee" OR "coffe"*'
+
+
+def test_canonical_keys_improve_replayed_hit_rate():
+    """Replay a kiosk query log and compare naive vs canonical L1 keys."""
+    from reachy_edge.cache import product_cache_key
+    
+    query_log = [
+        "diesel", "Where is diesel?", "diesel ", "DIESEL", "where can I get diesel",
+        "coffee", "Coffee?", "do you have coffee", "coffee please",
+        "energy drinks", "Energy drinks", "drinks energy", "where are the energy drinks?",
+        "CB radio", "cb radio", "Do you sell CB radios?",
+    ]
+    
+    def replay(key_fn):
+        cache = L1Cache(max_size=100, ttl_seconds=60)
+        for query in query_log:
+            key = key_fn(query)
+            if cache.get(key) is None:
+                cache.set(key, ["result"])
+        return cache.stats()["hit_rate_pct"]
+    
+    naive = replay(lambda q: f"product:{q.lower().strip()}")
+    canonical = replay(product_cache_key)
+    
+    assert canonical >= 2 * naive
+
+
+def test_response_cache_renders_latency():
+    """Test stored responses replay with a fresh latency and cache_hit=true."""
+    import json
+    from reachy_edge.cache import ResponseCache
+    from reachy_edge.models import InteractionResponse
+    
+    cache = ResponseCache(max_size=10)
+    key = ResponseCache.key("Where is diesel?", "product_lookup", "v1")
+    assert key == ResponseCache.key("diesel", "product_lookup", "v1")
+    assert key != ResponseCache.key("diesel", "product_lookup", "v2")
+    
+    cache.store(key, InteractionResponse(response="Aisle 1", intent="product_lookup", latency_ms=12.5))
+    body = json.loads(cache.render(key, latency_ms=0.25))
+    
+    assert body["response"] == "Aisle 1"
+    assert body["latency_ms"] == 0.25
+    assert body["cache_hit"] is True
+    
+    cache.invalidate()
+    assert cache.render(key, latency_ms=0.25) is None
+
+
+def test_response_cache_disabled():
+    """Test max_size=0 disables the response cache."""
+    from reachy_edge.cache import ResponseCache
+    from reachy_edge.models import InteractionResponse
+    
+    cache = ResponseCache(max_size=0)
+    cache.store("k", InteractionResponse(response="x", latency_ms=1.0))
+    assert cache.render("k", latency_ms=1.0) is None
+
+
+def test_l1_cache_snapshot_orders_by_hits():
+    """Test snapshot() returns the hottest keys first and restore() keeps hits."""
+    cache = L1Cache()
+    cache.set("product:a", ["a"])
+    cache.set("product:b", ["b"])
+    cache.set("active_promos", ["promo"])
+    for _ in range(3):
+        cache.get("product:b")
+    cache.get("product:a")
+    
+    snap = cache.snapshot(max_keys=10, prefix="product:")
+    assert [item["key"] for item in snap] == ["product:b", "product:a"]
+    
+    fresh = L1Cache()
+    assert fresh.restore(snap) == 2
+    assert fresh.snapshot()[0] == {"key": "product:b", "value": ["b"], "hits": 3}
+
+
+@pytest.mark.asyncio
+async def test_l1_snapshot_round_trip_checks_version():
+    """Test a saved snapshot reloads only while the L2 version matches."""
+    import tempfile
+    from pathlib import Path
+    from reachy_edge.cache.snapshot import load_l1_snapshot, save_l1_snapshot, snapshot_path
+    from reachy_edge.cache.l2_cache import ProductRecord
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = str(Path(tmpdir) / "cache.db")
+        l2 = L2Cache(db_path)
+        await l2.set_version("v7")
+        
+        l1 = L1Cache()
+        l1.set("product:diesel", [ProductRecord(
+            sku="FUEL-DIESEL-001", name="Diesel", category="Fuel",
+            location="Fuel Island 1", price=3.89, description="Diesel fuel",
+        )])
+        l1.get("product:diesel")
+        path = snapshot_path(db_path)
+        assert save_l1_snapshot(l1, l2, path) == 1
+        
+        # Restart: version is persisted in SQLite, so the snapshot matches
+        l2.close()
+        restarted = L2Cache(db_path)
+        assert restarted.version == "v7"
+        warm = L1Cache()
+        assert load_l1_snapshot(warm, restarted, path) == 1
+        assert warm.get("product:diesel") == l1.get("product:diesel")
+        
+        # A new sync version makes the snapshot stale
+        await restarted.set_version("v8")
+        cold = L1Cache()
+        assert load_l1_snapshot(cold, restarted, path) == 0
+        assert cold.size() == 0
+        restarted.close()
+
+
 @pytest.mark.asyncio
 async def test_l2_cache_products():
     """Test L2 cache product operations."""
@@ -67,7 +619,7 @@ async def test_l2_cache_products():
         assert result.aisle == "5"
     
     finally:
-        cache._products.close_all()
+        cache.close()
         os.unlink(db_path)
 
 
@@ -96,5 +648,69 @@ async def test_l2_cache_promos():
         assert active[0].id == "PROMO1"  # Higher priority first
     
     finally:
-        cache._products.close_all()
+        cache.close()
+        os.unlink(db_path)
+
+
+@pytest.mark.asyncio
+async def test_l2_cache_preloads_frequent_queries():
+    """Test preload_hot_data warms L1 with the most asked product searches."""
+    import tempfile
+    import os
+    from reachy_edge.cache import canonicalize_query, product_cache_key
+    
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".db") as tmp:
+        db_path = tmp.name
+    
+    try:
+        cache = L2Cache(db_path)
+        await cache.update_products([
+            Product(sku="SKU001", name="Milk", aisle="5", category="Dairy", price=3.99),
+            Product(sku="SKU002", name="Bread", aisle="2", category="Bakery", price=2.49),
+        ])
+        for query in ["Where is the milk?", "milk", "milk", "bread"]:
+            cache.record_query(canonicalize_query(query))
+        
+        l1 = L1Cache()
+        await cache.preload_hot_data(l1, top_n=1)
+        
+        assert l1.get(product_cache_key("milk"))[0].sku == "SKU001"
+        assert l1.get(product_cache_key("bread")) is None  # Outside top_n
+        assert cache._products.top_queries(2) == [("milk", 3), ("bread", 1)]
+    
+    finally:
+        cache.close()
+        os.unlink(db_path)
+
+
+@pytest.mark.asyncio
+async def test_l2_cache_query_counts_bounded(monkeypatch):
+    """Test the query count buffer flushes at its key limit and never grows past twice that."""
+    import asyncio
+    import tempfile
+    import os
+    from reachy_edge.cache import l2_cache
+    
+    monkeypatch.setattr(l2_cache, "QUERY_COUNT_FLUSH_KEYS", 10)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".db") as tmp:
+        db_path = tmp.name
+    
+    try:
+        cache = L2Cache(db_path)
+        for i in range(9):
+            cache.record_query(f"typo{i}")
+        assert len(cache._pending_query_counts) == 9
+        cache.record_query("typo9")  # Hits the limit: flush scheduled on the writer
+        for i in range(100):  # Arrive before the flush task runs
+            cache.record_query(f"burst{i}")
+        assert len(cache._pending_query_counts) == 20
+        assert len(cache._flush_tasks) == 1
+        
+        await asyncio.gather(*cache._flush_tasks)
+        await cache.flush_query_counts()
+        assert not cache._pending_query_counts
+        assert len(cache._products.top_queries(100)) == 20
+    
+    finally:
+        cache.close()
         os.unlink(db_path)
@@ -16,6 +16,7 @@ These tests use FastAPI's TestClient (no live server required).
 from __future__ import annotations
 
 import asyncio
+import json
 import statistics
 import time
 from concurrent.futures import ThreadPoolExecutor
@@ -89,6 +90,13 @@ class TestProductSearchEndpoint:
         resp = client.get("/api/products/search")
         assert resp.status_code == 422
 
+    def test_search_exact_sku(self, client):
+        """A hyphenated SKU is looked up exactly instead of going through FTS5."""
+        resp = client.get("/api/products/search", params={"q": "FUEL-DEF-001"})
+        data = resp.json()
+        assert resp.status_code == 200
+        assert [p["sku"] for p in data["products"]] == ["FUEL-DEF-001"]
+
     def test_search_case_insensitive(self, client):
         """Search is case-insensitive (FTS5 default)."""
         upper = client.get("/api/products/search", params={"q": "DIESEL"}).json()
@@ -101,6 +109,37 @@ class TestProductSearchEndpoint:
         assert resp.status_code == 200
         assert resp.json()["result_count"] > 0
 
+    def test_search_filters_and_facets(self, client):
+        """Facet filters narrow results in L2 and facet counts cover the full match set."""
+        data = client.get("/api/products/search", params={
+            "q": "diesel", "category": "fuel & fluids", "max_price": 20, "facets": True,
+        }).json()
+        assert data["result_count"] > 0
+        assert all(p["category"] == "Fuel & Fluids" and p["price"] <= 20 for p in data["products"])
+        assert list(data["facets"]["category"]) == ["Fuel & Fluids"]
+        assert data["facets"]["total"] >= data["result_count"]
+        assert data["facets"]["price"]["max"] <= 20
+
+    def test_mind_products_paginate_and_export(self, client):
+        """Cursor pages and the NDJSON export both cover the whole catalog."""
+        skus, cursor = [], None
+        while True:
+            params = {"limit": 10, **({"cursor": cursor} if cursor else {})}
+            data = client.get("/mind/products", params=params).json()
+            skus += [p["sku"] for p in data["products"]]
+            assert data["count"] == len(data["products"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        assert skus == sorted(set(skus))
+        assert data["total"] == len(skus)
+        
+        resp = client.get("/mind/products/export", params={"batch_size": 8})
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in resp.text.splitlines()]
+        assert [row["sku"] for row in rows] == skus
+        assert "relevance_score" not in rows[0]
+
     def test_search_under_100ms(self, client):
         """Single search completes in <100ms."""
         start = time.time()
@@ -212,6 +251,100 @@ class TestConversationFlow:
         assert r2["cache_hit"] is True
 
 
+class TestInteractResponseCache:
+    """POST /interact — pre-rendered response cache."""
+
+    def test_repeat_question_served_from_response_cache(self, client):
+        """A repeated question (in any surface form) replays the rendered body."""
+        first = client.post("/interact", json={"query": "Where is diesel?", "session_id": "s1"})
+        second = client.post("/interact", json={"query": "where is DIESEL", "session_id": "s2"})
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert second.json()["response"] == first.json()["response"]
+        assert second.json()["cache_hit"] is True
+
+        stats = client.get("/health").json()["details"]["response_cache"]
+        assert stats["hits"] >= 1
+
+    def test_replayed_questions_still_counted(self, client):
+        """Every /interact product question counts toward hot-query preload."""
+        from reachy_edge.cache.query import canonicalize_query
+
+        counts = app.state.l2_cache._pending_query_counts
+        canonical = canonicalize_query("Where is diesel?")
+        before = counts[canonical]
+        for _ in range(5):
+            client.post("/interact", json={"query": "Where is diesel?", "session_id": "s1"})
+        assert client.get("/health").json()["details"]["response_cache"]["hits"] >= 4
+        assert counts[canonical] - before == 5
+
+    def test_cache_sync_invalidates_response_cache(self, client):
+        """/cache/sync drops every pre-rendered response."""
+        client.post("/interact", json={"query": "where is coffee", "session_id": "s1"})
+        client.post("/cache/sync", json={
+            "version": "v-test-sync",
+            "timestamp": "2026-01-01T00:00:00Z",
+        })
+        stats = client.get("/health").json()["details"]["response_cache"]
+        assert stats["size"] == 0
+
+
+class TestCacheDeltaSync:
+    """POST /cache/sync — incremental catalog changes."""
+
+    def test_delta_applies_and_stale_base_conflicts(self, client):
+        """A delta on the current version applies; replaying it returns 409."""
+        base = client.get("/health").json()["details"]["l2"]["version"]
+        delta = {
+            "version": "v-delta-1",
+            "timestamp": "2026-01-01T00:00:00Z",
+            "base_version": base,
+            "upserted": [{
+                "sku": "DELTA-KAYAK-1", "name": "Inflatable Kayak", "aisle": "9",
+                "category": "Outdoor", "price": 199.0,
+            }],
+        }
+        resp = client.post("/cache/sync", json=delta)
+        assert resp.status_code == 200
+        assert resp.json()["mode"] == "delta"
+        assert resp.json()["products_updated"] == 1
+
+        found = client.get("/api/products/search", params={"q": "kayak"}).json()
+        assert found["products"][0]["sku"] == "DELTA-KAYAK-1"
+
+        assert client.post("/cache/sync", json=delta).status_code == 409
+
+    def test_restart_reseed_resets_delta_base(self):
+        """The startup reseed replaces the synced catalog, so its version no longer applies."""
+        with TestClient(app) as c:
+            resp = c.post("/cache/sync", json={
+                "version": "v-full-7",
+                "timestamp": "2026-01-01T00:00:00Z",
+                "products": [{"sku": "SYNC-ONLY-1", "name": "Synced Lantern", "aisle": "4",
+                              "category": "Outdoor", "price": 12.0}],
+            })
+            assert resp.status_code == 200
+            assert c.get("/health").json()["details"]["l2"]["version"] == "v-full-7"
+
+        with TestClient(app) as c:
+            assert c.get("/health").json()["details"]["l2"]["version"] == "v0"
+            resp = c.post("/cache/sync", json={
+                "version": "v-full-8",
+                "timestamp": "2026-01-01T00:00:00Z",
+                "base_version": "v-full-7",
+                "deleted_skus": ["SYNC-ONLY-1"],
+            })
+            assert resp.status_code == 409
+
+    def test_delta_without_base_version_rejected(self, client):
+        """Delta fields without base_version fail validation."""
+        resp = client.post("/cache/sync", json={
+            "version": "v-delta-2",
+            "timestamp": "2026-01-01T00:00:00Z",
+            "deleted_skus": ["FUEL-DIESEL-001"],
+        })
+        assert resp.status_code == 422
+
 # ===================================================================
 # SUITE 5 — Error paths
 # ===================================================================
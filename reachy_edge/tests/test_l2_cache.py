@@ -1,16 +1,24 @@
 """Tests for L2 Cache (SQLite FTS5) product storage."""
 import pytest
 import sqlite3
+import sys
 import tempfile
+from importlib.util import find_spec
 from pathlib import Path
 from datetime import datetime
 import threading
 import time
 
 # Will fail until we create the l2_cache module
-from reachy_edge.cache.l2_cache import ProductCache, ThreadSafeProductCache
+from reachy_edge.cache.l2_cache import (
+    DeltaBaseMismatch, ProductCache, SQLiteReadPool, ThreadSafeProductCache, connection_profile,
+    SearchFilters, ranking_weights,
+)
 from reachy_edge.models import Product
 
+# The vector backends need the optional NumPy dependency (CI installs it)
+requires_numpy = pytest.mark.skipif(find_spec("numpy") is None, reason="numpy not installed (pip install .[vectors])")
+
 
 class TestProductCacheDatabaseInit:
     """Test database initialization."""
@@ -221,6 +229,15 @@ class TestProductSearch:
             assert result.relevance_score is not None
             assert isinstance(result.relevance_score, float)
 
+    def test_search_records_are_lean_rows(self, loaded_cache):
+        """Test search_records returns plain tuples matching the model results."""
+        from reachy_edge.cache import ProductRecord
+
+        records = loaded_cache.search_records("diesel")
+        assert records and all(type(r) is ProductRecord for r in records)
+        assert records[0].relevance_score > 0
+        assert [r.to_product() for r in records] == loaded_cache.search_products("diesel")
+
 
 class TestPerformance:
     """Test search performance requirements."""
@@ -293,6 +310,138 @@ class TestEdgeCases:
         assert isinstance(results, list)
 
 
+class TestCanonicalSchema:
+    """Test the canonical products table behind the FTS5 index."""
+    
+    def test_fts_index_is_external_content(self):
+        """Test products_fts indexes the products table and triggers keep it in sync."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ProductCache(str(Path(tmpdir) / "test_products.db"))
+            cache.initialize()
+            conn = cache._get_connection()
+            fts_sql = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE name = 'products_fts'"
+            ).fetchone()[0]
+            assert "content='products'" in fts_sql
+            
+            cache.insert_product(Product(
+                sku="CANON-001", name="Canonical Compass", category="Outdoor",
+                location="Aisle 4", price=24.5, description="Magnetic compass"
+            ))
+            conn.execute("UPDATE products SET name = 'Canonical Sextant' WHERE sku = 'CANON-001'")
+            conn.commit()
+            assert [p.name for p in cache.search_products("sextant")] == ["Canonical Sextant"]
+            assert cache.search_products("compass")[0].description == "Magnetic compass"
+            
+            conn.execute("DELETE FROM products WHERE sku = 'CANON-001'")
+            conn.commit()
+            assert cache.search_products("sextant") == []
+            cache.close()
+    
+    def test_get_product_by_sku(self):
+        """Test exact SKU fetch returns typed fields or None."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ProductCache(str(Path(tmpdir) / "test_products.db"))
+            cache.initialize()
+            cache.insert_product(Product(
+                sku="CANON-002", name="Road Atlas", category="Books",
+                location="Aisle 1", price=14.0, description="Highway atlas"
+            ))
+            
+            product = cache.get_product("CANON-002")
+            assert product.name == "Road Atlas"
+            assert isinstance(product.price, float)
+            assert cache.get_product("canon-002") is None  # SKUs match exactly
+            cache.close()
+    
+    def test_legacy_fts_only_database_migrated(self):
+        """Test a database with FTS5-only storage is moved into products."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "test_products.db")
+            conn = sqlite3.connect(db_path)
+            conn.execute("""
+                CREATE VIRTUAL TABLE products_fts USING fts5(
+                    sku, name, category, location, price UNINDEXED, description,
+                    tokenize='porter unicode61'
+                )
+            """)
+            conn.executemany(
+                "INSERT INTO products_fts VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    ("OLD-001", "Old Thermos", "Kitchen", "Aisle 3", "9.5", "Steel"),
+                    ("OLD-001", "Newer Thermos", "Kitchen", "Aisle 3", "11", "Steel"),
+                    ("OLD-002", "Old Mug", "Kitchen", "Aisle 3", "4.25", "Ceramic"),
+                ],
+            )
+            conn.commit()
+            conn.close()
+            
+            cache = ProductCache(db_path)
+            cache.initialize()
+            assert cache.product_count() == 2  # Duplicate SKU collapsed
+            thermos = cache.get_product("OLD-001")
+            assert (thermos.name, thermos.price) == ("Newer Thermos", 11.0)
+            assert [p.sku for p in cache.search_products("mug")] == ["OLD-002"]
+            cache.close()
+
+
+class TestQueryRewriteSearch:
+    """Test searches go through the rewrite stage."""
+    
+    @pytest.fixture
+    def cache(self):
+        """Create temporary cache with a small catalog."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_instance = ProductCache(str(Path(tmpdir) / "test_products.db"))
+            cache_instance.initialize()
+            cache_instance.insert_products([
+                Product(sku="FUEL-DIESEL-001", name="Diesel Fuel", category="Fuel",
+                        location="Fuel Island 1", price=3.89, description="Ultra low sulfur diesel"),
+                Product(sku="SNACK-JERKY-001", name="Beef Jerky", category="Snacks",
+                        location="Aisle 3", price=6.99, description="Smoked beef snack"),
+            ])
+            yield cache_instance
+            cache_instance.close()
+    
+    def test_natural_question_hits_index_once(self, cache, monkeypatch):
+        """Test a question with filler words needs a single MATCH."""
+        calls = []
+        original = cache._match
+        monkeypatch.setattr(cache, "_match", lambda q, n, f=None: calls.append(q) or original(q, n, f))
+        
+        results = cache.search_products("Where can I get diesel?")
+        
+        assert results[0].sku == "FUEL-DIESEL-001"
+        assert calls == ['"diesel"']
+    
+    def test_typo_and_synonym_queries_match(self, cache):
+        """Test repaired typos and intent synonyms find products."""
+        assert cache.search_products("dielsel")[0].sku == "FUEL-DIESEL-001"
+        assert cache.search_products("I'm hungry")[0].sku == "SNACK-JERKY-001"
+    
+    def test_fts_syntax_in_user_text_is_inert(self, cache):
+        """Test operator characters no longer break the search."""
+        assert cache.search_products('diesel AND ("')[0].sku == "FUEL-DIESEL-001"
+        assert cache.search_products("NEAR(") == []
+    
+    def test_prefix_fallback(self, cache):
+        """Test a partial word falls back to a prefix match."""
+        assert cache.search_products("jer")[0].sku == "SNACK-JERKY-001"
+    
+    def test_typo_repair_uses_catalog_vocabulary(self, cache):
+        """Test typos are repaired against the FTS5 vocabulary of the catalog."""
+        from reachy_edge.cache.query_rewrite import QueryRewriter
+        
+        vocabulary = cache.vocabulary()
+        assert vocabulary["diesel"] == 1
+        assert "sulfur" in vocabulary and "smoke" in vocabulary  # Porter stems
+        
+        cache.rewriter = QueryRewriter()
+        assert cache.search_products("sulfer") == []  # Not in the seed terms
+        cache.rewriter.set_index(cache.typo_index())
+        assert cache.search_products("sulfer")[0].sku == "FUEL-DIESEL-001"
+        assert cache.search_products("smokd")[0].sku == "SNACK-JERKY-001"
+
 class TestDuplicateHandling:
     """Test duplicate SKU behavior."""
     
@@ -307,7 +456,7 @@ class TestDuplicateHandling:
             cache_instance.close()
     
     def test_duplicate_sku_insertion(self, cache):
-        """Test that duplicate SKUs are allowed (FTS5 limitation)."""
+        """Test that re-inserting a SKU updates the canonical row."""
         product1 = Product(
             sku="FUEL-DEF-001",
             name="BlueDEF Diesel Exhaust Fluid",
@@ -325,13 +474,16 @@ class TestDuplicateHandling:
             description="Different description"
         )
         
-        # Both should insert successfully (FTS5 has no PRIMARY KEY constraint)
+        # The second insert replaces the first (SKU is unique in products)
         cache.insert_product(product1)
         cache.insert_product(product2)
         
-        # Search should return both (use quoted string for hyphenated SKU)
+        # Search should return one row (use quoted string for hyphenated SKU)
         results = cache.search_products('"FUEL-DEF-001"')
-        assert len(results) == 2, "FTS5 allows duplicate SKUs"
+        assert len(results) == 1, "SKU is unique"
+        assert results[0].name == "Different Product"
+        assert results[0].price == 99.99
+        assert cache.search_products("BlueDEF") == [], "Old text dropped from the FTS index"
 
 
 class TestTransactionRollback:
@@ -528,3 +680,842 @@ class TestThreadSafety:
             assert all(count > 0 for count in search_results), "All searches should find products"
             
             cache.close_all()
+
+
+class TestConnectionProfiles:
+    """Test PRAGMA profiles and read-only connections."""
+    
+    def test_read_heavy_profile_applies_pragmas(self):
+        """Test the read_heavy profile enables WAL, mmap and memory temp store."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ProductCache(str(Path(tmpdir) / "test_products.db"), profile="read_heavy")
+            cache.initialize()
+            conn = cache._get_connection()
+            
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+            assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+            assert conn.execute("PRAGMA cache_size").fetchone()[0] == -16000
+            cache.close()
+    
+    def test_unknown_profile_rejected(self):
+        """Test a typo in the profile name fails at construction."""
+        with pytest.raises(ValueError, match="Unknown SQLite profile"):
+            connection_profile("fast")
+        with pytest.raises(ValueError):
+            ProductCache("unused.db", profile="fast")
+    
+    def test_read_only_connection_cannot_write(self):
+        """Test read-only connections search but refuse writes."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "test_products.db")
+            writer = ProductCache(db_path, profile="read_heavy")
+            writer.initialize()
+            writer.insert_product(Product(
+                sku="RO-001", name="Read Only Widget", category="Test",
+                location="Test Location", price=1.0, description="Readable"
+            ))
+            
+            reader = ProductCache(db_path, profile="read_heavy", read_only=True)
+            assert reader.search_products("widget")[0].sku == "RO-001"
+            with pytest.raises(sqlite3.OperationalError, match="readonly"):
+                reader.clear()
+            reader.close()
+            writer.close()
+    
+    def test_wal_reader_not_blocked_by_open_write(self):
+        """Test a WAL reader sees the last commit while a write is in progress."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "test_products.db")
+            writer = ProductCache(db_path, profile="read_heavy")
+            writer.initialize()
+            writer.insert_product(Product(
+                sku="WAL-001", name="Committed Lamp", category="Test",
+                location="Test Location", price=1.0, description="Visible"
+            ))
+            
+            conn = writer._get_connection()
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM products_fts")
+            
+            reader = ProductCache(db_path, profile="read_heavy", read_only=True)
+            reader._get_connection().execute("PRAGMA busy_timeout=0")
+            assert [p.sku for p in reader.search_products("lamp")] == ["WAL-001"]
+            
+            conn.rollback()
+            reader.close()
+            writer.close()
+
+
+class TestRankingProfiles:
+    """Test BM25 column-weight ranking profiles."""
+    
+    @pytest.fixture
+    def db_path(self):
+        """Create a catalog where one product names the term and one only describes it."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "test_products.db")
+            cache = ProductCache(db_path)
+            cache.initialize()
+            cache.insert_products([
+                Product(sku="RANK-001", name="Lantern Battery Pack", category="Electronics",
+                        location="Aisle 4", price=9.99,
+                        description="Fits the lantern; spare lantern cells for any lantern"),
+                Product(sku="RANK-002", name="Camping Lantern", category="Outdoor",
+                        location="Aisle 5", price=24.99, description="Bright LED light"),
+            ])
+            cache.close()
+            yield db_path
+    
+    def test_name_weight_changes_order(self, db_path):
+        """Test a name hit outranks repeated description hits under name_first."""
+        flat = ProductCache(db_path, ranking="flat")
+        weighted = ProductCache(db_path, ranking="name_first")
+        assert flat.search_products("lantern")[0].sku == "RANK-001"
+        assert weighted.search_products("lantern")[0].sku == "RANK-002"
+        custom = ProductCache(db_path, ranking={"description": 10.0})
+        assert custom.search_products("lantern")[0].sku == "RANK-001"
+        for cache in (flat, weighted, custom):
+            cache.close()
+    
+    def test_unknown_ranking_rejected(self):
+        """Test bad profile names and column names fail at construction."""
+        with pytest.raises(ValueError, match="Unknown ranking profile"):
+            ranking_weights("bm42")
+        with pytest.raises(ValueError, match="Unknown FTS columns"):
+            ProductCache("unused.db", ranking={"title": 2.0})
+        assert ranking_weights("flat") == (1.0,) * 5
+    
+    def test_evaluation_harness_scores_profiles(self, db_path):
+        """Test the offline harness prefers the profile that ranks the judged product first."""
+        from reachy_edge.cache.ranking_eval import evaluate_ranking, score_ranking
+        
+        judgments = [("lantern", {"RANK-002": 3, "RANK-001": 1})]
+        flat = ProductCache(db_path, ranking="flat", read_only=True)
+        weighted = ProductCache(db_path, ranking="name_first", read_only=True)
+        flat_scores = evaluate_ranking(flat, judgments)
+        weighted_scores = evaluate_ranking(weighted, judgments)
+        assert weighted_scores["p_at_1"] == 1.0 and flat_scores["p_at_1"] == 0.0
+        assert weighted_scores["ndcg"] == pytest.approx(1.0)
+        assert flat_scores["ndcg"] < 1.0 and weighted_scores["queries"] == 1
+        assert score_ranking([], {"RANK-002": 3}, k=5)["mrr"] == 0.0
+        flat.close()
+        weighted.close()
+
+
+class TestFacets:
+    """Test facet filters, facet counts and the category aggregate."""
+    
+    @pytest.fixture
+    def cache(self):
+        """Create a cache with products across two categories and locations."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_instance = ProductCache(str(Path(tmpdir) / "test_products.db"))
+            cache_instance.initialize()
+            cache_instance.insert_products([
+                Product(sku=f"FACET-{i:03d}", name=f"Lamp {i}",
+                        category="Lighting" if i % 2 else "Outdoor",
+                        location=f"Aisle {i % 3}", price=float(i), description="Desk lamp")
+                for i in range(1, 11)
+            ])
+            yield cache_instance
+            cache_instance.close()
+    
+    def test_filters_applied_in_query(self, cache):
+        """Test category (case-insensitive), location and price filters narrow results."""
+        results = cache.search_products("lamp", max_results=20,
+                                        filters=SearchFilters(category="lighting", min_price=3, max_price=7))
+        assert sorted(p.sku for p in results) == ["FACET-003", "FACET-005", "FACET-007"]
+        results = cache.search_products("lamp", max_results=20, filters=SearchFilters(location="aisle 0"))
+        assert sorted(p.price for p in results) == [3.0, 6.0, 9.0]
+        
+        plan = " ".join(row[-1] for row in cache._get_connection().execute(
+            "EXPLAIN QUERY PLAN SELECT count(*) FROM products p WHERE 1" + SearchFilters(category="x").where()[0],
+            ("x",),
+        ))
+        assert "products_category" in plan
+    
+    def test_facet_counts(self, cache):
+        """Test counts cover every match, not just one page of results."""
+        facets = cache.facet_counts("lamp", SearchFilters(max_price=4))
+        assert facets["total"] == 4
+        assert facets["category"] == {"Lighting": 2, "Outdoor": 2}
+        assert facets["price"] == {"min": 1.0, "max": 4.0}
+        assert sum(cache.facet_counts()["location"].values()) == 10
+        assert cache.facet_counts("zzzz")["total"] == 0
+    
+    def test_category_aggregate_follows_writes(self, cache):
+        """Test category_counts tracks inserts, updates, deletes, deltas and swaps."""
+        assert cache.category_counts() == {"Lighting": 5, "Outdoor": 5}
+        cache.insert_product(Product(sku="FACET-001", name="Lamp 1", category="Outdoor",
+                                     location="Aisle 1", price=1.0, description="Moved"))
+        cache.apply_delta(
+            [Product(sku="FACET-099", name="Flare", category="Safety", location="Aisle 9",
+                     price=5.0, description="New")],
+            ["FACET-002"], base_version="v0", version="v1",
+        )
+        assert cache.category_counts() == {"Lighting": 4, "Outdoor": 5, "Safety": 1}
+        cache.replace_products([Product(sku="ONLY-1", name="Rope", category="Outdoor",
+                                        location="Aisle 1", price=2.0, description="Rope")])
+        assert cache.category_counts() == {"Outdoor": 1}
+    
+    def test_category_counts_ignore_case(self, cache):
+        """Test categories differing only in case count as one, like the filter."""
+        def lowered(counts):
+            return {name.lower(): n for name, n in counts.items()}
+        
+        shouty = Product(sku="FACET-050", name="Lamp 50", category="LIGHTING",
+                         location="aisle 1", price=1.0, description="Shouty")
+        cache.insert_product(shouty)
+        assert cache.facet_counts(filters=SearchFilters(category="lighting"))["total"] == 6
+        assert lowered(cache.category_counts()) == {"lighting": 6, "outdoor": 5}
+        assert lowered(cache.facet_counts()["category"]) == {"lighting": 6, "outdoor": 5}
+        assert sum(cache.facet_counts()["location"].values()) == 11
+        assert len(cache.facet_counts()["location"]) == 3
+        
+        cache.replace_products([p.to_product() for p in cache.list_records(limit=20)])
+        assert lowered(cache.category_counts()) == {"lighting": 6, "outdoor": 5}
+    
+    @pytest.mark.asyncio
+    async def test_l2_categories_memoized_per_version(self):
+        """Test L2Cache.categories reads the aggregate once per catalog version."""
+        from reachy_edge.cache import L2Cache
+        from reachy_edge.cache.schemas import Product as CacheProduct
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            l2 = L2Cache(str(Path(tmpdir) / "cache.db"))
+            try:
+                await l2.update_products([
+                    CacheProduct(sku=f"SKU{i}", name=f"Item {i}", aisle="1", category=f"Cat {i % 3}", price=1.0)
+                    for i in range(300)
+                ])
+                categories = await l2.categories()
+                assert categories == {"Cat 0": 100, "Cat 1": 100, "Cat 2": 100}
+                assert await l2.categories() is categories
+                await l2.update_products([CacheProduct(sku="X", name="X", aisle="1", category="Solo")])
+                assert await l2.categories() == {"Solo": 1}
+            finally:
+                l2.close()
+
+
+class TestPagination:
+    """Test keyset pagination and streamed catalog export."""
+    
+    @pytest.mark.asyncio
+    async def test_pages_cover_catalog_once(self):
+        """Test cursor pages return every SKU once, in order, across a catalog swap."""
+        from reachy_edge.cache import L2Cache
+        from reachy_edge.cache.schemas import Product as CacheProduct
+        
+        def products(skus):
+            return [CacheProduct(sku=sku, name=f"Item {sku}", aisle="1", category="Misc") for sku in skus]
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            l2 = L2Cache(str(Path(tmpdir) / "cache.db"))
+            try:
+                await l2.update_products(products(f"SKU{i:03d}" for i in range(25)))
+                page, cursor = await l2.list_products(limit=10)
+                seen = [p.sku for p in page]
+                assert cursor == "SKU009"
+                
+                # Swap in a catalog with new SKUs on both sides of the cursor.
+                await l2.update_products(products(["AAA"] + [f"SKU{i:03d}" for i in range(30)]))
+                while cursor:
+                    page, cursor = await l2.list_products(cursor, limit=10)
+                    seen += [p.sku for p in page]
+                assert seen == [f"SKU{i:03d}" for i in range(30)]
+                
+                exported = [record.sku async for record in l2.iter_products(batch_size=7)]
+                assert exported == ["AAA"] + seen
+            finally:
+                l2.close()
+    
+    def test_page_uses_sku_index(self):
+        """Test a deep page is an index range scan, not an offset walk."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ProductCache(str(Path(tmpdir) / "test_products.db"))
+            cache.initialize()
+            plan = " ".join(row[-1] for row in cache._get_connection().execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM products WHERE sku > ? ORDER BY sku LIMIT ?", ("x", 10),
+            ))
+            assert "(sku>?)" in plan and "TEMP B-TREE" not in plan
+            cache.close()
+
+
+@pytest.fixture
+def products():
+    """The sample catalog as backend (aisle-schema) products."""
+    from reachy_edge.cache.schemas import Product as CacheProduct
+    from reachy_edge.data.sample_products import get_sample_products
+    
+    return [
+        CacheProduct(sku=p.sku, name=p.name, aisle=p.location, category=p.category,
+                     price=p.price, description=p.description)
+        for p in get_sample_products()
+    ]
+
+
+class TestSQLiteKeywordBackend:
+    """Test the FTS5 keyword backend."""
+    
+    def test_typo_repair_uses_its_catalog(self, products):
+        """Test typos are repaired against the backend's own catalog, then a shared rewriter is left alone."""
+        from reachy_edge.cache.query_rewrite import QueryRewriter
+        from reachy_edge.cache.vector_backends import SQLiteKeywordBackend
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "cache.db")
+            backend = SQLiteKeywordBackend(db_path)
+            backend.upsert_products(products)
+            assert backend.search_one("sulfer").sku == "FUEL-DIESEL-001"  # Not in the seed terms
+            assert SQLiteKeywordBackend(db_path).search_one("sulfer").sku == "FUEL-DIESEL-001"
+            
+            shared = QueryRewriter()
+            borrowed = SQLiteKeywordBackend(db_path, rewriter=shared)
+            borrowed.replace_products(products)
+            assert borrowed.rewriter is shared
+            assert borrowed.search_one("sulfer") is None
+
+
+@requires_numpy
+class TestLocalVectorBackend:
+    """Test the offline embedding backend."""
+    
+    def test_search_ranks_by_cosine(self, products):
+        """Test typos and multi-word queries find the product; nonsense finds nothing."""
+        from reachy_edge.cache.vector_backends import LocalVectorBackend
+        
+        backend = LocalVectorBackend()
+        backend.upsert_products(products)
+        assert backend.search_one("cofee").sku == "SNACK-COFFEE-301"
+        hits = backend.search("beef jerky", k=3)
+        assert hits[0][0].sku == "SNACK-JERKY-503"
+        assert [score for _, score in hits] == sorted((score for _, score in hits), reverse=True)
+        assert backend.search_one("zzqx kjh") is None
+        assert backend.search_one("") is None
+    
+    def test_index_persists_memory_mapped(self, products):
+        """Test a reopened backend memory-maps the saved matrix and keeps upserts."""
+        from reachy_edge.cache.vector_backends import LocalVectorBackend
+        from reachy_edge.cache.schemas import Product as CacheProduct
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            backend = LocalVectorBackend(tmpdir)
+            backend.upsert_products(products)
+            backend.upsert_products([CacheProduct(sku="NEW-1", name="Tire Gauge", aisle="3", category="Truck")])
+            
+            reopened = LocalVectorBackend(tmpdir)
+            stats = reopened.stats()
+            assert stats["memory_mapped"] is True
+            assert stats["product_count"] == len(products) + 1
+            assert reopened.search_one("tire gauge").sku == "NEW-1"
+            assert reopened.search_one("beef jerky").sku == "SNACK-JERKY-503"
+    
+    def test_slot_memo_is_bounded(self, monkeypatch):
+        """Test the embedder's feature-slot memo stops growing at its limit."""
+        from reachy_edge.cache import embeddings
+        
+        monkeypatch.setattr(embeddings, "SLOT_CACHE_SIZE", 16)
+        bounded = embeddings.HashedNgramEmbedder(dim=64)
+        texts = [f"query {i} word{i * 7}" for i in range(50)]
+        vectors = bounded.embed(texts)
+        assert bounded._slot.cache_info().currsize == 16
+        monkeypatch.setattr(embeddings, "SLOT_CACHE_SIZE", 1 << 18)
+        assert (embeddings.HashedNgramEmbedder(dim=64).embed(texts) == vectors).all()
+    
+    def test_ivf_index_inserts_and_persists(self):
+        """Test IVF matches exact search at full probe, takes incremental inserts and reloads."""
+        from reachy_edge.cache.schemas import Product as CacheProduct
+        from reachy_edge.cache.vector_backends import LocalVectorBackend
+        
+        words = ["diesel", "coffee", "charger", "jerky", "water", "radio", "strap", "glove", "tarp", "flare"]
+        catalog = [
+            CacheProduct(sku=f"SKU{i:04d}", name=f"{words[i % 10]} {words[i // 10 % 10]} model {i}",
+                         aisle="1", category=f"Cat {i % 7}")
+            for i in range(600)
+        ]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            backend = LocalVectorBackend(tmpdir, index="ivf", nlist=8, nprobe=2, min_train=200)
+            backend.upsert_products(catalog)
+            assert backend.stats()["index"]["trained"] is True
+            
+            exact = LocalVectorBackend()
+            exact.upsert_products(catalog)
+            query = exact.embed_query("coffee radio")
+            full = backend.index.search(query, k=10, nprobe=8)
+            assert [backend._skus[row] for row, _ in full] == [exact._skus[row] for row, _ in exact.index.search(query, 10)]
+            
+            backend.upsert_products([
+                CacheProduct(sku="NEW-1", name="tire pressure gauge", aisle="2", category="Truck"),
+                CacheProduct(sku="SKU0003", name="jerky coffee model 3", aisle="1", category="Cat 3"),
+            ])
+            assert backend.stats()["index"]["overflow_rows"] >= 1
+            assert backend.search_one("tire pressure gauge").sku == "NEW-1"
+            
+            reopened = LocalVectorBackend(tmpdir, index="ivf", nprobe=8)
+            assert reopened.index.nprobe == 8
+            assert reopened.stats()["product_count"] == 601
+            assert reopened.search_one("tire pressure gauge").sku == "NEW-1"
+            assert reopened.search_one("coffee radio model 53").sku == "SKU0053"
+
+
+class TestQdrantVectorBackend:
+    """Test the Qdrant backend's local fallback."""
+    
+    def test_without_numpy_falls_back_to_substring_match(self, monkeypatch):
+        """Test construction and search work when NumPy cannot be imported."""
+        import reachy_edge.cache as cache_pkg
+        from reachy_edge.cache.schemas import Product as CacheProduct
+        from reachy_edge.cache.vector_backends import QdrantVectorBackend
+        
+        monkeypatch.setitem(sys.modules, "numpy", None)
+        for name in ("embeddings", "vector_index"):
+            monkeypatch.delitem(sys.modules, f"reachy_edge.cache.{name}", raising=False)
+            monkeypatch.delattr(cache_pkg, name, raising=False)
+        
+        backend = QdrantVectorBackend("http://127.0.0.1:9", "products", embedding_dim=64)
+        backend.upsert_products([CacheProduct(sku="TIRE-1", name="Tire Gauge", aisle="3", category="Truck")])
+        assert backend.search_one("tire gauge").sku == "TIRE-1"
+        assert backend.search_one("kayak") is None
+        assert backend.stats()["vectors_enabled"] is False
+
+
+@requires_numpy
+class TestHybridBackend:
+    """Test keyword + vector retrieval fused by reciprocal rank."""
+    
+    def test_fuses_both_legs(self, products):
+        """Test RRF merges both legs, pins exact SKUs and times each leg."""
+        from reachy_edge.cache.vector_backends import HybridBackend, LocalVectorBackend, SQLiteKeywordBackend
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            hybrid = HybridBackend(SQLiteKeywordBackend(str(Path(tmpdir) / "cache.db")), LocalVectorBackend())
+            try:
+                hybrid.upsert_products(products)
+                hits = hybrid.search("diesel fuel", k=3)
+                assert hits[0][0].sku == "FUEL-DIESEL-001"
+                assert hits[0][1] == pytest.approx(2 / 61)  # rank 1 in both legs
+                assert hybrid.search_one("elect-cb-105").sku == "ELECT-CB-105"
+                assert hybrid.search("") == []
+                
+                legs = hybrid.stats()["legs"]
+                assert legs["keyword"]["calls"] == legs["vector"]["calls"] == 2
+                assert legs["vector"]["dropped"] == 0 and legs["vector"]["mean_ms"] > 0
+            finally:
+                hybrid.close()
+    
+    def test_replace_removes_sku_from_both_legs(self, products):
+        """Test a SKU left out of a new catalog is gone from the fused results."""
+        from reachy_edge.cache.vector_backends import HybridBackend, LocalVectorBackend, SQLiteKeywordBackend
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            vector = LocalVectorBackend(str(Path(tmpdir) / "vectors"))
+            hybrid = HybridBackend(SQLiteKeywordBackend(str(Path(tmpdir) / "cache.db")), vector)
+            try:
+                hybrid.upsert_products(products)
+                assert hybrid.search_one("beef jerky").sku == "SNACK-JERKY-503"
+                
+                kept = [p for p in products if p.sku != "SNACK-JERKY-503"][:3]
+                kept[0] = kept[0].model_copy(update={"upc": "012345678905"})
+                hybrid.upsert_products(kept)
+                skus = {p.sku for p, _ in hybrid.search("beef jerky", k=10)}
+                assert "SNACK-JERKY-503" not in skus and skus <= {p.sku for p in kept}
+                assert hybrid.stats()["legs"]["vector"]["product_count"] == 3
+                assert LocalVectorBackend(str(Path(tmpdir) / "vectors")).stats()["product_count"] == 3
+                assert hybrid.search(kept[0].sku, k=1)[0][0].upc == "012345678905"
+            finally:
+                hybrid.close()
+    
+    def test_replace_with_qdrant_leg(self, products, monkeypatch):
+        """Test replacing a hybrid catalog recreates the Qdrant collection without the removed SKU."""
+        import types
+        from reachy_edge.cache.vector_backends import HybridBackend, QdrantVectorBackend, SQLiteKeywordBackend
+        
+        class FakeQdrantClient:
+            def __init__(self, url):
+                self.points = []
+                self.recreated = 0
+            
+            def recreate_collection(self, collection_name, vectors_config):
+                self.points = []
+                self.recreated += 1
+            
+            def upsert(self, collection_name, points):
+                self.points.extend(points)
+            
+            def search(self, collection_name, query_vector, limit):
+                def score(point):
+                    return sum(a * b for a, b in zip(point.vector, query_vector))
+                return sorted(self.points, key=score, reverse=True)[:limit]
+        
+        models = types.ModuleType("qdrant_client.models")
+        models.PointStruct = types.SimpleNamespace
+        models.VectorParams = dict
+        models.Distance = types.SimpleNamespace(COSINE="Cosine")
+        client_module = types.ModuleType("qdrant_client")
+        client_module.QdrantClient = FakeQdrantClient
+        client_module.models = models
+        monkeypatch.setitem(sys.modules, "qdrant_client", client_module)
+        monkeypatch.setitem(sys.modules, "qdrant_client.models", models)
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            qdrant = QdrantVectorBackend("http://qdrant:6333", "products", embedding_dim=256)
+            hybrid = HybridBackend(SQLiteKeywordBackend(str(Path(tmpdir) / "cache.db")), qdrant)
+            try:
+                hybrid.upsert_products(products)
+                assert qdrant.search_one("beef jerky").sku == "SNACK-JERKY-503"
+                
+                kept = [p for p in products if p.sku != "SNACK-JERKY-503"]
+                hybrid.replace_products(kept)
+                assert qdrant._client.recreated == 2
+                assert sorted(point.payload["sku"] for point in qdrant._client.points) == sorted(p.sku for p in kept)
+                assert qdrant.search_one("beef jerky").sku != "SNACK-JERKY-503"
+                assert "SNACK-JERKY-503" not in {p.sku for p, _ in hybrid.search("beef jerky", k=10)}
+                assert qdrant.stats()["cached_products"] == len(kept)
+            finally:
+                hybrid.close()
+    
+    def test_slow_leg_dropped_within_budget(self, products):
+        """Test a leg over the latency budget is left out instead of blocking."""
+        from reachy_edge.cache.vector_backends import HybridBackend, LocalVectorBackend, ProductRetrievalBackend
+        
+        release = threading.Event()
+        
+        class SlowBackend(ProductRetrievalBackend):
+            def upsert_products(self, products):
+                pass
+            
+            def replace_products(self, products):
+                pass
+            
+            def search_one(self, query):
+                release.wait(5)
+                return products[0]
+            
+            def stats(self):
+                return {"backend": "slow"}
+        
+        vector = LocalVectorBackend()
+        vector.upsert_products(products)
+        hybrid = HybridBackend(SlowBackend(), vector, budget_ms=20)
+        try:
+            start = time.perf_counter()
+            assert hybrid.search_one("beef jerky").sku == "SNACK-JERKY-503"
+            assert time.perf_counter() - start < 1.0
+            assert hybrid.search_one("coffee").sku == "SNACK-COFFEE-301"  # a fresh call, also over budget
+            assert hybrid.stats()["legs"]["keyword"]["dropped"] == 2
+        finally:
+            release.set()
+            hybrid.close()
+    
+    def test_concurrent_searches_use_both_legs(self, products):
+        """Test simultaneous queries each get both legs, none are skipped."""
+        from concurrent.futures import ThreadPoolExecutor
+        from reachy_edge.cache.vector_backends import HybridBackend, LocalVectorBackend, SQLiteKeywordBackend
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            hybrid = HybridBackend(SQLiteKeywordBackend(str(Path(tmpdir) / "cache.db")), LocalVectorBackend(),
+                                   budget_ms=5000)
+            try:
+                hybrid.upsert_products(products)
+                start = threading.Barrier(4)
+                
+                def query(_):
+                    start.wait()
+                    return hybrid.search("diesel fuel", k=3)
+                
+                with ThreadPoolExecutor(max_workers=4) as callers:
+                    results = list(callers.map(query, range(4)))
+                assert all(hits and hits[0][0].sku == "FUEL-DIESEL-001" for hits in results)
+                legs = hybrid.stats()["legs"]
+                assert legs["keyword"]["calls"] == legs["vector"]["calls"] == 4
+                assert legs["keyword"]["dropped"] == legs["vector"]["dropped"] == 0
+            finally:
+                hybrid.close()
+
+
+class TestCatalogSwap:
+    """Test blue/green catalog replacement."""
+    
+    @staticmethod
+    def _products(prefix: str, count: int) -> list:
+        return [
+            Product(
+                sku=f"{prefix}-{i:03d}",
+                name=f"{prefix} Lantern {i}",
+                category="Test",
+                location="Test Location",
+                price=float(i),
+                description="Swap target"
+            )
+            for i in range(count)
+        ]
+    
+    def test_replace_bumps_generation(self):
+        """Test each replacement serves only the new catalog under a new ID."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ProductCache(str(Path(tmpdir) / "test_products.db"), profile="read_heavy")
+            cache.initialize()
+            assert cache.generation() == 0
+            
+            assert cache.replace_products(self._products("BLUE", 3)) == 1
+            assert cache.replace_products(self._products("GREEN", 2)) == 2
+            
+            assert cache.product_count() == 2
+            assert {p.sku for p in cache.search_products("lantern")} == {"GREEN-000", "GREEN-001"}
+            leftovers = cache._get_connection().execute(
+                "SELECT name FROM sqlite_master WHERE name LIKE 'products_fts_next%'"
+            ).fetchall()
+            assert leftovers == []  # Side table and its shadow tables were renamed
+            cache.close()
+    
+    def test_swap_transaction_only_renames(self):
+        """Test indexes and aggregates are built before the write lock is taken."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "test_products.db")
+            cache = ProductCache(db_path)
+            cache.initialize()
+            statements = []
+            conn = cache._get_connection()
+            conn.set_trace_callback(statements.append)
+            for prefix in ("BLUE", "GREEN"):
+                cache.replace_products(self._products(prefix, 3))
+            conn.set_trace_callback(None)
+            
+            begin = max(i for i, sql in enumerate(statements) if sql.startswith("BEGIN IMMEDIATE"))
+            locked = " ".join(statements[begin:]).upper()
+            assert "CREATE INDEX" not in locked and "INSERT INTO CATEGORY_COUNTS" not in locked
+            
+            cache.insert_product(Product(sku="GREEN-009", name="Green Lantern 9", category="Other",
+                                         location="Test Location", price=9.0, description="After swap"))
+            cache.close()
+            reopened = ProductCache(db_path)
+            reopened.initialize()  # Must not add a second copy of any index or trigger
+            schema = reopened._get_connection().execute(
+                "SELECT type, name FROM sqlite_master WHERE tbl_name = 'products' AND type IN ('index', 'trigger')"
+            ).fetchall()
+            assert sorted(name for kind, name in schema if kind == "index" and "autoindex" not in name) == [
+                "products_g2_category", "products_g2_ean", "products_g2_location", "products_g2_price", "products_g2_upc",
+            ]
+            assert len([name for kind, name in schema if kind == "trigger"]) == 6
+            assert reopened.search_products("lantern 9")[0].sku == "GREEN-009"
+            assert reopened.category_counts() == {"Other": 1, "Test": 3}
+            reopened.close()
+    
+    def test_in_flight_reader_keeps_old_generation(self):
+        """Test a read transaction open during the swap still sees the old catalog."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "test_products.db")
+            writer = ProductCache(db_path, profile="read_heavy")
+            writer.replace_products(self._products("BLUE", 3))
+            
+            reader = ProductCache(db_path, profile="read_heavy", read_only=True)
+            conn = reader._get_connection()
+            conn.execute("BEGIN")
+            assert reader.product_count() == 3
+            
+            writer.replace_products(self._products("GREEN", 5))
+            
+            assert reader.product_count() == 3  # Same snapshot until it ends
+            conn.commit()
+            assert reader.product_count() == 5
+            reader.close()
+            writer.close()
+    
+    @pytest.mark.asyncio
+    async def test_l2_cache_exposes_generation(self):
+        """Test L2Cache stats report the served generation across restarts."""
+        from reachy_edge.cache import L2Cache
+        from reachy_edge.cache.schemas import Product as CacheProduct
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "cache.db")
+            l2 = L2Cache(db_path)
+            try:
+                await l2.update_products([
+                    CacheProduct(sku="SKU001", name="Milk", aisle="5", category="Dairy", price=3.99),
+                ])
+                await l2.update_products([
+                    CacheProduct(sku="SKU002", name="Bread", aisle="2", category="Bakery", price=2.49),
+                ])
+                stats = l2.stats()
+                assert stats["generation"] == 2
+                assert stats["building_generation"] is None
+                assert stats["swapped_at"] is not None
+                assert await l2.search_product("milk") is None
+                assert stats["query_rewrite"]["terms"] == len(l2._products.vocabulary())
+                assert (await l2.search_product("breaad")).sku == "SKU002"
+            finally:
+                l2.close()
+            
+            restarted = L2Cache(db_path)
+            assert restarted.stats()["generation"] == 2
+            restarted.close()
+
+class TestDeltaSync:
+    """Test incremental catalog changes through the SKU index."""
+    
+    def _seed(self, db_path: str) -> ProductCache:
+        cache = ProductCache(db_path)
+        cache.replace_products([
+            Product(sku=f"DELTA-{i}", name=f"Delta Kettle {i}", category="Test",
+                    location="Test Location", price=float(i), description="Delta target")
+            for i in range(3)
+        ])
+        cache.set_meta("version", "v1")
+        return cache
+    
+    def test_upsert_and_delete_touch_only_listed_skus(self):
+        """Test updates keep the rowid, new SKUs insert and deletes drop the row."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = self._seed(str(Path(tmpdir) / "test_products.db"))
+            conn = cache._get_connection()
+            rowid_before = conn.execute("SELECT id FROM products WHERE sku = 'DELTA-1'").fetchone()[0]
+            
+            changed = cache.apply_delta(
+                upserted=[
+                    Product(sku="DELTA-1", name="Delta Kettle 1", category="Test",
+                            location="Test Location", price=9.99, description="Repriced"),
+                    Product(sku="DELTA-9", name="Delta Toaster", category="Test",
+                            location="Test Location", price=19.0, description="New"),
+                ],
+                deleted_skus=["DELTA-0", "MISSING"],
+                base_version="v1",
+                version="v2",
+            )
+            
+            assert changed == 3  # Unknown deletions are ignored
+            assert cache.get_meta("version") == "v2"
+            assert cache.product_count() == 3
+            assert conn.execute("SELECT id FROM products WHERE sku = 'DELTA-1'").fetchone()[0] == rowid_before
+            kettles = {p.sku: p.price for p in cache.search_products("kettle")}
+            assert kettles == {"DELTA-1": 9.99, "DELTA-2": 2.0}
+            assert cache.search_products("toaster")[0].sku == "DELTA-9"
+            cache.close()
+    
+    def test_base_version_mismatch_rejected(self):
+        """Test a delta for another base version changes nothing."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = self._seed(str(Path(tmpdir) / "test_products.db"))
+            
+            with pytest.raises(DeltaBaseMismatch) as exc_info:
+                cache.apply_delta([], ["DELTA-0"], base_version="v0", version="v2")
+            
+            assert exc_info.value.current_version == "v1"
+            assert cache.get_meta("version") == "v1"
+            assert cache.product_count() == 3
+            cache.close()
+    
+    def test_full_replace_stores_version_with_catalog(self):
+        """Test a versioned replace moves the delta base along with the catalog."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = self._seed(str(Path(tmpdir) / "test_products.db"))
+            cache.replace_products([
+                Product(sku="DELTA-7", name="Delta Kettle 7", category="Test",
+                        location="Test Location", price=7.0, description="Reseeded")
+            ], version="v0")
+            
+            assert cache.get_meta("version") == "v0"
+            with pytest.raises(DeltaBaseMismatch):
+                cache.apply_delta([], ["DELTA-7"], base_version="v1", version="v2")
+            assert cache.product_count() == 1
+            cache.close()
+
+
+class TestSQLiteReadPool:
+    """Test async reads served by the worker thread pool."""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_awaited_searches(self):
+        """Test many concurrent awaits resolve on worker threads."""
+        import asyncio
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "test_products.db")
+            cache = ProductCache(db_path)
+            cache.initialize()
+            cache.insert_products([
+                Product(
+                    sku=f"POOL-{i:03d}",
+                    name=f"Pool Product {i}",
+                    category="Test",
+                    location="Test Location",
+                    price=float(i),
+                    description="Pooled search target"
+                )
+                for i in range(10)
+            ])
+            cache.close()
+            
+            pool = SQLiteReadPool(db_path, workers=3)
+            try:
+                results = await asyncio.gather(*[
+                    pool.run(ProductCache.search_products, "pool", 5) for _ in range(30)
+                ])
+                assert all(len(r) == 5 for r in results)
+                assert await pool.run(ProductCache.product_count) == 10
+                
+                stats = pool.stats()
+                assert stats["workers"] == 3
+                assert stats["completed"] == 31
+                assert stats["queue_depth"] == 0
+                assert stats["max_wait_ms"] >= stats["avg_wait_ms"] >= 0
+            finally:
+                pool.close()
+    
+    @pytest.mark.asyncio
+    async def test_worker_errors_propagate(self):
+        """Test an exception in a worker is raised to the awaiting caller."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pool = SQLiteReadPool(str(Path(tmpdir) / "test_products.db"), workers=1)
+            try:
+                with pytest.raises(sqlite3.OperationalError):
+                    await pool.run(lambda cache: cache._get_connection().execute("SELECT * FROM missing"))
+                assert pool.stats()["failed"] == 1
+            finally:
+                pool.close()
+    
+    @pytest.mark.asyncio
+    async def test_l2_cache_reports_pool_stats(self):
+        """Test L2Cache routes reads through its pool and exposes its metrics."""
+        from reachy_edge.cache import L2Cache
+        from reachy_edge.cache.schemas import Product as CacheProduct
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            l2 = L2Cache(str(Path(tmpdir) / "cache.db"), read_workers=2)
+            try:
+                assert l2.stats()["read_pool"] is None  # Started lazily
+                await l2.update_products([
+                    CacheProduct(sku="SKU001", name="Milk", aisle="5", category="Dairy", price=3.99),
+                ])
+                assert (await l2.search_product("milk")).sku == "SKU001"
+                assert (await l2.get_product("SKU001")).location == "Aisle 5"
+                assert await l2.product_count() == 1
+                
+                pool_stats = l2.stats()["read_pool"]
+                assert pool_stats["workers"] == 2
+                assert pool_stats["completed"] == 3
+            finally:
+                l2.close()
+    
+    @pytest.mark.asyncio
+    async def test_l2_stats_do_not_query_sqlite(self, monkeypatch):
+        """Test stats() serves the product count kept current by catalog writes."""
+        from reachy_edge.cache import L2Cache
+        from reachy_edge.cache.schemas import Product as CacheProduct
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            l2 = L2Cache(str(Path(tmpdir) / "cache.db"))
+            try:
+                await l2.update_products([
+                    CacheProduct(sku=f"SKU{i}", name=f"Item {i}", aisle="1", category="Misc") for i in range(3)
+                ])
+                await l2.apply_delta([], ["SKU0"], base_version=l2.version, version="v2")
+                
+                def no_sqlite(*args):
+                    raise AssertionError("stats() queried SQLite on the event loop")
+                
+                monkeypatch.setattr(l2._products, "product_count", no_sqlite)
+                assert l2.stats()["product_count"] == 2
+            finally:
+                l2.close()
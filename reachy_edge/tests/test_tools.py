@@ -42,9 +42,70 @@ async def test_product_lookup_tool():
         
         assert result.success is True
         assert "aisle 5" in result.data["response"].lower() or "5" in result.data["response"]
+        
+        # L1 keeps lean records; models are only built for the returned results
+        from reachy_edge.cache.l2_cache import ProductRecord
+        from reachy_edge.cache.query import product_cache_key
+        from reachy_edge.models import Product as SearchProduct
+        assert all(isinstance(p, ProductRecord) for p in l1_cache.get(product_cache_key("milk")))
+        assert isinstance(result.data["products"][0], SearchProduct)
+    
+    finally:
+        l2_cache.close()
+        try:
+            os.unlink(db_path)
+        except PermissionError:
+            pass  # Windows file locking
+
+
+@pytest.mark.asyncio
+async def test_product_lookup_tool_exact_code_skips_fts():
+    """Test SKU and barcode input is answered by the exact-code index."""
+    import tempfile
+    import os
+    
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".db") as tmp:
+        db_path = tmp.name
+    
+    try:
+        l1_cache = L1Cache()
+        l2_cache = L2Cache(db_path)
+        await l2_cache.update_products([
+            Product(sku="FUEL-DEF-001", name="BlueDEF", aisle="Fuel Island 2", category="Fuel",
+                    upc="012345678905"),
+            Product(sku="SNACK-JERKY-002", name="Beef Jerky", aisle="3", category="Snacks",
+                    ean="4006381333931"),
+        ])
+        
+        async def no_fts(*args, **kwargs):
+            raise AssertionError("full-text search should not run for exact codes")
+        l2_cache.search_products = l2_cache.search_records = no_fts
+        
+        deps = ToolDependencies(
+            l1_cache=l1_cache,
+            l2_cache=l2_cache,
+            reachy_id="TEST",
+            store_id="TEST",
+            zone_id="TEST"
+        )
+        tool = ProductLookupTool()
+        
+        for code, sku in [
+            ("FUEL-DEF-001", "FUEL-DEF-001"),
+            ("fuel-def-001", "FUEL-DEF-001"),
+            ("0012345678905", "FUEL-DEF-001"),  # EAN-13 form of the UPC-A
+            ("4006381333931", "SNACK-JERKY-002"),
+        ]:
+            result = await tool.execute(code, deps)
+            assert result.success is True
+            assert result.data["products"][0].sku == sku
+        
+        repeat = await tool.execute("FUEL-DEF-001", deps)
+        assert repeat.data["cache_hit"] is True
+        assert (await tool.lookup_product("4006381333931", deps))[0].sku == "SNACK-JERKY-002"
     
     finally:
-        l2_cache._products.close_all()
+        l2_cache.close()
         try:
             os.unlink(db_path)
         except PermissionError:
@@ -85,7 +146,7 @@ async def test_promo_manager_tool():
         assert "50%" in result.data["response"]
     
     finally:
-        l2_cache._products.close_all()
+        l2_cache.close()
         try:
             os.unlink(db_path)
         except PermissionError:
@@ -5,6 +5,13 @@ import logging
 import time
 
 from .base import Tool, ToolDependencies, ToolResult
+from ..cache.query import (
+    PRODUCT_RESULT_DEPTH,
+    canonicalize_query,
+    code_cache_key,
+    product_cache_key,
+    product_code,
+)
 from ..models.events import EventType
 
 logger = logging.getLogger(__name__)
@@ -22,14 +29,18 @@ class ProductLookupTool(Tool):
         deps: ToolDependencies,
         max_results: int = 5,
     ) -> list:
-        """Lookup products and rank exact SKU matches first."""
-        products = await deps.l2_cache.search_products(query, max_results=max_results)
-        if not products:
-            return []
-
-        query_norm = query.strip().lower()
-        products.sort(key=lambda p: 0 if p.sku.lower() == query_norm else 1)
-        return products
+        """Lookup products, best match first.
+
+        Scanner-style input (a SKU, UPC or EAN) is resolved by an indexed
+        exact lookup before any full-text search runs; otherwise results
+        come back in L2's BM25 ranking order.
+        """
+        code = product_code(query)
+        if code:
+            exact = await deps.l2_cache.lookup_code(code)
+            if exact:
+                return exact
+        return await deps.l2_cache.search_products(canonicalize_query(query), max_results=max_results)
 
     async def execute(self, query: str, deps: ToolDependencies, **kwargs) -> ToolResult:
         """Look up product and return concise response."""
@@ -37,18 +48,26 @@ class ProductLookupTool(Tool):
         max_results = int(kwargs.get("max_results", 3))
 
         try:
-            cache_key = f"product:{query.lower()}"
-            cache_hit = False
-
-            top_product = deps.l1_cache.get(cache_key)
-            products = []
-            if top_product:
-                cache_hit = True
-                products = [top_product]
-            else:
-                products = await self.lookup_product(query=query, deps=deps, max_results=max_results)
-                if products:
-                    deps.l1_cache.set(cache_key, products[0])
+            products, cache_hit = [], False
+            code = product_code(query)
+            if code:
+                # Exact SKU/UPC/EAN fast path; FTS5 never sees the code
+                products, cache_hit = await deps.l1_cache.get_or_load(
+                    code_cache_key(code), lambda: deps.l2_cache.lookup_records(code)
+                )
+
+            if not products:
+                cache_key = product_cache_key(query)
+                canonical = canonicalize_query(query)
+                deps.l2_cache.record_query(canonical)
+
+                # Same key and value shape as /api/products/search: the ranked L2
+                # ProductRecords. Concurrent misses for the same query share one lookup.
+                cached, cache_hit = await deps.l1_cache.get_or_load(
+                    cache_key,
+                    lambda: deps.l2_cache.search_records(canonical, max_results=PRODUCT_RESULT_DEPTH),
+                )
+                products = cached[:max_results]
 
             latency_ms = (time.time() - start_time) * 1000
 
@@ -95,7 +114,7 @@ class ProductLookupTool(Tool):
                 success=True,
                 data={
                     "response": response,
-                    "products": products,
+                    "products": [p.to_product() for p in products],
                     "cache_hit": cache_hit,
                     "result_count": len(products),
                 },